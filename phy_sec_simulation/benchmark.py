@@ -0,0 +1,690 @@
+"""
+Benchmark suite for the strategy implementations and the simulation paths.
+
+Measures channel realizations (Bob draws, each with its M_G Eve draws) per second for every registered
+strategy over a grid of N and M_G, on four paths:
+    serial   - the per-draw strategy_X functions, one call per realization
+    batched  - the strategy_X_batch functions, all realizations in one call
+    fused    - the batched pipeline on the Numba kernels (backend='numba'); skipped without Numba
+    parallel - run_parallel_simulation (the run_simulation(workers=...) path) on a process pool
+and writes the results, with metadata about the machine, as JSON. compare flags regressions against
+a stored baseline. Runs with the fused path report its speedup over the batched path per case and its
+largest deviation from the NumPy backend on the same draws. Every run also measures the startup of a
+worker: importing the compute-only strategies package in a fresh interpreter must stay within
+STARTUP_TARGET_SECONDS beyond NumPy's own import and must not load any of HEAVY_MODULES. precision checks
+the complex64 mode against the complex128 path on the same draws and times both. an-check compares the
+artificial noise of generate_an_vectors (a full draw projected off h) with gamma_v = Gamma v built from the
+null-space basis Gamma of scipy.linalg.null_space, for the same channels h. resume-check interrupts
+checkpointed runs (main.run_simulation and run_parallel_simulation, in-process and on a pool) and resumes
+them; the results must be bit-identical to those of an uninterrupted run. queue-check runs the shards of
+a run through a WorkQueue with lost and late workers, so that shards are requeued and finish twice, and
+through run_distributed_simulation; both must reduce to the run_parallel_simulation results bit for bit.
+
+Run from the phy_sec_simulation directory:
+    python benchmark.py run [--quick] [--output results/benchmark.json]
+    python benchmark.py compare results/benchmark_baseline.json results/benchmark.json [--threshold 0.1]
+    python benchmark.py startup
+    python benchmark.py precision [--n 4 64] [--output results/precision.json]
+    python benchmark.py an-check [--n 2 4 10 64] [--draws 5000]
+    python benchmark.py resume-check [--workers 2]
+    python benchmark.py queue-check [--workers 2]
+compare exits with status 1 when a case got slower than the threshold allows or the current startup misses
+its target, startup when the startup misses its target, precision when complex64 deviates beyond
+PRECISION_RS_TOL or PRECISION_PROB_TOL, an-check when a Kolmogorov-Smirnov p-value is below AN_CHECK_MIN_P
+or an AN vector leaks more than AN_CHECK_LEAKAGE_TOL into h, resume-check when a resumed run differs,
+queue-check when a queued run differs or the shards were not requeued and finished twice as forced.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+import strategies
+from strategies import (
+    STRATEGY_REGISTRY, ChannelSource, SimulationCheckpoint, WorkQueue, evaluate_specs, evaluate_strategy_batch,
+    generate_an_vectors, generate_channel_matrix, numba_available, run_distributed_simulation,
+    run_parallel_simulation, run_queue_worker, snr_to_total_power
+)
+from strategies.cache import code_version
+
+BENCHMARK_N_VALUES = (2, 4, 10, 64, 256)
+BENCHMARK_M_G_VALUES = (100, 1000, 10000)
+BENCHMARK_PATHS = ('serial', 'batched', 'fused', 'parallel')
+# Reduced grid of --quick
+QUICK_N_VALUES = (4, 64)
+QUICK_M_G_VALUES = (100, 1000)
+
+# Fixed operating point, so results do not depend on config.py
+BENCHMARK_SNR_DB = 10.0
+BENCHMARK_ALPHA = 0.5
+BENCHMARK_SIGMA_N_SQ = 1.0
+BENCHMARK_R_THRESHOLD = 1.0
+BENCHMARK_SEED = 2024
+
+MIN_TIME = 0.2 # Seconds a timed run must last; the number of realizations is doubled until it does
+MAX_DRAWS = 2**20
+REPEAT = 3 # Timed runs per case; the fastest is reported
+REGRESSION_THRESHOLD = 0.1 # compare flags cases more than 10% slower than the baseline
+STARTUP_TARGET_SECONDS = 0.05 # Import time of the strategies package beyond NumPy's, in a fresh interpreter
+STARTUP_REPEAT = 5 # Fresh interpreters timed; the fastest is reported
+HEAVY_MODULES = ('scipy', 'matplotlib', 'pandas', 'concurrent.futures', 'numba') # Not needed to evaluate strategies
+# precision: largest deviations of complex64 from complex128 on the same draws that still pass
+PRECISION_RS_TOL = 1e-4 # Average secrecy rate, bits/s/Hz (results are plotted to two decimals)
+PRECISION_PROB_TOL = 1e-3 # P(Rs > R)
+PRECISION_N_VALUES = (2, 10, 64)
+PRECISION_SNR_DB = tuple(range(-5, 21, 5))
+PRECISION_M_H = 2000
+PRECISION_M_G = 1000
+PRECISION_R_THRESHOLD = 3.0
+# an-check: both AN constructions on AN_CHECK_DRAWS channels per N, compared by two-sample KS tests
+AN_CHECK_N_VALUES = (2, 4, 10, 64)
+AN_CHECK_DRAWS = 5000
+AN_CHECK_MIN_P = 1e-3 # Smallest KS p-value that passes; the seed is fixed, so the outcome is reproducible
+AN_CHECK_LEAKAGE_TOL = 1e-9 # Largest |h^H gamma_v| that passes (complex128 rounding is ~1e-14)
+# resume-check and queue-check: a small run, in RUN_CHECK_SNR_DB x strategies x RUN_CHECK_M_H / RUN_CHECK_CHUNK
+# tasks
+RUN_CHECK_N = 4
+RUN_CHECK_SNR_DB = (0.0, 5.0, 10.0, 15.0)
+RUN_CHECK_M_H = 600
+RUN_CHECK_M_G = 200
+RUN_CHECK_CHUNK = 200
+RUN_CHECK_WORKERS = 2
+QUEUE_CHECK_LOST = 3 # Shards claimed by a worker that never finishes them
+QUEUE_CHECK_LATE = 2 # Shards whose worker finishes them after they were requeued and run again
+FORMAT_VERSION = 1
+
+def machine_metadata():
+    """Description of the machine, interpreter and code the benchmark ran on."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'git_commit': commit,
+        'code_version': code_version(),
+    }
+
+def _path_runner(path, spec, N, M_g_sims, workers):
+    """
+    Function running a given number of realizations of one case on the given path,
+    and the smallest number of realizations worth timing.
+    """
+    P_total = float(snr_to_total_power(BENCHMARK_SNR_DB, BENCHMARK_SIGMA_N_SQ))
+    args = (P_total, N, BENCHMARK_ALPHA, BENCHMARK_SIGMA_N_SQ, M_g_sims, BENCHMARK_R_THRESHOLD)
+    if path == 'serial':
+        strategy_func = getattr(strategies, spec.name)
+        def run(draws):
+            rng = np.random.default_rng(BENCHMARK_SEED)
+            for _ in range(draws):
+                strategy_func(*args, rng=rng)
+        return run, 1
+    if path == 'batched':
+        batch_func = getattr(strategies, spec.name + '_batch')
+        def run(draws):
+            batch_func(*args, M_h_sims=draws, rng=np.random.default_rng(BENCHMARK_SEED))
+        return run, 16
+    if path == 'fused':
+        def run(draws):
+            evaluate_strategy_batch(spec, *args, M_h_sims=draws, rng=np.random.default_rng(BENCHMARK_SEED),
+                                    backend='numba')
+        run(16) # Compiles the kernels (or loads them from Numba's cache), which is not timed
+        return run, 16
+    if path == 'parallel':
+        def run(draws):
+            run_parallel_simulation([spec.name], [BENCHMARK_SNR_DB], N, BENCHMARK_ALPHA, BENCHMARK_SIGMA_N_SQ, draws,
+                                    M_g_sims, BENCHMARK_R_THRESHOLD, seed=BENCHMARK_SEED, workers=workers)
+        return run, 250 * workers # At least one task per worker
+    raise ValueError(f"Unknown benchmark path {path!r}, expected one of {BENCHMARK_PATHS}")
+
+def fused_deviation(spec, N, M_g_sims, draws=256):
+    """Largest |R_s| difference between the NumPy and Numba backends over draws Bob draws of the same seed."""
+    P_total = float(snr_to_total_power(BENCHMARK_SNR_DB, BENCHMARK_SIGMA_N_SQ))
+    R_s = [evaluate_strategy_batch(spec, P_total, N, BENCHMARK_ALPHA, BENCHMARK_SIGMA_N_SQ, M_g_sims,
+                                   BENCHMARK_R_THRESHOLD, M_h_sims=draws, rng=np.random.default_rng(BENCHMARK_SEED),
+                                   backend=backend)[0]
+           for backend in ('numpy', 'numba')]
+    return float(np.max(np.abs(R_s[0] - R_s[1])))
+
+def fused_speedups(results):
+    """Per (strategy, N, M_G) case run on both paths: realizations/s of the fused path over the batched path."""
+    batched = {_case_key(case)[1:]: case for case in results if case['path'] == 'batched'}
+    return [{'strategy': case['strategy'], 'N': case['N'], 'M_g': case['M_g'],
+             'speedup': case['realizations_per_sec'] / batched[_case_key(case)[1:]]['realizations_per_sec'],
+             'max_rs_deviation': case.get('max_rs_deviation')}
+            for case in results if case['path'] == 'fused' and _case_key(case)[1:] in batched]
+
+def measure(run, start_draws=1, min_time=MIN_TIME, repeat=REPEAT):
+    """
+    Times run(draws), doubling draws from start_draws until one run lasts min_time, then repeats the run
+    at that size. Returns {'draws', 'seconds', 'realizations_per_sec'} for the fastest run.
+    """
+    draws = start_draws
+    while True:
+        start = time.perf_counter()
+        run(draws)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or draws >= MAX_DRAWS:
+            break
+        draws = min(MAX_DRAWS, draws * 2)
+    timings = [elapsed]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        run(draws)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {'draws': draws, 'seconds': best, 'realizations_per_sec': draws / best}
+
+# Run in a fresh interpreter: times the imports and lists the heavy modules they loaded
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import numpy
+numpy_done = time.perf_counter()
+import strategies
+done = time.perf_counter()
+print(json.dumps([numpy_done - start, done - numpy_done, [name for name in {heavy!r} if name in sys.modules]]))
+"""
+
+def measure_startup(repeat=STARTUP_REPEAT, target_seconds=STARTUP_TARGET_SECONDS):
+    """
+    Starts repeat fresh interpreters that import NumPy and then the strategies package, as a worker process
+    evaluating strategy kernels does. Returns the fastest run as {'interpreter_seconds' (whole process),
+    'numpy_seconds', 'import_seconds' (strategies beyond NumPy), 'heavy_modules' (those of HEAVY_MODULES
+    loaded), 'target_seconds', 'passed'}.
+    """
+    script = _STARTUP_SCRIPT.format(heavy=HEAVY_MODULES)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                cwd=directory).stdout
+        interpreter_seconds = time.perf_counter() - start
+        numpy_seconds, import_seconds, heavy_modules = json.loads(output)
+        runs.append({'interpreter_seconds': interpreter_seconds, 'numpy_seconds': numpy_seconds,
+                     'import_seconds': import_seconds, 'heavy_modules': heavy_modules})
+    best = min(runs, key=lambda run: run['import_seconds'])
+    best['interpreter_seconds'] = min(run['interpreter_seconds'] for run in runs)
+    best['target_seconds'] = target_seconds
+    best['passed'] = best['import_seconds'] <= target_seconds and not best['heavy_modules']
+    return best
+
+def _format_startup(startup):
+    line = (f"startup  import strategies {startup['import_seconds'] * 1e3:.1f} ms beyond NumPy "
+            f"({startup['numpy_seconds'] * 1e3:.1f} ms), interpreter {startup['interpreter_seconds'] * 1e3:.1f} ms, "
+            f"target {startup['target_seconds'] * 1e3:.0f} ms")
+    if startup['heavy_modules']:
+        line += f", loads {', '.join(startup['heavy_modules'])}"
+    return line + ("  ok" if startup['passed'] else "  FAILED")
+
+class _SinglePrecisionNormals:
+    """
+    Generator stand-in whose normals are float32 draws widened to the requested dtype. A complex128
+    ChannelSource over it sees the same samples as a complex64 source over the wrapped generator, so the two
+    precisions can be compared on identical channels.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.bit_generator = rng.bit_generator
+
+    def standard_normal(self, size, dtype=np.float64):
+        return self.rng.standard_normal(size, dtype=np.float32).astype(dtype)
+
+def precision_check(N_values=PRECISION_N_VALUES, snr_db_values=PRECISION_SNR_DB, M_h_sims=PRECISION_M_H,
+                    M_g_sims=PRECISION_M_G, eve_rate_modes=('monte_carlo', 'analytic'), seed=BENCHMARK_SEED):
+    """
+    Evaluates every registered strategy with complex64 channels and with complex128 channels on the same
+    samples (see _SinglePrecisionNormals), so the deviations are rounding only, not Monte Carlo noise.
+    Returns {'cases': [...], 'max_rs_deviation', 'max_prob_deviation', 'passed'}, with per (N, Eve rate mode)
+    case the largest deviation in average secrecy rate and P(Rs > R) over strategies and SNR points and the
+    run time of each precision (complex128 timed on its usual float64 draws).
+    """
+    specs = list(STRATEGY_REGISTRY.values())
+    P_totals = snr_to_total_power(np.asarray(snr_db_values, dtype=float), BENCHMARK_SIGMA_N_SQ)
+
+    def evaluate(N, eve_rate_mode, rng, dtype):
+        start = time.perf_counter()
+        evaluated = evaluate_specs(specs, P_totals, N, BENCHMARK_ALPHA, BENCHMARK_SIGMA_N_SQ, M_h_sims, M_g_sims,
+                                   PRECISION_R_THRESHOLD, eve_rate_mode, ChannelSource(rng, dtype=dtype))
+        return evaluated, time.perf_counter() - start
+
+    cases = []
+    for eve_rate_mode in eve_rate_modes:
+        evaluate_specs(specs, P_totals, 2, BENCHMARK_ALPHA, BENCHMARK_SIGMA_N_SQ, 1, 1, PRECISION_R_THRESHOLD,
+                       eve_rate_mode) # Warm-up, so that lazy imports are not timed
+        for N in N_values:
+            reference, _ = evaluate(N, eve_rate_mode, _SinglePrecisionNormals(np.random.default_rng(seed)), 'complex128')
+            single, seconds_complex64 = evaluate(N, eve_rate_mode, np.random.default_rng(seed), 'complex64')
+            # Timed separately: the reference run pays for widening its draws
+            _, seconds_complex128 = evaluate(N, eve_rate_mode, np.random.default_rng(seed), 'complex128')
+            cases.append({
+                'N': int(N),
+                'eve_rate_mode': eve_rate_mode,
+                'max_rs_deviation': max(float(np.max(np.abs(np.mean(reference[name][0], axis=1)
+                                                            - np.mean(single[name][0], axis=1))))
+                                        for name in reference),
+                'max_prob_deviation': max(float(np.max(np.abs(np.mean(reference[name][1], axis=1)
+                                                              - np.mean(single[name][1], axis=1))))
+                                          for name in reference),
+                'seconds_complex128': seconds_complex128,
+                'seconds_complex64': seconds_complex64,
+            })
+    max_rs = max(case['max_rs_deviation'] for case in cases)
+    max_prob = max(case['max_prob_deviation'] for case in cases)
+    return {'settings': {'snr_db': list(snr_db_values), 'M_h_sims': M_h_sims, 'M_g_sims': M_g_sims,
+                         'R_thresh': PRECISION_R_THRESHOLD, 'seed': seed,
+                         'rs_tolerance': PRECISION_RS_TOL, 'prob_tolerance': PRECISION_PROB_TOL},
+            'cases': cases, 'max_rs_deviation': max_rs, 'max_prob_deviation': max_prob,
+            'passed': max_rs <= PRECISION_RS_TOL and max_prob <= PRECISION_PROB_TOL}
+
+def an_check(N_values=AN_CHECK_N_VALUES, draws=AN_CHECK_DRAWS, seed=BENCHMARK_SEED):
+    """
+    Draws gamma_v for the same channels h with generate_an_vectors and with the textbook construction
+    gamma_v = Gamma v, Gamma an orthonormal basis of the null space of h^H (scipy.linalg.null_space) and
+    v ~ CN(0, I_{N-1}), and compares the two samples with two-sample Kolmogorov-Smirnov tests on
+        component  - |d_1|^2, d = gamma_v / ||gamma_v||, the power of the direction in the first antenna
+        basis      - |q^H d|^2 for the first basis vector q of Gamma (N > 2; it is 1 for N = 2)
+        norm       - ||gamma_v||^2
+    Returns {'cases': [...], 'passed'}, with per N the p-values and the largest |h^H gamma_v| of each
+    construction.
+    """
+    from scipy.linalg import null_space
+    from scipy.stats import ks_2samp
+
+    rng = np.random.default_rng(seed)
+    cases = []
+    for N in N_values:
+        h = generate_channel_matrix(draws, N, rng)
+        gamma_fast = generate_an_vectors(h, rng=rng)
+        bases = np.stack([null_space(h_i.conj()[np.newaxis, :]) for h_i in h]) # (draws, N, N-1)
+        v = (rng.standard_normal((draws, N - 1)) + 1j * rng.standard_normal((draws, N - 1))) / np.sqrt(2)
+        gamma_reference = np.einsum('mnk,mk->mn', bases, v)
+
+        def statistics(gamma):
+            norm_sq = np.sum(np.abs(gamma)**2, axis=1)
+            d = gamma / np.sqrt(norm_sq)[:, np.newaxis]
+            values = {'component': np.abs(d[:, 0])**2, 'norm': norm_sq}
+            if N > 2:
+                values['basis'] = np.abs(np.sum(bases[:, :, 0].conj() * d, axis=1))**2
+            return values
+
+        fast, reference = statistics(gamma_fast), statistics(gamma_reference)
+        p_values = {name: float(ks_2samp(fast[name], reference[name]).pvalue) for name in fast}
+        leakage = {name: float(np.max(np.abs(np.sum(h.conj() * gamma, axis=1))))
+                   for name, gamma in (('fast', gamma_fast), ('reference', gamma_reference))}
+        cases.append({'N': int(N), 'p_values': p_values, 'max_leakage': leakage,
+                      'passed': min(p_values.values()) >= AN_CHECK_MIN_P
+                                and max(leakage.values()) <= AN_CHECK_LEAKAGE_TOL})
+    return {'settings': {'draws': draws, 'seed': seed, 'min_p': AN_CHECK_MIN_P,
+                         'leakage_tolerance': AN_CHECK_LEAKAGE_TOL},
+            'cases': cases, 'passed': all(case['passed'] for case in cases)}
+
+def _results_identical(results, reference):
+    """True if two results dicts hold the same strategies, series and per-draw samples, bit for bit."""
+    if results.keys() != reference.keys():
+        return False
+    for name, values in reference.items():
+        if results[name].keys() != values.keys():
+            return False
+        for key, series in values.items():
+            if len(results[name][key]) != len(series) or not all(
+                    np.array_equal(value, expected) for value, expected in zip(results[name][key], series)):
+                return False
+    return True
+
+class _Interrupted(Exception):
+    """Raised by resume-check's progress callback to stop a run part-way, like a Ctrl-C."""
+
+def resume_check(workers=RUN_CHECK_WORKERS, seed=BENCHMARK_SEED):
+    """
+    Interrupts checkpointed runs part-way, resumes them from their checkpoint and compares the results with
+    those of an uninterrupted run of the same seed:
+        serial      - main.run_simulation(checkpoint_dir=...): the checkpoint is cut back to its first SNR
+                      point, the state a run killed after that point leaves behind
+        parallel    - run_parallel_simulation with a SimulationCheckpoint, in-process and on a pool of
+                      workers processes, stopped by an exception from progress_callback after half the tasks
+        crn         - the same with common random numbers
+    Returns {'cases': [...], 'passed'}, with per case the units restored on resume and whether the resumed
+    results are bit-identical.
+    """
+    import cli # Sets the non-interactive plotting backend
+    import main
+
+    strategy_names = list(STRATEGY_REGISTRY)
+    directory = tempfile.mkdtemp(prefix='resume_check_')
+    cases = []
+    try:
+        overrides = {'N_ANTENNAS': RUN_CHECK_N, 'SNR_DB_RANGE': np.array(RUN_CHECK_SNR_DB),
+                     'ALPHA_VAL': BENCHMARK_ALPHA, 'SIGMA_N_SQ': BENCHMARK_SIGMA_N_SQ,
+                     'R_THRESHOLD': BENCHMARK_R_THRESHOLD, 'M_MONTE_CARLO_H': RUN_CHECK_M_H,
+                     'M_MONTE_CARLO_G': RUN_CHECK_M_G}
+        checkpoint_dir = os.path.join(directory, 'serial')
+        with cli.job_config(overrides), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            reference = main.run_simulation(seed=seed)
+            main.run_simulation(seed=seed, checkpoint_dir=checkpoint_dir)
+            parts = sorted(name for name in os.listdir(checkpoint_dir) if name.startswith('part_'))
+            for name in parts[1:]:
+                os.remove(os.path.join(checkpoint_dir, name))
+            resumed = main.run_simulation(checkpoint_dir=checkpoint_dir, resume=True)
+        cases.append({'case': 'serial', 'workers': None, 'restored': len(parts[:1]), 'total': len(parts),
+                      'identical': _results_identical(resumed, reference)})
+
+        for crn in (False, True):
+            for case_workers in sorted({1, workers}):
+                fingerprint = {'strategy_names': strategy_names, 'crn': crn}
+                checkpoint_dir = os.path.join(directory, f"parallel_{crn}_{case_workers}")
+                kwargs = {'seed': seed, 'workers': case_workers, 'chunk_size': RUN_CHECK_CHUNK, 'crn': crn,
+                          'keep_samples': True}
+                args = (strategy_names, RUN_CHECK_SNR_DB, RUN_CHECK_N, BENCHMARK_ALPHA, BENCHMARK_SIGMA_N_SQ,
+                        RUN_CHECK_M_H, RUN_CHECK_M_G, BENCHMARK_R_THRESHOLD)
+                reference = run_parallel_simulation(*args, **kwargs)
+
+                def interrupt(done, total):
+                    if done >= total // 2:
+                        raise _Interrupted()
+
+                try:
+                    run_parallel_simulation(*args, **kwargs, progress_callback=interrupt, checkpoint_interval=0,
+                                            checkpoint=SimulationCheckpoint(checkpoint_dir, fingerprint, seed))
+                except _Interrupted:
+                    pass
+                checkpoint = SimulationCheckpoint(checkpoint_dir, fingerprint, seed, resume=True)
+                restored = len(checkpoint.units)
+                resumed = run_parallel_simulation(*args, **kwargs, checkpoint=checkpoint)
+                cases.append({'case': 'crn' if crn else 'parallel', 'workers': case_workers, 'restored': restored,
+                              'total': len(checkpoint.units), 'identical': _results_identical(resumed, reference)})
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    # A case that restored nothing, or everything, did not test a resume
+    for case in cases:
+        case['passed'] = case['identical'] and 0 < case['restored'] < case['total']
+    return {'settings': {'seed': seed, 'N': RUN_CHECK_N, 'snr_db': list(RUN_CHECK_SNR_DB), 'M_h_sims': RUN_CHECK_M_H,
+                         'M_g_sims': RUN_CHECK_M_G, 'chunk_size': RUN_CHECK_CHUNK},
+            'cases': cases, 'passed': all(case['passed'] for case in cases)}
+
+def queue_check(workers=RUN_CHECK_WORKERS, seed=BENCHMARK_SEED):
+    """
+    Runs the shards of a run through a WorkQueue and compares the reduced results with run_parallel_simulation
+    of the same seed:
+        requeue     - a lost worker claims QUEUE_CHECK_LOST shards and a late worker QUEUE_CHECK_LATE; their
+                      leases are aged past the timeout and requeue_expired hands the shards out again, a
+                      worker runs the queue to the end, and the late worker then stores its shards as well,
+                      so they finish twice
+        distributed - run_distributed_simulation with workers local worker processes
+    Returns {'cases': [...], 'passed'}, with per case the shards requeued and finished twice and whether the
+    results are bit-identical.
+    """
+    from strategies.parallel import _make_params, _make_tasks, _run_task
+    from strategies.work_queue import DEFAULT_LEASE_TIMEOUT
+
+    strategy_names = list(STRATEGY_REGISTRY)
+    args = (strategy_names, RUN_CHECK_SNR_DB, RUN_CHECK_N, BENCHMARK_ALPHA, BENCHMARK_SIGMA_N_SQ, RUN_CHECK_M_H,
+            RUN_CHECK_M_G, BENCHMARK_R_THRESHOLD)
+    reference = run_parallel_simulation(*args, seed=seed, chunk_size=RUN_CHECK_CHUNK, keep_samples=True)
+    directory = tempfile.mkdtemp(prefix='queue_check_')
+    cases = []
+    try:
+        queue_dir = os.path.join(directory, 'requeue')
+        params = _make_params(strategy_names, RUN_CHECK_SNR_DB, RUN_CHECK_N, BENCHMARK_ALPHA, BENCHMARK_SIGMA_N_SQ,
+                              RUN_CHECK_M_G, BENCHMARK_R_THRESHOLD, 'monte_carlo', True, None, None)
+        tasks = _make_tasks(params, RUN_CHECK_M_H, RUN_CHECK_CHUNK, False, seed)
+        queue = WorkQueue(queue_dir)
+        queue.create(tasks, params, {'check': 'queue'}, seed)
+        lost = [queue.claim('lost') for _ in range(QUEUE_CHECK_LOST)]
+        late = [queue.claim('late') for _ in range(QUEUE_CHECK_LATE)]
+        expired = time.time() - 2 * DEFAULT_LEASE_TIMEOUT
+        for _, claim_path in lost + late:
+            os.utime(claim_path, (expired, expired))
+        requeued = queue.requeue_expired(DEFAULT_LEASE_TIMEOUT)
+        run_queue_worker(queue_dir, worker_id='check', poll_interval=0.01)
+        for task, claim_path in late:
+            _, partial, stats = _run_task(task)
+            queue.complete(task, partial, stats, 'late', claim_path)
+        duplicates = len(os.listdir(queue.done_dir)) - len(tasks)
+        identical = _results_identical(queue.reduce(), reference)
+        cases.append({'case': 'requeue', 'requeued': requeued, 'duplicates': duplicates, 'identical': identical,
+                      'passed': identical and requeued == QUEUE_CHECK_LOST + QUEUE_CHECK_LATE
+                                and duplicates == QUEUE_CHECK_LATE})
+
+        distributed = run_distributed_simulation(os.path.join(directory, 'distributed'), *args, seed=seed,
+                                                 local_workers=workers, chunk_size=RUN_CHECK_CHUNK,
+                                                 keep_samples=True, poll_interval=0.01)
+        identical = _results_identical(distributed, reference)
+        cases.append({'case': 'distributed', 'requeued': 0, 'duplicates': None, 'identical': identical,
+                      'passed': identical})
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {'settings': {'seed': seed, 'N': RUN_CHECK_N, 'snr_db': list(RUN_CHECK_SNR_DB), 'M_h_sims': RUN_CHECK_M_H,
+                         'M_g_sims': RUN_CHECK_M_G, 'chunk_size': RUN_CHECK_CHUNK, 'workers': workers},
+            'cases': cases, 'passed': all(case['passed'] for case in cases)}
+
+def run_benchmarks(N_values=BENCHMARK_N_VALUES, M_g_values=BENCHMARK_M_G_VALUES, paths=BENCHMARK_PATHS,
+                   strategy_names=None, workers=None, min_time=MIN_TIME, repeat=REPEAT, progress_callback=None):
+    """
+    Benchmarks every (path, strategy, N, M_G) case and the startup (see measure_startup). workers defaults
+    to the CPU count. progress_callback(case) is called with each finished case. The fused path is skipped
+    when Numba is not installed.
+    Returns {'format_version', 'metadata', 'settings', 'startup', 'results', 'fused_speedups'}, where
+    'results' is a list of cases and 'fused_speedups' lists fused_speedups(results).
+    """
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_REGISTRY)
+    workers = workers or os.cpu_count() or 1
+    if 'fused' in paths and not numba_available():
+        print("Numba is not installed; skipping the fused path")
+        paths = [path for path in paths if path != 'fused']
+    results = []
+    for path in paths:
+        for name in strategy_names:
+            for N in N_values:
+                for M_g_sims in M_g_values:
+                    run, start_draws = _path_runner(path, STRATEGY_REGISTRY[name], N, M_g_sims, workers)
+                    case = {'path': path, 'strategy': name, 'N': int(N), 'M_g': int(M_g_sims)}
+                    case.update(measure(run, start_draws, min_time, repeat))
+                    if path == 'fused':
+                        case['max_rs_deviation'] = fused_deviation(STRATEGY_REGISTRY[name], N, M_g_sims)
+                    results.append(case)
+                    if progress_callback is not None:
+                        progress_callback(case)
+    settings = {
+        'snr_db': BENCHMARK_SNR_DB,
+        'alpha': BENCHMARK_ALPHA,
+        'sigma_n_sq': BENCHMARK_SIGMA_N_SQ,
+        'R_thresh': BENCHMARK_R_THRESHOLD,
+        'seed': BENCHMARK_SEED,
+        'workers': workers,
+        'min_time': min_time,
+        'repeat': repeat,
+    }
+    return {'format_version': FORMAT_VERSION, 'metadata': machine_metadata(), 'settings': settings,
+            'startup': measure_startup(), 'results': results, 'fused_speedups': fused_speedups(results)}
+
+def _case_key(case):
+    return (case['path'], case['strategy'], case['N'], case['M_g'])
+
+def compare_benchmarks(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    Matches the cases of two run_benchmarks results. Returns a list of rows with the baseline and current
+    rates, their ratio and a status: 'regression' when current is more than threshold slower, 'improvement'
+    when more than threshold faster, 'ok' otherwise, and 'missing' / 'new' for unmatched cases.
+    """
+    baseline_cases = {_case_key(case): case for case in baseline['results']}
+    current_cases = {_case_key(case): case for case in current['results']}
+    rows = []
+    for key in list(baseline_cases) + [key for key in current_cases if key not in baseline_cases]:
+        base, cur = baseline_cases.get(key), current_cases.get(key)
+        row = dict(zip(('path', 'strategy', 'N', 'M_g'), key), baseline=None, current=None, ratio=None)
+        if base is None or cur is None:
+            row['status'] = 'new' if base is None else 'missing'
+            row['baseline' if cur is None else 'current'] = (base or cur)['realizations_per_sec']
+        else:
+            row['baseline'] = base['realizations_per_sec']
+            row['current'] = cur['realizations_per_sec']
+            row['ratio'] = row['current'] / row['baseline']
+            if row['ratio'] < 1 - threshold:
+                row['status'] = 'regression'
+            elif row['ratio'] > 1 + threshold:
+                row['status'] = 'improvement'
+            else:
+                row['status'] = 'ok'
+        rows.append(row)
+    return rows
+
+def load_benchmark(path):
+    with open(path) as f:
+        benchmark = json.load(f)
+    if benchmark.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"{path} has benchmark format {benchmark.get('format_version')}, expected {FORMAT_VERSION}")
+    return benchmark
+
+def save_benchmark(benchmark, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(benchmark, f, indent=2)
+
+def _format_case(case):
+    return f"{case['path']:<8} {case['strategy']:<31} N={case['N']:<4} M_G={case['M_g']:<6}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks strategy throughput and compares benchmark results.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmark suite and save it as JSON")
+    run_parser.add_argument('--output', default=os.path.join('results', 'benchmark.json'))
+    run_parser.add_argument('--quick', action='store_true',
+                            help=f"Only N in {QUICK_N_VALUES} and M_G in {QUICK_M_G_VALUES}, one timed run per case")
+    run_parser.add_argument('--n', type=int, nargs='+', help="Antenna counts (default: all of the suite)")
+    run_parser.add_argument('--m-g', type=int, nargs='+', help="Eve draw counts (default: all of the suite)")
+    run_parser.add_argument('--paths', nargs='+', choices=BENCHMARK_PATHS, default=list(BENCHMARK_PATHS))
+    run_parser.add_argument('--strategies', nargs='+', choices=list(STRATEGY_REGISTRY))
+    run_parser.add_argument('--workers', type=int, help="Workers of the parallel path (default: CPU count)")
+    run_parser.add_argument('--min-time', type=float, default=MIN_TIME)
+
+    compare_parser = commands.add_parser('compare', help="Compare a benchmark against a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                                help="Relative slowdown reported as a regression (default: 0.1)")
+
+    startup_parser = commands.add_parser('startup', help="Check the import time of the compute-only path")
+    startup_parser.add_argument('--target', type=float, default=STARTUP_TARGET_SECONDS,
+                                help=f"Seconds allowed beyond NumPy's import (default: {STARTUP_TARGET_SECONDS})")
+
+    precision_parser = commands.add_parser('precision', help="Check complex64 against complex128 on the same draws")
+    precision_parser.add_argument('--n', type=int, nargs='+', default=list(PRECISION_N_VALUES))
+    precision_parser.add_argument('--m-h', type=int, default=PRECISION_M_H)
+    precision_parser.add_argument('--m-g', type=int, default=PRECISION_M_G)
+    precision_parser.add_argument('--output', help="Also save the check as JSON")
+    an_parser = commands.add_parser('an-check', help="Check generate_an_vectors against a null-space construction")
+    an_parser.add_argument('--n', type=int, nargs='+', default=list(AN_CHECK_N_VALUES))
+    an_parser.add_argument('--draws', type=int, default=AN_CHECK_DRAWS)
+    resume_parser = commands.add_parser('resume-check', help="Check that resumed runs are bit-identical")
+    resume_parser.add_argument('--workers', type=int, default=RUN_CHECK_WORKERS,
+                               help=f"Workers of the pooled cases (default: {RUN_CHECK_WORKERS})")
+    queue_parser = commands.add_parser('queue-check', help="Check that work-queue runs match the process pool")
+    queue_parser.add_argument('--workers', type=int, default=RUN_CHECK_WORKERS,
+                              help=f"Local workers of the distributed case (default: {RUN_CHECK_WORKERS})")
+    args = parser.parse_args(argv)
+
+    if args.command == 'queue-check':
+        check = queue_check(args.workers)
+        for case in check['cases']:
+            duplicates = f", {case['duplicates']} finished twice" if case['duplicates'] is not None else ""
+            print(f"{case['case']:<12} {case['requeued']} shard(s) requeued{duplicates}, "
+                  f"{'bit-identical' if case['identical'] else 'DIFFERENT'}  {'ok' if case['passed'] else 'FAILED'}")
+        return 0 if check['passed'] else 1
+
+    if args.command == 'resume-check':
+        check = resume_check(args.workers)
+        for case in check['cases']:
+            workers = f"{case['workers']} worker(s)" if case['workers'] is not None else "main loop"
+            print(f"{case['case']:<9} {workers:<12} resumed with {case['restored']}/{case['total']} units done, "
+                  f"{'bit-identical' if case['identical'] else 'DIFFERENT'}  {'ok' if case['passed'] else 'FAILED'}")
+        return 0 if check['passed'] else 1
+
+    if args.command == 'an-check':
+        check = an_check(args.n, args.draws)
+        for case in check['cases']:
+            p_values = "  ".join(f"{name} {p:.3f}" for name, p in case['p_values'].items())
+            print(f"N={case['N']:<4} KS p: {p_values}  max |h^H gamma_v| {case['max_leakage']['fast']:.1e} "
+                  f"(null_space {case['max_leakage']['reference']:.1e})  {'ok' if case['passed'] else 'FAILED'}")
+        print(f"{sum(case['passed'] for case in check['cases'])}/{len(check['cases'])} case(s) passed "
+              f"(KS p >= {AN_CHECK_MIN_P:g}, |h^H gamma_v| <= {AN_CHECK_LEAKAGE_TOL:g})")
+        return 0 if check['passed'] else 1
+
+    if args.command == 'precision':
+        check = precision_check(args.n, M_h_sims=args.m_h, M_g_sims=args.m_g)
+        for case in check['cases']:
+            print(f"N={case['N']:<4} {case['eve_rate_mode']:<12} max |dRs| {case['max_rs_deviation']:.2e}  "
+                  f"max |dP| {case['max_prob_deviation']:.2e}  complex128 {case['seconds_complex128']:.2f} s, "
+                  f"complex64 {case['seconds_complex64']:.2f} s "
+                  f"({case['seconds_complex128'] / case['seconds_complex64']:.2f}x)")
+        print(f"Max deviation: {check['max_rs_deviation']:.2e} bits/s/Hz in the average secrecy rate "
+              f"(tolerance {PRECISION_RS_TOL:.0e}), {check['max_prob_deviation']:.2e} in P(Rs > R) "
+              f"(tolerance {PRECISION_PROB_TOL:.0e})  {'ok' if check['passed'] else 'FAILED'}")
+        if args.output:
+            save_benchmark(check, args.output)
+        return 0 if check['passed'] else 1
+
+    if args.command == 'startup':
+        startup = measure_startup(target_seconds=args.target)
+        print(_format_startup(startup))
+        return 0 if startup['passed'] else 1
+
+    if args.command == 'run':
+        N_values = args.n or (QUICK_N_VALUES if args.quick else BENCHMARK_N_VALUES)
+        M_g_values = args.m_g or (QUICK_M_G_VALUES if args.quick else BENCHMARK_M_G_VALUES)
+
+        def report_case(case):
+            print(f"{_format_case(case)} {case['realizations_per_sec']:>12.1f} realizations/s")
+
+        benchmark = run_benchmarks(N_values, M_g_values, args.paths, args.strategies, args.workers, args.min_time,
+                                   repeat=1 if args.quick else REPEAT, progress_callback=report_case)
+        for row in benchmark['fused_speedups']:
+            print(f"fused vs batched {row['strategy']:<31} N={row['N']:<4} M_G={row['M_g']:<6} "
+                  f"{row['speedup']:>6.2f}x  max |dRs| {row['max_rs_deviation']:.1e}")
+        print(_format_startup(benchmark['startup']))
+        save_benchmark(benchmark, args.output)
+        print(f"Benchmark saved to {args.output}")
+        return 0
+
+    baseline, current = load_benchmark(args.baseline), load_benchmark(args.current)
+    for field in ('platform', 'processor', 'cpu_count', 'numpy'):
+        if baseline['metadata'].get(field) != current['metadata'].get(field):
+            print(f"Warning: {field} differs ({baseline['metadata'].get(field)} vs {current['metadata'].get(field)})")
+    rows = compare_benchmarks(baseline, current, args.threshold)
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else '-'
+        baseline_rate = f"{row['baseline']:.1f}" if row['baseline'] is not None else '-'
+        current_rate = f"{row['current']:.1f}" if row['current'] is not None else '-'
+        print(f"{_format_case(row)} {baseline_rate:>12} -> {current_rate:>12} {ratio:>7}  {row['status']}")
+    regressions = sum(row['status'] == 'regression' for row in rows)
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%} in {len(rows)} case(s)")
+    startup_failed = False
+    if 'startup' in current: # Benchmarks saved before the startup check have none
+        print(_format_startup(current['startup']))
+        startup_failed = not current['startup']['passed']
+    return 1 if regressions or startup_failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
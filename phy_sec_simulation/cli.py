@@ -0,0 +1,276 @@
+"""
+Headless command-line runner for batches of simulation jobs.
+
+A job is a set of config.py overrides (e.g. {"N_ANTENNAS": 4, "SNR_DB_RANGE": [0, 5, 10]}) plus optionally
+    name        - directory of the job's outputs under --output-dir (default job001, job002, ...)
+    strategies  - names in STRATEGY_REGISTRY to run (default all)
+    resume      - continue the run checkpointed in the job's CHECKPOINT_DIR
+Jobs come from JSON or TOML job files, as {"defaults": {...}, "jobs": [{...}, ...]} ([defaults] and [[jobs]]
+tables in TOML), a JSON list of jobs or a single job, and from --set KEY=VALUE, which applies to every job
+(or makes up the only job when no file is given). The jobs run back-to-back in one process, so imports,
+compiled caches and the worker pools of sharded runs (WORKERS > 1) are started once and reused.
+
+Each job writes results.json, its figure and, with PROFILE, profile.json to its directory; figures use the
+non-interactive Agg backend and are never shown. jobs.json in --output-dir lists every job with its status.
+
+Run from any directory:
+    python phy_sec_simulation/cli.py jobs.toml [more.json ...] [--set M_MONTE_CARLO_H=500] [--output-dir results]
+Exit status: 0 when every job succeeded, 1 when a job failed, 2 for invalid arguments or job files,
+130 when interrupted.
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import tomllib # Python 3.11+
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Non-interactive backend for every figure; matplotlib itself is only imported once a job plots
+os.environ['MPLBACKEND'] = 'Agg'
+
+import config
+import main
+from strategies import STRATEGY_REGISTRY, profiling
+
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# Job keys that are not config.py settings
+JOB_KEYS = ('name', 'strategies', 'resume')
+
+class JobFileError(ValueError):
+    """A job file or --set override that cannot be read or names an unknown setting."""
+
+def _config_settings():
+    return {name for name in vars(config) if name.isupper()}
+
+def _parse_job(job, source):
+    """Checks a job's keys and returns it with config keys upper-cased and values converted to config's types."""
+    if not isinstance(job, dict):
+        raise JobFileError(f"{source}: a job must be a table/object, got {type(job).__name__}")
+    settings = _config_settings()
+    parsed = {}
+    for key, value in job.items():
+        if key in JOB_KEYS:
+            parsed[key] = value
+            continue
+        name = key.upper()
+        if name not in settings:
+            raise JobFileError(f"{source}: unknown setting {key!r}")
+        if isinstance(getattr(config, name), np.ndarray):
+            value = np.asarray(value, dtype=float)
+        parsed[name] = value
+    unknown = [name for name in parsed.get('strategies') or [] if name not in STRATEGY_REGISTRY]
+    if unknown:
+        raise JobFileError(f"{source}: unknown strategies {unknown}, expected names in {list(STRATEGY_REGISTRY)}")
+    return parsed
+
+def load_job_file(path):
+    """Reads the jobs of a JSON or TOML job file (by extension), with the file's defaults merged into each."""
+    try:
+        if path.endswith('.toml'):
+            if tomllib is None:
+                raise JobFileError(f"{path}: reading TOML job files needs Python 3.11+ or the tomli package")
+            with open(path, 'rb') as f:
+                content = tomllib.load(f)
+        else:
+            with open(path) as f:
+                content = json.load(f)
+    except (OSError, ValueError) as exc:
+        if isinstance(exc, JobFileError):
+            raise
+        raise JobFileError(f"{path}: {exc}") from exc
+
+    if isinstance(content, list):
+        defaults, jobs = {}, content
+    elif 'jobs' in content:
+        defaults, jobs = content.get('defaults', {}), content['jobs']
+    else:
+        defaults, jobs = {}, [content]
+    if not isinstance(jobs, list):
+        raise JobFileError(f"{path}: 'jobs' must be a list")
+    defaults = _parse_job(defaults, f"{path} defaults")
+    return [dict(defaults, **_parse_job(job, f"{path} job {i + 1}")) for i, job in enumerate(jobs)]
+
+def parse_override(text):
+    """KEY=VALUE of --set, with VALUE read as JSON when it parses (numbers, lists, true/false) and as a string otherwise."""
+    key, sep, value = text.partition('=')
+    if not sep or not key:
+        raise JobFileError(f"--set expects KEY=VALUE, got {text!r}")
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return _parse_job({key.strip(): value}, '--set')
+
+def _job_dir_name(job, index):
+    name = str(job.get('name') or f"job{index:03d}")
+    return re.sub(r'[^\w.-]+', '_', name)
+
+@contextlib.contextmanager
+def job_config(job):
+    """Applies the config.py overrides of a job for the duration of the block."""
+    overrides = {name: value for name, value in job.items() if name not in JOB_KEYS}
+    previous = {name: getattr(config, name) for name in overrides}
+    try:
+        for name, value in overrides.items():
+            setattr(config, name, value)
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(config, name, value)
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _save_json(data, path):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, default=_to_json)
+
+class JobRunner:
+    """
+    Runs jobs one after another in this process. Process pools are started on the first sharded job that
+    needs them and kept for later jobs with the same WORKERS; close() shuts them down.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self._executors = {} # workers -> ProcessPoolExecutor
+
+    def executor(self, workers):
+        if workers is None or workers <= 1:
+            return None
+        if workers not in self._executors:
+            self._executors[workers] = ProcessPoolExecutor(max_workers=workers)
+        return self._executors[workers]
+
+    def close(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+        self._executors.clear()
+
+    def run_job(self, job, job_dir):
+        """Runs one job with its overrides applied and writes its outputs to job_dir. Returns the files written."""
+        os.makedirs(job_dir, exist_ok=True)
+        strategy_names = job.get('strategies') or None
+        settings = {name: value for name, value in job.items() if name not in JOB_KEYS}
+        files = []
+        with job_config(job):
+            if config.RUN_SWEEP:
+                main.run_parameter_sweep(eve_rate_mode=config.EVE_RATE_MODE, seed=config.SEED,
+                                         strategy_names=strategy_names, results_dir=job_dir, dtype=config.DTYPE)
+                files.append(os.path.join(job_dir, f'sweep_M{config.M_MONTE_CARLO_H}.npz'))
+                return files
+            if config.OPTIMIZE_ALPHA:
+                optimum = main.run_alpha_optimization(metric=config.ALPHA_OPT_METRIC,
+                                                      eve_rate_mode=config.EVE_RATE_MODE, seed=config.SEED,
+                                                      strategy_names=strategy_names, dtype=config.DTYPE)
+                files.append(main.plot_optimal_alpha(config.SNR_DB_RANGE, optimum, metric=config.ALPHA_OPT_METRIC,
+                                                     results_dir=job_dir, show=False))
+                results_path = os.path.join(job_dir, 'results.json')
+                _save_json({'settings': settings, 'snr_db': config.SNR_DB_RANGE, 'optimal_alpha': optimum},
+                           results_path)
+                return files + [results_path]
+
+            with profiling() if config.PROFILE else contextlib.nullcontext() as profile:
+                results = main.run_simulation(
+                    crn=config.USE_CRN, eve_rate_mode=config.EVE_RATE_MODE, workers=config.WORKERS,
+                    seed=config.SEED, strategy_names=strategy_names, adaptive=config.ADAPTIVE,
+                    importance_sampling=config.IMPORTANCE_SAMPLING, cache_dir=config.CACHE_DIR,
+                    checkpoint_dir=config.CHECKPOINT_DIR, resume=bool(job.get('resume')),
+                    max_bytes=config.MAX_BYTES, executor=self.executor(config.WORKERS), dtype=config.DTYPE,
+                    queue_dir=config.QUEUE_DIR
+                )
+            if profile is not None:
+                profile_path = os.path.join(job_dir, 'profile.json')
+                profile.save(profile_path)
+                files.append(profile_path)
+            files.append(main.plot_results(config.SNR_DB_RANGE, results, results_dir=job_dir, show=False))
+            # The per-draw samples stay out of the JSON: they are M_MONTE_CARLO_H floats per cell
+            summary = {name: {key: series for key, series in values.items() if key != 'rs_samples'}
+                       for name, values in results.items()}
+            results_path = os.path.join(job_dir, 'results.json')
+            _save_json({'settings': settings, 'snr_db': config.SNR_DB_RANGE, 'results': summary}, results_path)
+            files.append(results_path)
+        return files
+
+    def run(self, jobs, fail_fast=False):
+        """Runs every job, recording each in jobs.json as it finishes. Returns the list of job records."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        records = []
+        for index, job in enumerate(jobs, start=1):
+            name = _job_dir_name(job, index)
+            job_dir = os.path.join(self.output_dir, name)
+            print(f"=== Job {index}/{len(jobs)}: {name} ===")
+            record = {'name': name, 'output_dir': job_dir, 'status': 'ok', 'files': [], 'error': None}
+            start = time.perf_counter()
+            try:
+                record['files'] = self.run_job(job, job_dir)
+            except Exception as exc: # Reported in jobs.json; the remaining jobs still run
+                record['status'] = 'failed'
+                record['error'] = f"{type(exc).__name__}: {exc}"
+                traceback.print_exc()
+                print(f"Job {name} failed: {record['error']}", file=sys.stderr)
+            record['seconds'] = time.perf_counter() - start
+            records.append(record)
+            _save_json(records, os.path.join(self.output_dir, 'jobs.json'))
+            if fail_fast and record['status'] == 'failed':
+                break
+        return records
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Runs simulation jobs from job files and/or --set overrides "
+                                                 "without a display.")
+    parser.add_argument('job_files', nargs='*', metavar='JOB_FILE', help="JSON or TOML job files, run in order")
+    parser.add_argument('--set', dest='overrides', action='append', default=[], metavar='KEY=VALUE',
+                        help="config.py setting applied to every job, e.g. --set N_ANTENNAS=4 (repeatable)")
+    parser.add_argument('--output-dir', default='results',
+                        help="Directory of the job outputs and jobs.json (default: results)")
+    parser.add_argument('--fail-fast', action='store_true', help="Stop at the first failed job")
+    args = parser.parse_args(argv)
+
+    try:
+        overrides = {}
+        for text in args.overrides:
+            overrides.update(parse_override(text))
+        jobs = [job for path in args.job_files for job in load_job_file(path)] or [{}]
+    except JobFileError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_USAGE
+    jobs = [dict(job, **overrides) for job in jobs]
+
+    runner = JobRunner(os.path.abspath(args.output_dir))
+    try:
+        records = runner.run(jobs, fail_fast=args.fail_fast)
+    except KeyboardInterrupt:
+        print("Interrupted.", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    finally:
+        runner.close()
+
+    failed = [record['name'] for record in records if record['status'] == 'failed']
+    print(f"{len(records) - len(failed)} of {len(jobs)} job(s) succeeded"
+          + (f"; failed: {', '.join(failed)}" if failed else ""))
+    return EXIT_JOB_FAILED if failed or len(records) < len(jobs) else EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -7,4 +7,32 @@ SIGMA_N_SQ = 1.0  # Natural noise variance
 R_THRESHOLD = 3  # Constant threshold rate for outage probability
 M_MONTE_CARLO_G = 1000  # Number of Monte Carlo simulations for g (Eve's channel)
 M_MONTE_CARLO_H = 1000 # Number of Monte Carlo simulations for h (Bob's channel)
-SNR_DB_RANGE = np.arange(-5, 21, 1) # SNR range in dB 
\ No newline at end of file
+SNR_DB_RANGE = np.arange(-5, 21, 1) # SNR range in dB
+USE_CRN = False # Share one channel ensemble across all strategies and SNR points (common random numbers)
+EVE_RATE_MODE = 'monte_carlo' # 'monte_carlo' averages over M_MONTE_CARLO_G draws of g, 'analytic' uses the closed form
+WORKERS = None # Number of worker processes for run_simulation; None keeps the single-process loop (other draws)
+SEED = 2024 # Seed for np.random.default_rng / SeedSequence; every run with the same seed draws the same channels
+ADAPTIVE = False # Draw Bob's channel in chunks and stop each (strategy, SNR) cell once its confidence intervals are narrow enough
+ADAPTIVE_RS_TOL = 0.05 # Target CI half-width of the mean secrecy rate (bits/s/Hz)
+ADAPTIVE_PROB_TOL = 0.02 # Target CI half-width of P(Rs > R)
+ADAPTIVE_CONFIDENCE = 0.95 # Confidence level of the intervals
+ADAPTIVE_CHUNK_H = 200 # Bob channel draws per adaptive chunk
+ADAPTIVE_MAX_H = 10000 # Hard cap on Bob channel draws per cell
+IMPORTANCE_SAMPLING = False # Estimate P(Rs > R) by drawing Bob's channel with a larger |h|^2 and likelihood weights (rare events)
+RUN_SWEEP = False # Run the N x alpha x sigma^2 x SNR sweep below instead of the single configuration above
+SWEEP_N_VALUES = [2, 4, 10] # Antenna counts of the sweep
+SWEEP_ALPHA_VALUES = np.linspace(0.1, 0.9, 9) # Power allocation factors of the sweep
+SWEEP_SIGMA_N_SQ_VALUES = [1.0] # Noise variances of the sweep (SNR_DB_RANGE is the SNR axis)
+CACHE_DIR = None # Directory of the on-disk result cache (e.g. 'results/cache'); None disables it. Needs SEED
+CACHE_MAX_BYTES = 512 * 2**20 # Least recently used cache entries are deleted beyond this size
+CHECKPOINT_DIR = None # Directory where run_simulation checkpoints finished SNR points / tasks (main.py --resume continues from it)
+QUEUE_DIR = None # Work queue directory (e.g. on a shared file system) for distributed runs; WORKERS local workers join it
+QUEUE_LEASE_TIMEOUT = 600.0 # Seconds after which a claimed shard without a result is handed to another worker
+MAX_BYTES = None # Memory budget in bytes of each ensemble evaluation (e.g. 2e9); None evaluates it in one piece
+OPTIMIZE_ALPHA = False # Find the best alpha per strategy and SNR instead of running at ALPHA_VAL
+ALPHA_OPT_METRIC = 'secrecy_rate' # Quantity the alpha search maximizes: 'secrecy_rate' or 'outage_prob' (P(Rs > R))
+ALPHA_OPT_GRID_SIZE = 11 # Coarse alpha grid on [0, 1] before golden-section refinement
+ALPHA_OPT_TOLERANCE = 1e-2 # Width of the final alpha bracket
+DTYPE = 'complex128' # Precision of the channels: 'complex64' halves memory and bandwidth (rates keep float64 sums)
+PROFILE = False # Time the pipeline stages of run_simulation (main.py --profile does the same)
+PROFILE_PATH = 'results/profile.json' # Where main.py saves the stage profile as JSON
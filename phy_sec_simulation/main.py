@@ -1,136 +1,404 @@
 import numpy as np
-import matplotlib.pyplot as plt
+import argparse
+import contextlib
 import os
 
 import config
 # import strategies # Old import
-from strategies import strategy_1, strategy_1_2, strategy_2_constant_inst_power, strategy_3_1, strategy_3_2, snr_to_total_power # New import
-
-def run_simulation():
-    avg_secrecy_rates_s1 = []
-    outage_probs_s1 = [] 
-
-    avg_secrecy_rates_s1_2 = []
-    outage_probs_s1_2 = []
-
-    avg_secrecy_rates_s2 = []
-    outage_probs_s2 = []
-
-    avg_secrecy_rates_s3_1 = []
-    outage_probs_s3_1 = []
-
-    avg_secrecy_rates_s3_2 = []
-    outage_probs_s3_2 = []
-
-    print("Starting simulation...")
-    for snr_db in config.SNR_DB_RANGE:
-        P = snr_to_total_power(snr_db, config.SIGMA_N_SQ) # Updated usage
-        
-        current_snr_secrecy_s1 = []
-        current_snr_outage_events_s1 = []
-        
-        current_snr_secrecy_s1_2 = []
-        current_snr_outage_events_s1_2 = []
-
-        current_snr_secrecy_s2 = []
-        current_snr_outage_events_s2 = []
-
-        current_snr_secrecy_s3_1 = []
-        current_snr_outage_events_s3_1 = []
-
-        current_snr_secrecy_s3_2 = []
-        current_snr_outage_events_s3_2 = []
-
-        for i in range(config.M_MONTE_CARLO_H):
-            # Strategy 1
-            rs_s1, event_s1 = strategy_1( # Updated usage
-                P, config.N_ANTENNAS, config.ALPHA_VAL, 
-                config.SIGMA_N_SQ, config.M_MONTE_CARLO_G, config.R_THRESHOLD
-            )
-            current_snr_secrecy_s1.append(rs_s1)
-            current_snr_outage_events_s1.append(event_s1)
-            
-            # Strategy 1.2
-            rs_s1_2, event_s1_2 = strategy_1_2( # Updated usage
-                P, config.N_ANTENNAS, config.ALPHA_VAL, 
-                config.SIGMA_N_SQ, config.M_MONTE_CARLO_G, config.R_THRESHOLD
-            )
-            current_snr_secrecy_s1_2.append(rs_s1_2)
-            current_snr_outage_events_s1_2.append(event_s1_2)
-
-            # Strategy 2
-            rs_s2, event_s2 = strategy_2_constant_inst_power(
-                P, config.N_ANTENNAS, config.ALPHA_VAL, 
-                config.SIGMA_N_SQ, config.M_MONTE_CARLO_G, config.R_THRESHOLD
-            )
-            current_snr_secrecy_s2.append(rs_s2)
-            current_snr_outage_events_s2.append(event_s2)
-
-            # Strategy 3.1
-            rs_s3_1, event_s3_1 = strategy_3_1(
-                P, config.N_ANTENNAS, config.ALPHA_VAL, 
-                config.SIGMA_N_SQ, config.M_MONTE_CARLO_G, config.R_THRESHOLD
-            )
-            current_snr_secrecy_s3_1.append(rs_s3_1)
-            current_snr_outage_events_s3_1.append(event_s3_1)
-
-            # Strategy 3.2
-            rs_s3_2, event_s3_2 = strategy_3_2(
-                P, config.N_ANTENNAS, config.ALPHA_VAL, 
-                config.SIGMA_N_SQ, config.M_MONTE_CARLO_G, config.R_THRESHOLD
-            )
-            current_snr_secrecy_s3_2.append(rs_s3_2)
-            current_snr_outage_events_s3_2.append(event_s3_2)
-            
-            if (i + 1) % (config.M_MONTE_CARLO_H // 10) == 0: 
-                 if config.M_MONTE_CARLO_H >= 10 : # Avoid division by zero if M_MONTE_CARLO_H < 10
-                    print(f"  SNR: {snr_db} dB, Monte Carlo for h: {i+1}/{config.M_MONTE_CARLO_H}")
-                 elif i == config.M_MONTE_CARLO_H -1: # Print at the end for small M_MONTE_CARLO_H
-                    print(f"  SNR: {snr_db} dB, Monte Carlo for h: {i+1}/{config.M_MONTE_CARLO_H}")
-
-        avg_secrecy_rates_s1.append(np.mean(current_snr_secrecy_s1 if current_snr_secrecy_s1 else [0]))
-        outage_probs_s1.append(np.mean(current_snr_outage_events_s1 if current_snr_outage_events_s1 else [0]))
-        
-        avg_secrecy_rates_s1_2.append(np.mean(current_snr_secrecy_s1_2 if current_snr_secrecy_s1_2 else [0]))
-        outage_probs_s1_2.append(np.mean(current_snr_outage_events_s1_2 if current_snr_outage_events_s1_2 else [0]))
-
-        avg_secrecy_rates_s2.append(np.mean(current_snr_secrecy_s2 if current_snr_secrecy_s2 else [0]))
-        outage_probs_s2.append(np.mean(current_snr_outage_events_s2 if current_snr_outage_events_s2 else [0]))
-
-        avg_secrecy_rates_s3_1.append(np.mean(current_snr_secrecy_s3_1 if current_snr_secrecy_s3_1 else [0]))
-        outage_probs_s3_1.append(np.mean(current_snr_outage_events_s3_1 if current_snr_outage_events_s3_1 else [0]))
-
-        avg_secrecy_rates_s3_2.append(np.mean(current_snr_secrecy_s3_2 if current_snr_secrecy_s3_2 else [0]))
-        outage_probs_s3_2.append(np.mean(current_snr_outage_events_s3_2 if current_snr_outage_events_s3_2 else [0]))
-
-        print(f"SNR: {snr_db} dB processed. S1: Rs={avg_secrecy_rates_s1[-1]:.2f}, P(>R)={outage_probs_s1[-1]:.2f} | "
-              f"S1.2: Rs={avg_secrecy_rates_s1_2[-1]:.2f}, P(>R)={outage_probs_s1_2[-1]:.2f} | "
-              f"S2: Rs={avg_secrecy_rates_s2[-1]:.2f}, P(>R)={outage_probs_s2[-1]:.2f} | "
-              f"S3.1: Rs={avg_secrecy_rates_s3_1[-1]:.2f}, P(>R)={outage_probs_s3_1[-1]:.2f} | "
-              f"S3.2: Rs={avg_secrecy_rates_s3_2[-1]:.2f}, P(>R)={outage_probs_s3_2[-1]:.2f}")
-    
+from strategies import (
+    STRATEGY_REGISTRY, evaluate_specs, snr_to_total_power, run_parallel_simulation, run_adaptive_simulation,
+    run_importance_sampling, run_sweep, save_sweep, optimize_alpha, sort_samples, run_distributed_simulation,
+    ResultCache, run_cached_simulation, SimulationCheckpoint, ChannelSource, channel_dtype, peak_rss_bytes,
+    profiling, stage
+)
+
+def run_fingerprint(mode, strategy_names, crn, eve_rate_mode, max_bytes=None, dtype=None):
+    """Parameters that determine a run's results, used to check that a checkpoint belongs to the run."""
+    return {
+        'mode': mode,
+        'strategy_names': list(strategy_names),
+        'crn': crn,
+        'eve_rate_mode': eve_rate_mode,
+        'max_bytes': max_bytes, # Sets the block order in which channels are drawn
+        'dtype': channel_dtype(dtype).name,
+        'N': config.N_ANTENNAS,
+        'alpha': float(config.ALPHA_VAL),
+        'sigma_n_sq': float(config.SIGMA_N_SQ),
+        'R_thresh': float(config.R_THRESHOLD),
+        'M_h_sims': config.M_MONTE_CARLO_H,
+        'M_g_sims': config.M_MONTE_CARLO_G,
+        'snr_db': [float(snr_db) for snr_db in config.SNR_DB_RANGE],
+    }
+
+def report_peak_memory():
+    """Prints the peak resident memory of this process and of its largest worker process, if any."""
+    peak = peak_rss_bytes()
+    if peak is None:
+        return
+    line = f"Peak RSS: {peak / 2**20:.0f} MiB"
+    worker_peak = peak_rss_bytes(children=True)
+    if worker_peak:
+        line += f" (largest worker: {worker_peak / 2**20:.0f} MiB)"
+    print(line)
+
+def run_simulation(crn=False, eve_rate_mode='monte_carlo', workers=None, seed=None, strategy_names=None,
+                   adaptive=False, importance_sampling=False, cache_dir=None, checkpoint_dir=None, resume=False,
+                   max_bytes=None, executor=None, dtype=None, queue_dir=None):
+    """
+    Runs the Monte Carlo for the given strategies (names in STRATEGY_REGISTRY, default all registered).
+    All strategies are evaluated on the same channel draws at each SNR point; with crn=True one ensemble
+    is shared by all SNR points as well. workers runs the simulation sharded on a process pool. Each shard draws
+    from its own SeedSequence child of seed, so a sharded run gives the same results for any workers (1 included)
+    but not those of workers=None, whose draws come from one stream; both are valid estimates of the same run.
+    adaptive=True stops each (strategy, SNR) cell at the config.ADAPTIVE_* tolerances (in-process).
+    importance_sampling=True estimates P(Rs > R) with a tilted Bob channel, for probabilities down to 1e-7 and below.
+    cache_dir serves and stores the run through an on-disk ResultCache (in-process, seed required).
+    checkpoint_dir saves finished SNR points (or pool tasks) and the RNG state as the run goes; resume=True
+    continues the run checkpointed there and gives bit-identical results (standard and sharded runs only).
+    max_bytes bounds the memory of each ensemble evaluation (per worker when sharded) by drawing and evaluating
+    the Bob and Eve draws in blocks (standard and sharded runs only).
+    executor is an existing process pool for the sharded run, reused instead of starting one (see cli.py).
+    dtype='complex64' draws and processes the channels in single precision, with float64 sums (not with
+    cache_dir, whose cached cells are complex128).
+    queue_dir runs the sharded run through a work queue in that directory, which worker.py processes on this
+    and other hosts can join (workers sets the number of local worker processes); resume=True continues the
+    run queued there. Not with checkpoint_dir: the queue keeps finished shards itself.
+    Returns {name: {'secrecy_rates': [...], 'outage_probs': [...], 'rs_samples': [...]}} with one entry per
+    SNR point; 'rs_samples' holds the sorted per-draw secrecy rates, from which strategies.apply_threshold
+    and strategies.rate_percentiles evaluate any threshold or percentile after the run (not in importance_sampling).
+    """
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_REGISTRY)
+    if checkpoint_dir is not None and (adaptive or importance_sampling or cache_dir is not None):
+        raise ValueError("Checkpointing covers the standard and sharded runs only")
+    if queue_dir is not None and (adaptive or importance_sampling or cache_dir is not None
+                                  or checkpoint_dir is not None):
+        raise ValueError("The work queue runs the sharded simulation only, without checkpoint_dir")
+    if cache_dir is not None and channel_dtype(dtype) != np.complex128:
+        raise ValueError("The result cache holds complex128 results only")
+    if adaptive:
+        return run_simulation_adaptive(eve_rate_mode, seed, strategy_names, dtype)
+    if importance_sampling:
+        return run_simulation_importance(eve_rate_mode, seed, strategy_names, dtype)
+    if cache_dir is not None:
+        return run_simulation_cached(cache_dir, eve_rate_mode, seed, strategy_names)
+    if queue_dir is not None:
+        return run_simulation_distributed(queue_dir, crn, eve_rate_mode, workers, seed, strategy_names, resume,
+                                          max_bytes, dtype)
+    if workers is not None:
+        return run_simulation_sharded(crn, eve_rate_mode, workers, seed, strategy_names, checkpoint_dir, resume,
+                                      max_bytes, executor, dtype)
+
+    checkpoint = None
+    if checkpoint_dir is not None:
+        fingerprint = run_fingerprint('serial', strategy_names, crn, eve_rate_mode, max_bytes, dtype)
+        checkpoint = SimulationCheckpoint(checkpoint_dir, fingerprint, seed, resume)
+        seed = checkpoint.seed
+
+    specs = [STRATEGY_REGISTRY[name] for name in strategy_names]
+    results = {spec.name: {'secrecy_rates': [], 'outage_probs': [], 'rs_samples': []} for spec in specs}
+    rng = ChannelSource(np.random.default_rng(seed), dtype=dtype) # All draws of the run come from one seeded Generator
+    P_totals = snr_to_total_power(np.asarray(config.SNR_DB_RANGE, dtype=float), config.SIGMA_N_SQ)
+    # With CRN all SNR points are evaluated on one ensemble by broadcasting, otherwise each gets fresh draws
+    P_groups = [P_totals] if crn else [P_totals[i:i + 1] for i in range(len(P_totals))]
+
+    print("Starting simulation (common random numbers)..." if crn else "Starting simulation...")
+    for group, P_group in enumerate(P_groups):
+        if checkpoint is not None and ('point', group) in checkpoint.units:
+            # Finished before the restart: take its results and continue the RNG stream after it
+            point = checkpoint.units[('point', group)]
+            rng.set_state(point['rng_state'])
+        else:
+            evaluated = evaluate_specs(specs, P_group, config.N_ANTENNAS, config.ALPHA_VAL, config.SIGMA_N_SQ,
+                                       config.M_MONTE_CARLO_H, config.M_MONTE_CARLO_G, config.R_THRESHOLD,
+                                       eve_rate_mode, rng, max_bytes=max_bytes)
+            with stage('aggregation'):
+                point = {'values': {}, 'rng_state': rng.get_state()}
+                for name, (rs, events) in evaluated.items():
+                    point['values'][name] = {
+                        'secrecy_rates': list(np.mean(rs, axis=1)) if rs.size else [0.0] * len(P_group),
+                        'outage_probs': list(np.mean(events, axis=1)) if events.size else [0.0] * len(P_group),
+                        'rs_samples': [sort_samples(row) for row in rs],
+                    }
+            if checkpoint is not None:
+                checkpoint.save({('point', group): point})
+        with stage('aggregation'):
+            for name, values in point['values'].items():
+                for key, series in values.items():
+                    results[name][key].extend(series)
+
+    for i, snr_db in enumerate(config.SNR_DB_RANGE):
+        print(f"SNR: {snr_db} dB processed. " + " | ".join(
+            f"{spec.short_label}: Rs={results[spec.name]['secrecy_rates'][i]:.2f}, "
+            f"P(>R)={results[spec.name]['outage_probs'][i]:.2f}"
+            for spec in specs))
+
     print("Simulation finished.")
-    return (avg_secrecy_rates_s1, outage_probs_s1, 
-            avg_secrecy_rates_s1_2, outage_probs_s1_2, 
-            avg_secrecy_rates_s2, outage_probs_s2,
-            avg_secrecy_rates_s3_1, outage_probs_s3_1,
-            avg_secrecy_rates_s3_2, outage_probs_s3_2)
-
-def plot_results(snr_db_range, 
-                 avg_secrecy_s1, outage_s1, 
-                 avg_secrecy_s1_2, outage_s1_2, 
-                 avg_secrecy_s2, outage_s2,
-                 avg_secrecy_s3_1, outage_s3_1,
-                 avg_secrecy_s3_2, outage_s3_2):
+    return results
+
+def run_simulation_adaptive(eve_rate_mode='monte_carlo', seed=None, strategy_names=None, dtype=None):
+    """
+    Adaptive mode: Bob's channel is drawn in chunks of config.ADAPTIVE_CHUNK_H and each (strategy, SNR) cell
+    stops once the confidence intervals of its mean secrecy rate and P(Rs > R) are within config.ADAPTIVE_RS_TOL
+    and config.ADAPTIVE_PROB_TOL, or after config.ADAPTIVE_MAX_H draws. Returns the run_simulation dict with
+    the achieved intervals ('secrecy_rate_ci', 'outage_prob_ci') and draw counts ('samples') added.
+    """
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_REGISTRY)
+    specs = [STRATEGY_REGISTRY[name] for name in strategy_names]
+    rng = ChannelSource(np.random.default_rng(seed), dtype=dtype)
+    P_totals = snr_to_total_power(np.asarray(config.SNR_DB_RANGE, dtype=float), config.SIGMA_N_SQ)
+
+    print("Starting simulation (adaptive)...")
+    results = run_adaptive_simulation(
+        specs, P_totals, config.N_ANTENNAS, config.ALPHA_VAL, config.SIGMA_N_SQ, config.M_MONTE_CARLO_G,
+        config.R_THRESHOLD, config.ADAPTIVE_RS_TOL, config.ADAPTIVE_PROB_TOL, config.ADAPTIVE_MAX_H,
+        chunk_size=config.ADAPTIVE_CHUNK_H, confidence=config.ADAPTIVE_CONFIDENCE, eve_rate_mode=eve_rate_mode,
+        rng=rng, keep_samples=True
+    )
+
+    for i, snr_db in enumerate(config.SNR_DB_RANGE):
+        print(f"SNR: {snr_db} dB processed. " + " | ".join(
+            f"{spec.short_label}: Rs={results[spec.name]['secrecy_rates'][i]:.2f}"
+            f"±{(results[spec.name]['secrecy_rate_ci'][i][1] - results[spec.name]['secrecy_rate_ci'][i][0]) / 2:.2f}, "
+            f"P(>R)={results[spec.name]['outage_probs'][i]:.2f} "
+            f"[{results[spec.name]['outage_prob_ci'][i][0]:.2f}, {results[spec.name]['outage_prob_ci'][i][1]:.2f}], "
+            f"n={results[spec.name]['samples'][i]}"
+            for spec in specs))
+
+    total_samples = sum(sum(values['samples']) for values in results.values())
+    print(f"Simulation finished. {total_samples} Bob channel draws in total "
+          f"({total_samples / (len(specs) * len(P_totals)):.0f} per cell on average).")
+    return results
+
+def run_simulation_importance(eve_rate_mode='monte_carlo', seed=None, strategy_names=None, dtype=None):
+    """
+    Importance-sampling mode for rare events: Bob's channel is drawn with |h|^2 scaled up per (strategy, SNR)
+    cell and each draw is weighted by its likelihood ratio. Returns the run_simulation dict with the relative
+    error of each P(Rs > R) estimate ('outage_prob_rel_error') and the tilt used ('tilts') added.
+    """
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_REGISTRY)
+    specs = [STRATEGY_REGISTRY[name] for name in strategy_names]
+    rng = ChannelSource(np.random.default_rng(seed), dtype=dtype)
+    P_totals = snr_to_total_power(np.asarray(config.SNR_DB_RANGE, dtype=float), config.SIGMA_N_SQ)
+
+    print("Starting simulation (importance sampling)...")
+    results = run_importance_sampling(
+        specs, P_totals, config.N_ANTENNAS, config.ALPHA_VAL, config.SIGMA_N_SQ, config.M_MONTE_CARLO_H,
+        config.M_MONTE_CARLO_G, config.R_THRESHOLD, eve_rate_mode=eve_rate_mode, rng=rng
+    )
+
+    for i, snr_db in enumerate(config.SNR_DB_RANGE):
+        print(f"SNR: {snr_db} dB processed. " + " | ".join(
+            f"{spec.short_label}: Rs={results[spec.name]['secrecy_rates'][i]:.2f}, "
+            f"P(>R)={results[spec.name]['outage_probs'][i]:.2e} "
+            f"(rel. err. {results[spec.name]['outage_prob_rel_error'][i]:.2f})"
+            for spec in specs))
+
+    print("Simulation finished.")
+    return results
+
+def run_simulation_cached(cache_dir, eve_rate_mode='monte_carlo', seed=None, strategy_names=None):
+    """
+    Runs the simulation through the result cache in cache_dir: cells computed before (same parameters, seed
+    and code) are loaded, and cells with fewer cached draws than config.M_MONTE_CARLO_H are extended.
+    Returns the run_simulation dict with 'computed_draws' (draws not served from the cache) added.
+    """
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_REGISTRY)
+    specs = [STRATEGY_REGISTRY[name] for name in strategy_names]
+    cache = ResultCache(cache_dir, max_bytes=config.CACHE_MAX_BYTES)
+
+    print(f"Starting simulation (cache: {cache_dir})...")
+    results = run_cached_simulation(
+        specs, config.SNR_DB_RANGE, config.N_ANTENNAS, config.ALPHA_VAL, config.SIGMA_N_SQ, config.M_MONTE_CARLO_H,
+        config.M_MONTE_CARLO_G, config.R_THRESHOLD, cache, seed, eve_rate_mode=eve_rate_mode
+    )
+
+    for i, snr_db in enumerate(config.SNR_DB_RANGE):
+        print(f"SNR: {snr_db} dB processed. " + " | ".join(
+            f"{spec.short_label}: Rs={results[spec.name]['secrecy_rates'][i]:.2f}, "
+            f"P(>R)={results[spec.name]['outage_probs'][i]:.2f}"
+            for spec in specs))
+
+    computed = sum(sum(values['computed_draws']) for values in results.values())
+    requested = len(specs) * len(config.SNR_DB_RANGE) * config.M_MONTE_CARLO_H
+    print(f"Simulation finished. {computed} of {requested} Bob channel draws computed, the rest served from the cache.")
+    return results
+
+def run_simulation_sharded(crn=False, eve_rate_mode='monte_carlo', workers=1, seed=None, strategy_names=None,
+                           checkpoint_dir=None, resume=False, max_bytes=None, executor=None, dtype=None):
+    """
+    Runs the simulation as SNR x strategy x draw-chunk tasks on a pool of worker processes.
+    Every task is seeded from np.random.SeedSequence(seed), so results for a given seed do not
+    depend on the number of workers. With checkpoint_dir, finished tasks are saved periodically and
+    resume=True skips the ones already done. executor is a process pool to run the tasks on instead of a new one.
+    Returns the same dict as run_simulation.
+    """
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_REGISTRY)
+    checkpoint = None
+    if checkpoint_dir is not None:
+        fingerprint = run_fingerprint('sharded', strategy_names, crn, eve_rate_mode, max_bytes, dtype)
+        checkpoint = SimulationCheckpoint(checkpoint_dir, fingerprint, seed, resume)
+        seed = checkpoint.seed
+    print(f"Starting simulation on {workers} worker(s)...")
+
+    def report_progress(done, total):
+        if done == total or done % max(1, total // 10) == 0:
+            print(f"  Tasks completed: {done}/{total}")
+
+    results = run_parallel_simulation(
+        strategy_names, config.SNR_DB_RANGE, config.N_ANTENNAS, config.ALPHA_VAL, config.SIGMA_N_SQ,
+        config.M_MONTE_CARLO_H, config.M_MONTE_CARLO_G, config.R_THRESHOLD,
+        seed=seed, workers=workers, crn=crn, eve_rate_mode=eve_rate_mode, keep_samples=True,
+        progress_callback=report_progress, checkpoint=checkpoint, max_bytes=max_bytes, executor=executor,
+        dtype=dtype
+    )
+    print("Simulation finished.")
+    return results
+
+def run_simulation_distributed(queue_dir, crn=False, eve_rate_mode='monte_carlo', workers=None, seed=None,
+                               strategy_names=None, resume=False, max_bytes=None, dtype=None):
+    """
+    Runs the sharded simulation through the work queue in queue_dir, with workers local worker processes
+    next to this one; `python worker.py work QUEUE_DIR` adds workers on other hosts sharing the directory.
+    Results match run_simulation_sharded with the same seed. Returns the same dict as run_simulation.
+    """
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_REGISTRY)
+    print(f"Starting simulation through the work queue in {queue_dir} "
+          f"with {workers or 0} local worker(s)...")
+
+    def report_progress(done, total):
+        if done == total or done % max(1, total // 10) == 0:
+            print(f"  Shards completed: {done}/{total}")
+
+    results = run_distributed_simulation(
+        queue_dir, strategy_names, config.SNR_DB_RANGE, config.N_ANTENNAS, config.ALPHA_VAL, config.SIGMA_N_SQ,
+        config.M_MONTE_CARLO_H, config.M_MONTE_CARLO_G, config.R_THRESHOLD,
+        seed=seed, local_workers=workers or 0, crn=crn, eve_rate_mode=eve_rate_mode, keep_samples=True,
+        resume=resume, lease_timeout=config.QUEUE_LEASE_TIMEOUT, progress_callback=report_progress,
+        max_bytes=max_bytes, dtype=dtype
+    )
+    print("Simulation finished.")
+    return results
+
+def run_parameter_sweep(eve_rate_mode='monte_carlo', seed=None, strategy_names=None, results_dir='results',
+                        dtype=None):
+    """
+    Runs the config.SWEEP_* grid over N, alpha and sigma^2 against config.SNR_DB_RANGE and saves it as one
+    labelled array to {results_dir}/sweep_M{M_MONTE_CARLO_H}.npz (see strategies.sweep.load_sweep). Returns the sweep.
+    """
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_REGISTRY)
+    specs = [STRATEGY_REGISTRY[name] for name in strategy_names]
+    print(f"Starting sweep over N={list(config.SWEEP_N_VALUES)}, {len(config.SWEEP_ALPHA_VALUES)} alpha, "
+          f"{len(config.SWEEP_SIGMA_N_SQ_VALUES)} sigma^2 and {len(config.SNR_DB_RANGE)} SNR values...")
+
+    def report_progress(done, total):
+        print(f"  N={config.SWEEP_N_VALUES[done - 1]} done ({done}/{total})")
+
+    sweep = run_sweep(
+        specs, config.SWEEP_N_VALUES, config.SWEEP_ALPHA_VALUES, config.SWEEP_SIGMA_N_SQ_VALUES, config.SNR_DB_RANGE,
+        config.M_MONTE_CARLO_H, config.M_MONTE_CARLO_G, config.R_THRESHOLD, eve_rate_mode=eve_rate_mode, seed=seed,
+        progress_callback=report_progress, dtype=dtype
+    )
+
+    if not os.path.exists(results_dir):
+        os.makedirs(results_dir)
+    sweep_filename = os.path.join(results_dir, f'sweep_M{config.M_MONTE_CARLO_H}.npz')
+    save_sweep(sweep, sweep_filename)
+    print(f"Sweep {dict(zip(sweep['dims'], sweep['values'].shape))} saved to {sweep_filename}")
+    return sweep
+
+def run_alpha_optimization(metric='secrecy_rate', eve_rate_mode='monte_carlo', seed=None, strategy_names=None,
+                           dtype=None):
+    """
+    Finds the alpha maximizing metric ('secrecy_rate' or 'outage_prob') for every strategy and SNR point of
+    config.SNR_DB_RANGE on one shared channel ensemble (see strategies.optimize.optimize_alpha).
+    Returns {name: {'optimal_alphas': [...], 'secrecy_rates': [...], 'outage_probs': [...]}}.
+    """
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_REGISTRY)
+    specs = [STRATEGY_REGISTRY[name] for name in strategy_names]
+    print(f"Optimizing alpha for the {metric.replace('_', ' ')} over {len(config.SNR_DB_RANGE)} SNR values...")
+    optimum = optimize_alpha(
+        specs, config.SNR_DB_RANGE, config.N_ANTENNAS, config.SIGMA_N_SQ, config.M_MONTE_CARLO_H,
+        config.M_MONTE_CARLO_G, config.R_THRESHOLD, metric=metric, grid_size=config.ALPHA_OPT_GRID_SIZE,
+        tolerance=config.ALPHA_OPT_TOLERANCE, eve_rate_mode=eve_rate_mode,
+        rng=ChannelSource(np.random.default_rng(seed), dtype=dtype)
+    )
+    for i, snr_db in enumerate(config.SNR_DB_RANGE):
+        print(f"SNR: {snr_db} dB. " + " | ".join(
+            f"{spec.short_label}: alpha*={optimum[spec.name]['optimal_alphas'][i]:.3f}, "
+            f"Rs={optimum[spec.name]['secrecy_rates'][i]:.2f}, P(>R)={optimum[spec.name]['outage_probs'][i]:.2f}"
+            for spec in specs))
+    print("Optimization finished.")
+    return optimum
+
+def plot_optimal_alpha(snr_db_range, optimum, metric='secrecy_rate', results_dir='results', show=True):
+    """
+    Plots the optimal alpha and the metric reached with it against SNR and saves the figure to results_dir.
+    With show=False the figure is closed instead of shown, for non-interactive backends. Returns the file name.
+    """
+    import matplotlib.pyplot as plt # Imported here so that runs without plots do not load matplotlib
+    print("Plotting optimal alpha...")
+    metric_key, metric_label = {
+        'secrecy_rate': ('secrecy_rates', 'Average Secrecy Rate (bits/s/Hz)'),
+        'outage_prob': ('outage_probs', f'P(Rs > R={config.R_THRESHOLD})'),
+    }[metric]
+    plt.figure(figsize=(14, 6))
+
+    plt.subplot(1, 2, 1)
+    for name, values in optimum.items():
+        spec = STRATEGY_REGISTRY[name]
+        plt.plot(snr_db_range, values['optimal_alphas'], marker=spec.marker, linestyle=spec.linestyle, label=spec.label)
+    plt.title(f'Optimal alpha for the {metric_label.split(" (")[0]} (N={config.N_ANTENNAS})')
+    plt.xlabel('SNR (dB)')
+    plt.ylabel('Optimal alpha')
+    plt.grid(True)
+    plt.legend()
+
+    plt.subplot(1, 2, 2)
+    for name, values in optimum.items():
+        spec = STRATEGY_REGISTRY[name]
+        plt.plot(snr_db_range, values[metric_key], marker=spec.marker, linestyle=spec.linestyle, label=spec.label)
+    plt.title(f'{metric_label.split(" (")[0]} at the optimal alpha (N={config.N_ANTENNAS})')
+    plt.xlabel('SNR (dB)')
+    plt.ylabel(metric_label)
+    plt.grid(True)
+    plt.legend()
+
+    plt.tight_layout()
+
+    if not os.path.exists(results_dir):
+        os.makedirs(results_dir)
+
+    plot_filename = os.path.join(results_dir, f'optimal_alpha_{metric}_N{config.N_ANTENNAS}_M{config.M_MONTE_CARLO_H}.png')
+    plt.savefig(plot_filename)
+    print(f"Plot saved to {plot_filename}")
+    if show:
+        plt.show()
+    else:
+        plt.close()
+    return plot_filename
+
+def plot_results(snr_db_range, results, results_dir='results', show=True):
+    """
+    Plots the average secrecy rate and P(Rs > R) of every strategy against SNR and saves the figure to
+    results_dir. With show=False the figure is closed instead of shown, for non-interactive backends.
+    Returns the file name.
+    """
+    import matplotlib.pyplot as plt
     print("Plotting results...")
     plt.figure(figsize=(14, 6))
 
     plt.subplot(1, 2, 1)
-    plt.plot(snr_db_range, avg_secrecy_s1, marker='o', linestyle='-', label='Strategy 1')
-    plt.plot(snr_db_range, avg_secrecy_s1_2, marker='x', linestyle='--', label='Strategy 1.2')
-    plt.plot(snr_db_range, avg_secrecy_s2, marker='s', linestyle=':', label='Strategy 2')
-    plt.plot(snr_db_range, avg_secrecy_s3_1, marker='^', linestyle='-.', label='Strategy 3.1')
-    plt.plot(snr_db_range, avg_secrecy_s3_2, marker='d', linestyle='-', label='Strategy 3.2') # Consider a different linestyle if overlapping with S1
+    for name, values in results.items():
+        spec = STRATEGY_REGISTRY[name]
+        plt.plot(snr_db_range, values['secrecy_rates'], marker=spec.marker, linestyle=spec.linestyle, label=spec.label)
     plt.title(f'Average Secrecy Rate (N={config.N_ANTENNAS}, alpha={config.ALPHA_VAL})')
     plt.xlabel('SNR (dB)')
     plt.ylabel('Average Secrecy Rate (bits/s/Hz)')
@@ -138,40 +406,68 @@ def plot_results(snr_db_range,
     plt.legend()
 
     plt.subplot(1, 2, 2)
-    plt.plot(snr_db_range, outage_s1, marker='o', linestyle='-', label='Strategy 1')
-    plt.plot(snr_db_range, outage_s1_2, marker='x', linestyle='--', label='Strategy 1.2')
-    plt.plot(snr_db_range, outage_s2, marker='s', linestyle=':', label='Strategy 2')
-    plt.plot(snr_db_range, outage_s3_1, marker='^', linestyle='-.', label='Strategy 3.1')
-    plt.plot(snr_db_range, outage_s3_2, marker='d', linestyle='-', label='Strategy 3.2') # Consider a different linestyle
+    for name, values in results.items():
+        spec = STRATEGY_REGISTRY[name]
+        plt.plot(snr_db_range, values['outage_probs'], marker=spec.marker, linestyle=spec.linestyle, label=spec.label)
     plt.title(f'P(Rs > R={config.R_THRESHOLD}) (N={config.N_ANTENNAS}, alpha={config.ALPHA_VAL})')
     plt.xlabel('SNR (dB)')
-    plt.ylabel(f'P(Rs > R={config.R_THRESHOLD})') 
+    plt.ylabel(f'P(Rs > R={config.R_THRESHOLD})')
     plt.grid(True)
     plt.legend()
 
     plt.tight_layout()
-    
-    results_dir = 'results'
+
     if not os.path.exists(results_dir):
         os.makedirs(results_dir)
-    
+
     plot_filename = os.path.join(results_dir, f'comparison_N{config.N_ANTENNAS}_alpha{config.ALPHA_VAL}_M{config.M_MONTE_CARLO_H}.png')
     plt.savefig(plot_filename)
     print(f"Plot saved to {plot_filename}")
-    plt.show()
+    if show:
+        plt.show()
+    else:
+        plt.close()
+    return plot_filename
 
 if __name__ == "__main__":
-    s1_rs, s1_out, \
-    s1_2_rs, s1_2_out, \
-    s2_rs, s2_out, \
-    s3_1_rs, s3_1_out, \
-    s3_2_rs, s3_2_out = run_simulation()
-    
-    plot_results(
-        config.SNR_DB_RANGE, 
-        s1_rs, s1_out, 
-        s1_2_rs, s1_2_out,
-        s2_rs, s2_out,
-        s3_1_rs, s3_1_out,
-        s3_2_rs, s3_2_out
-    ) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Runs the simulation configured in config.py.")
+    parser.add_argument('--checkpoint-dir', default=config.CHECKPOINT_DIR,
+                        help="Directory where the run is checkpointed as it goes (default: config.CHECKPOINT_DIR)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue the run checkpointed in --checkpoint-dir (or queued in --queue-dir) "
+                             "instead of starting over")
+    parser.add_argument('--queue-dir', default=config.QUEUE_DIR,
+                        help="Directory of a work queue that worker.py processes can join "
+                             "(default: config.QUEUE_DIR)")
+    parser.add_argument('--profile', nargs='?', const=config.PROFILE_PATH, default=None, metavar='PATH',
+                        help="Time the pipeline stages, print a summary and save the profile as JSON "
+                             f"(default path: {config.PROFILE_PATH})")
+    args = parser.parse_args()
+    if args.profile is None and config.PROFILE:
+        args.profile = config.PROFILE_PATH
+    if args.resume and args.checkpoint_dir is None and args.queue_dir is None:
+        parser.error("--resume needs --checkpoint-dir or --queue-dir (or config.CHECKPOINT_DIR / config.QUEUE_DIR)")
+
+    if config.RUN_SWEEP:
+        run_parameter_sweep(eve_rate_mode=config.EVE_RATE_MODE, seed=config.SEED, dtype=config.DTYPE)
+    elif config.OPTIMIZE_ALPHA:
+        optimum = run_alpha_optimization(metric=config.ALPHA_OPT_METRIC, eve_rate_mode=config.EVE_RATE_MODE,
+                                         seed=config.SEED, dtype=config.DTYPE)
+        plot_optimal_alpha(config.SNR_DB_RANGE, optimum, metric=config.ALPHA_OPT_METRIC)
+    else:
+        with profiling() if args.profile else contextlib.nullcontext() as profile:
+            results = run_simulation(crn=config.USE_CRN, eve_rate_mode=config.EVE_RATE_MODE,
+                                     workers=config.WORKERS, seed=config.SEED, adaptive=config.ADAPTIVE,
+                                     importance_sampling=config.IMPORTANCE_SAMPLING, cache_dir=config.CACHE_DIR,
+                                     checkpoint_dir=args.checkpoint_dir, resume=args.resume,
+                                     max_bytes=config.MAX_BYTES, dtype=config.DTYPE, queue_dir=args.queue_dir)
+        report_peak_memory()
+        if profile is not None:
+            print(profile.summary_table())
+            profile_dir = os.path.dirname(args.profile)
+            if profile_dir:
+                os.makedirs(profile_dir, exist_ok=True)
+            profile.save(args.profile)
+            print(f"Profile saved to {args.profile}")
+
+        plot_results(config.SNR_DB_RANGE, results)
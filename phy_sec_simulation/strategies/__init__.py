@@ -1,17 +1,119 @@
-from .utils import generate_channel_vector, db_to_linear, snr_to_total_power
-from .constant_power import strategy_1
-from .variable_power import strategy_1_2
-from .strategy_2_constant_inst_power import strategy_2_constant_inst_power
-from .strategy_3_1 import strategy_3_1
-from .strategy_3_2 import strategy_3_2
+import importlib
+
+from .utils import (
+    generate_channel_vector, generate_channel_matrix, generate_an_vectors, average_eve_rate, average_eve_rate_batch,
+    db_to_linear, snr_to_total_power
+)
+from .spec import StrategySpec, STRATEGY_REGISTRY, register_strategy
+from .engine import evaluate_strategy, evaluate_strategy_batch, evaluate_strategy_multi_eve, evaluate_specs
+# Importing the strategy modules registers their specs, in this order
+from .constant_power import strategy_1, strategy_1_batch
+from .variable_power import strategy_1_2, strategy_1_2_batch
+from .strategy_2_constant_inst_power import strategy_2_constant_inst_power, strategy_2_constant_inst_power_batch
+from .strategy_3_1 import strategy_3_1, strategy_3_1_batch
+from .strategy_3_2 import strategy_3_2, strategy_3_2_batch
+from .crn import draw_channel_ensemble, secrecy_rates_crn
+from .distribution import sort_samples, exceedance_probability, rate_percentiles, apply_threshold
+from .memory import evaluate_specs_bounded, peak_rss_bytes
+from .profiling import PROFILE_STAGES, StageProfile, profiling, stage
+from .channel_source import CHANNEL_DTYPES, ChannelSource, channel_dtype
+from .analytic_eve import EVE_RATE_MODES, analytic_eve_rate_batch, analytic_eve_rate_from_powers
+from .fused import BACKENDS, numba_available, fused_secrecy_rate_batch
+from .multi_eve import EVE_MODELS, multi_eve_rate_batch
+
+# The imports above are the compute path (channels, strategy kernels, rates), which needs only NumPy, so
+# that worker processes start quickly. The run orchestration below (process pools, statistics, hashing,
+# pickling, the work queue) is imported on first access of one of its names.
+_LAZY_ATTRIBUTES = {
+    'run_parallel_simulation': 'parallel',
+    'run_adaptive_simulation': 'adaptive',
+    'run_importance_sampling': 'importance',
+    'ResultCache': 'cache',
+    'run_cached_simulation': 'cache',
+    'SimulationCheckpoint': 'checkpoint',
+    'run_sweep': 'sweep',
+    'save_sweep': 'sweep',
+    'load_sweep': 'sweep',
+    'sweep_results': 'sweep',
+    'ALPHA_METRICS': 'optimize',
+    'optimize_alpha': 'optimize',
+    'WorkQueue': 'work_queue',
+    'run_queue_worker': 'work_queue',
+    'run_distributed_simulation': 'work_queue',
+}
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value # Later accesses skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
 
 __all__ = [
     'generate_channel_vector',
+    'generate_channel_matrix',
+    'generate_an_vectors',
+    'average_eve_rate',
+    'average_eve_rate_batch',
     'db_to_linear',
     'snr_to_total_power',
     'strategy_1',
     'strategy_1_2',
     'strategy_2_constant_inst_power',
     'strategy_3_1',
-    'strategy_3_2'
-] 
\ No newline at end of file
+    'strategy_3_2',
+    'strategy_1_batch',
+    'strategy_1_2_batch',
+    'strategy_2_constant_inst_power_batch',
+    'strategy_3_1_batch',
+    'strategy_3_2_batch',
+    'StrategySpec',
+    'STRATEGY_REGISTRY',
+    'register_strategy',
+    'evaluate_strategy',
+    'evaluate_strategy_batch',
+    'evaluate_strategy_multi_eve',
+    'evaluate_specs',
+    'draw_channel_ensemble',
+    'secrecy_rates_crn',
+    'EVE_RATE_MODES',
+    'analytic_eve_rate_batch',
+    'analytic_eve_rate_from_powers',
+    'run_parallel_simulation',
+    'run_adaptive_simulation',
+    'run_importance_sampling',
+    'sort_samples',
+    'exceedance_probability',
+    'rate_percentiles',
+    'apply_threshold',
+    'ResultCache',
+    'run_cached_simulation',
+    'SimulationCheckpoint',
+    'evaluate_specs_bounded',
+    'peak_rss_bytes',
+    'PROFILE_STAGES',
+    'StageProfile',
+    'profiling',
+    'stage',
+    'run_sweep',
+    'save_sweep',
+    'load_sweep',
+    'sweep_results',
+    'ALPHA_METRICS',
+    'optimize_alpha',
+    'ChannelSource',
+    'CHANNEL_DTYPES',
+    'channel_dtype',
+    'BACKENDS',
+    'numba_available',
+    'fused_secrecy_rate_batch',
+    'EVE_MODELS',
+    'multi_eve_rate_batch',
+    'WorkQueue',
+    'run_queue_worker',
+    'run_distributed_simulation'
+]
@@ -0,0 +1,103 @@
+import numpy as np
+from statistics import NormalDist
+
+from .crn import draw_channel_ensemble, secrecy_rates_crn
+from .distribution import sort_samples
+
+def _merge_moments(count, mean, m2, chunk):
+    """
+    Merges the samples of chunk (..., n) into running (count, mean, sum of squared deviations)
+    with Chan et al.'s pairwise update, which stays accurate for long runs.
+    """
+    n = chunk.shape[-1]
+    chunk_mean = np.mean(chunk, axis=-1)
+    chunk_m2 = np.sum((chunk - chunk_mean[..., np.newaxis])**2, axis=-1)
+    total = count + n
+    delta = chunk_mean - mean
+    mean = mean + delta * n / total
+    m2 = m2 + chunk_m2 + delta**2 * count * n / total
+    return total, mean, m2
+
+def mean_half_width(count, m2, z):
+    """Normal-approximation half-width z * s / sqrt(n) of the confidence interval of a sample mean."""
+    count = np.asarray(count, dtype=float)
+    variance = np.where(count > 1, m2 / np.maximum(count - 1, 1), np.inf)
+    return z * np.sqrt(variance / np.maximum(count, 1))
+
+def proportion_interval(successes, count, z):
+    """
+    Wilson score interval of a binomial proportion. Returns (low, high). Unlike the normal
+    approximation it does not collapse to zero width when every draw is (or is not) an event.
+    """
+    count = np.maximum(np.asarray(count, dtype=float), 1)
+    p = successes / count
+    denom = 1 + z**2 / count
+    center = (p + z**2 / (2 * count)) / denom
+    spread = z * np.sqrt(p * (1 - p) / count + z**2 / (4 * count**2)) / denom
+    return center - spread, center + spread
+
+def run_adaptive_simulation(specs, P_totals, N, alpha, sigma_n_sq_val, M_g_sims, R_thresh, rs_tolerance,
+                            prob_tolerance, max_h_sims, chunk_size=200, confidence=0.95,
+                            eve_rate_mode='monte_carlo', rng=None, keep_samples=False, progress_callback=None):
+    """
+    Adaptive Monte Carlo over Bob's channel. Draws chunk_size channels at a time and stops each
+    (strategy, SNR) cell once the confidence-interval half-width of the mean secrecy rate is at most
+    rs_tolerance (bits/s/Hz) and that of P(Rs > R_thresh) at most prob_tolerance, or once max_h_sims
+    draws are used. Each chunk is one ensemble shared by the cells still running, so easy cells
+    (P(Rs > R) near 0 or 1) stop early while the transition region keeps drawing.
+    progress_callback(active_cells, total_cells) is called after each chunk.
+    Returns {spec.name: {'secrecy_rates', 'outage_probs', 'secrecy_rate_ci', 'outage_prob_ci', 'samples'}}
+    with one entry per power; the *_ci entries are (low, high) intervals at the given confidence.
+    keep_samples adds the sorted per-draw secrecy rates of each cell under 'rs_samples'.
+    """
+    P_totals = np.atleast_1d(np.asarray(P_totals, dtype=float))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    shape = (len(specs), P_totals.shape[0])
+    count = np.zeros(shape, dtype=int)
+    rs_mean = np.zeros(shape)
+    rs_m2 = np.zeros(shape)
+    events = np.zeros(shape, dtype=int)
+    active = np.ones(shape, dtype=bool)
+    chunks = [[[] for _ in range(shape[1])] for _ in range(shape[0])] # Per-cell R_s chunks, with keep_samples
+    M_g_ensemble = 0 if eve_rate_mode == 'analytic' else M_g_sims # Eve's draws are not needed analytically
+
+    while np.any(active):
+        # Running cells have all been sampled in every chunk so far, so they share one count
+        chunk = int(min(chunk_size, max_h_sims - np.max(count[active])))
+        ensemble = draw_channel_ensemble(N, chunk, M_g_ensemble, rng)
+        for k, spec in enumerate(specs):
+            snr_idx = np.flatnonzero(active[k])
+            if snr_idx.size == 0:
+                continue
+            rs, chunk_events = secrecy_rates_crn(spec.powers, P_totals[snr_idx], alpha, sigma_n_sq_val, R_thresh,
+                                                 ensemble, eve_rate_mode)
+            count[k, snr_idx], rs_mean[k, snr_idx], rs_m2[k, snr_idx] = _merge_moments(
+                count[k, snr_idx], rs_mean[k, snr_idx], rs_m2[k, snr_idx], rs)
+            events[k, snr_idx] += np.sum(chunk_events, axis=1)
+            if keep_samples:
+                for row, i in enumerate(snr_idx):
+                    chunks[k][i].append(rs[row])
+
+        rs_half_width = mean_half_width(count, rs_m2, z)
+        prob_low, prob_high = proportion_interval(events, count, z)
+        converged = (rs_half_width <= rs_tolerance) & ((prob_high - prob_low) / 2 <= prob_tolerance)
+        active &= ~converged & (count < max_h_sims)
+        if progress_callback is not None:
+            progress_callback(int(np.sum(active)), active.size)
+
+    rs_half_width = mean_half_width(count, rs_m2, z)
+    prob_low, prob_high = proportion_interval(events, count, z)
+    results = {}
+    for k, spec in enumerate(specs):
+        results[spec.name] = {
+            'secrecy_rates': rs_mean[k].tolist(),
+            'outage_probs': (events[k] / np.maximum(count[k], 1)).tolist(),
+            'secrecy_rate_ci': list(zip((rs_mean[k] - rs_half_width[k]).tolist(),
+                                        (rs_mean[k] + rs_half_width[k]).tolist())),
+            'outage_prob_ci': list(zip(prob_low[k].tolist(), prob_high[k].tolist())),
+            'samples': count[k].tolist(),
+        }
+        if keep_samples:
+            results[spec.name]['rs_samples'] = [sort_samples(np.concatenate(cell)) if cell else np.zeros(0)
+                                                for cell in chunks[k]]
+    return results
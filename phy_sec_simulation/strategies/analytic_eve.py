@@ -0,0 +1,91 @@
+import numpy as np
+
+EVE_RATE_MODES = ('monte_carlo', 'analytic')
+
+# Quadrature orders for the non-orthogonal fallback: Gauss-Laguerre in |g^H w_hat|^2 and |g^H z_perp|^2,
+# trapezoid in their relative phase.
+QUAD_LAGUERRE_ORDER = 40
+QUAD_PHASE_POINTS = 16
+
+def check_eve_rate_mode(eve_rate_mode):
+    """Raises ValueError for an unknown eve_rate_mode."""
+    if eve_rate_mode not in EVE_RATE_MODES:
+        raise ValueError(f"Unknown eve_rate_mode {eve_rate_mode!r}, expected one of {EVE_RATE_MODES}")
+
+def _scaled_exp1(x):
+    """e^x E1(x) for x > 0, evaluated without overflow for large x."""
+    from scipy.special import exp1
+    x = np.asarray(x, dtype=float)
+    small = x <= 500
+    x_small = np.where(small, x, 1.0)
+    x_large = np.where(small, 1.0, x)
+    # Asymptotic series e^x E1(x) ~ (1 - 1/x + 2/x^2 - 6/x^3 + 24/x^4) / x, accurate to ~1e-14 for x > 500
+    r = 1 / x_large
+    series = r * (1 + r * (-1 + r * (2 + r * (-6 + 24 * r))))
+    return np.where(small, np.exp(x_small) * exp1(x_small), series)
+
+def _log_term(mean_power, sigma_n_sq_val):
+    """J(a) = E[ln(1 + X/s)] = e^{s/a} E1(s/a) for X exponential with mean a; J(0) = 0."""
+    mean_power = np.asarray(mean_power, dtype=float)
+    positive = mean_power > 0
+    x = sigma_n_sq_val / np.where(positive, mean_power, 1.0)
+    return np.where(positive, _scaled_exp1(x), 0.0)
+
+def analytic_eve_rate_from_powers(w_power, z_power, sigma_n_sq_val):
+    """
+    Closed form of E_g[log2(1 + |g^H w|^2 / (|g^H z|^2 + sigma_n^2))] for g ~ CN(0, 2I_N) and w orthogonal to z,
+    given w_power = |w|^2 and z_power = |z|^2 (arrays broadcast against each other).
+    |g^H w|^2 and |g^H z|^2 are then independent exponentials with means a = 2|w|^2 and b = 2|z|^2, and
+    E[ln(1 + X/(Y + s))] = a (J(a) - J(b)) / (a - b) with J(a) = e^{s/a} E1(s/a).
+    """
+    a, b = np.broadcast_arrays(2 * np.asarray(w_power, dtype=float), 2 * np.asarray(z_power, dtype=float))
+    J_a = _log_term(a, sigma_n_sq_val)
+    J_b = _log_term(b, sigma_n_sq_val)
+    close = np.abs(a - b) <= 1e-6 * np.maximum(a, b)
+    general = a * (J_a - J_b) / np.where(close, 1.0, a - b)
+    # Limit a -> b: a J'(a) = 1 - (s/a) J(a)
+    limit = 1 - sigma_n_sq_val / np.where(a > 0, a, 1.0) * J_a
+    rates = np.where(close, limit, general)
+    return np.where(a > 0, rates, 0.0) / np.log(2)
+
+def _quadrature_eve_rate(w_power, beta, z_perp_power, sigma_n_sq_val):
+    """
+    Numerical quadrature of Eve's rate when z = beta * w/|w| + z_perp is not orthogonal to w.
+    With U1 = g^H w/|w| and U2 = g^H z_perp/|z_perp| independent CN(0, 2), X = |w|^2 |U1|^2 and
+    Y = |beta U1 + |z_perp| U2|^2, so the expectation is a 3-D integral over |U1|^2, |U2|^2 and their phase.
+    """
+    t, t_weights = np.polynomial.laguerre.laggauss(QUAD_LAGUERRE_ORDER) # Nodes for integral of e^{-t} f(t)
+    t = 2 * t # |U|^2 ~ Exp(mean 2)
+    phi = 2 * np.pi * np.arange(QUAD_PHASE_POINTS) / QUAD_PHASE_POINTS
+    t1 = t[:, np.newaxis, np.newaxis]
+    t2 = t[np.newaxis, :, np.newaxis]
+    weights = (t_weights[:, np.newaxis, np.newaxis] * t_weights[np.newaxis, :, np.newaxis]) / QUAD_PHASE_POINTS
+
+    rates = np.zeros(len(w_power))
+    for i in range(len(w_power)):
+        beta_abs = np.abs(beta[i])
+        z_perp_abs = np.sqrt(z_perp_power[i])
+        X = w_power[i] * t1
+        Y = beta_abs**2 * t1 + z_perp_power[i] * t2 + 2 * beta_abs * z_perp_abs * np.sqrt(t1 * t2) * np.cos(phi)
+        rates[i] = np.sum(weights * np.log2(1 + X / np.maximum(Y + sigma_n_sq_val, 1e-9)))
+    return rates
+
+def analytic_eve_rate_batch(w, z, sigma_n_sq_val):
+    """
+    Exact Eve's rate E_g[log2(1 + |g^H w|^2 / (|g^H z|^2 + sigma_n^2))] for each row of w and z (both (M, N)).
+    Orthogonal rows use the closed form; rows where z has a component along w fall back to quadrature.
+    Returns an (M,) array of Eve rates.
+    """
+    w_power = np.sum(np.abs(w)**2, axis=1)
+    z_power = np.sum(np.abs(z)**2, axis=1)
+    w_unit = w / np.sqrt(np.where(w_power > 0, w_power, 1.0))[:, np.newaxis]
+    beta = np.sum(w_unit.conj() * z, axis=1) # Component of z along w/|w|
+    orthogonal = np.abs(beta)**2 <= 1e-10 * np.maximum(z_power, 1e-300)
+
+    R_e = np.zeros(w.shape[0])
+    R_e[orthogonal] = analytic_eve_rate_from_powers(w_power[orthogonal], z_power[orthogonal], sigma_n_sq_val)
+    other = ~orthogonal
+    if np.any(other):
+        z_perp_power = np.maximum(z_power[other] - np.abs(beta[other])**2, 0.0)
+        R_e[other] = _quadrature_eve_rate(w_power[other], beta[other], z_perp_power, sigma_n_sq_val)
+    return R_e
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+from .utils import snr_to_total_power
+from .crn import draw_channel_ensemble, secrecy_rates_crn
+from .channel_source import ChannelSource
+from .distribution import sort_samples
+
+# Bob draws per cached block. Block b of a cell is always drawn from the same seed, so a cell holding
+# k blocks extends to more draws by computing blocks k, k+1, ... only.
+CACHE_BLOCK_SIZE = 250
+DEFAULT_CACHE_BYTES = 512 * 2**20
+
+_code_version = None
+
+def code_version():
+    """Hash of the strategies package sources; results cached by other code are never reused."""
+    global _code_version
+    if _code_version is None:
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for filename in sorted(os.listdir(package_dir)):
+            if filename.endswith('.py'):
+                with open(os.path.join(package_dir, filename), 'rb') as f:
+                    digest.update(filename.encode() + b'\0' + f.read())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+class ResultCache:
+    """
+    Content-addressed store of per-cell secrecy-rate draws. A cell is one (strategy, N, alpha, sigma^2, SNR)
+    point for a given M_G, Eve rate mode, seed and code version, and is saved as <key>.npz holding its
+    per-draw R_s in draw order: the sufficient statistic for the mean, for P(R_s > R) at any R and for
+    percentiles. Loading a cell refreshes its modification time, and once the directory exceeds max_bytes
+    the least recently used cells are deleted.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def cell_key(self, strategy_name, N, alpha, sigma_n_sq, snr_db, M_g_sims, eve_rate_mode, seed):
+        """Hex digest identifying one cell."""
+        fields = {
+            'strategy': strategy_name,
+            'N': int(N),
+            'alpha': float(alpha),
+            'sigma_n_sq': float(sigma_n_sq),
+            'snr_db': float(snr_db),
+            'M_g_sims': int(M_g_sims),
+            'eve_rate_mode': eve_rate_mode,
+            'seed': int(seed),
+            'block_size': CACHE_BLOCK_SIZE,
+            'code_version': code_version(),
+        }
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def load(self, key):
+        """Cached per-draw R_s of a cell (empty if the cell is not cached)."""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                rs = data['rs']
+        except (OSError, KeyError, ValueError):
+            return np.zeros(0)
+        os.utime(path) # Most recently used
+        return rs
+
+    def store(self, key, rs):
+        """Saves the per-draw R_s of a cell, replacing what was cached. Call evict() after a batch of stores."""
+        path = self._path(key)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, rs=rs)
+        os.replace(tmp_path, path) # Readers never see a partial file
+
+    def evict(self):
+        """Deletes least recently used cells until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+def _block_rng(seed, N, M_g_ensemble, block):
+    """Channel source of one block; every cell with the same N and Eve draws shares the block's ensemble."""
+    return ChannelSource(np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(N, M_g_ensemble, block))))
+
+def run_cached_simulation(specs, snr_db_values, N, alpha, sigma_n_sq_val, M_h_sims, M_g_sims, R_thresh, cache,
+                          seed, eve_rate_mode='monte_carlo', progress_callback=None):
+    """
+    Runs the Monte Carlo through a ResultCache. Draws are made in blocks of CACHE_BLOCK_SIZE, and each block is
+    one ensemble shared by all specs and SNR points that still need it; only blocks missing from the cache are
+    computed, so a larger M_h_sims than cached extends the cells instead of starting over. A seed is required,
+    since an unseeded run cannot be reproduced. progress_callback(done, total) is called after each new block.
+    Returns {name: {'secrecy_rates', 'outage_probs', 'rs_samples', 'computed_draws'}} over snr_db_values,
+    where 'computed_draws' counts the draws that were not served from the cache.
+    """
+    if seed is None:
+        raise ValueError("run_cached_simulation needs a seed: cached draws must be reproducible")
+    snr_db_values = np.atleast_1d(np.asarray(snr_db_values, dtype=float))
+    P_totals = snr_to_total_power(snr_db_values, sigma_n_sq_val)
+    M_g_ensemble = 0 if eve_rate_mode == 'analytic' else M_g_sims # Eve's draws are not needed analytically
+    blocks_needed = -(-M_h_sims // CACHE_BLOCK_SIZE)
+
+    keys = {}
+    cells = {}
+    for spec in specs:
+        for i, snr_db in enumerate(snr_db_values):
+            key = cache.cell_key(spec.name, N, alpha, sigma_n_sq_val, snr_db, M_g_ensemble, eve_rate_mode, seed)
+            keys[(spec.name, i)] = key
+            cells[(spec.name, i)] = [cache.load(key)]
+
+    computed = {spec.name: [0] * len(snr_db_values) for spec in specs}
+    first_missing = min(sum(chunk.size for chunk in rs) // CACHE_BLOCK_SIZE for rs in cells.values())
+    total_blocks = blocks_needed - min(first_missing, blocks_needed)
+    for done, block in enumerate(range(first_missing, blocks_needed), start=1):
+        missing = {spec.name: [i for i in range(len(snr_db_values))
+                               if sum(chunk.size for chunk in cells[(spec.name, i)]) // CACHE_BLOCK_SIZE == block]
+                   for spec in specs}
+        ensemble = draw_channel_ensemble(N, CACHE_BLOCK_SIZE, M_g_ensemble, _block_rng(seed, N, M_g_ensemble, block))
+        for spec in specs:
+            snr_idx = missing[spec.name]
+            if not snr_idx:
+                continue
+            rs, _ = secrecy_rates_crn(spec.powers, P_totals[snr_idx], alpha, sigma_n_sq_val, R_thresh, ensemble,
+                                      eve_rate_mode)
+            for row, i in enumerate(snr_idx):
+                cells[(spec.name, i)].append(rs[row])
+                computed[spec.name][i] += CACHE_BLOCK_SIZE
+        if progress_callback is not None:
+            progress_callback(done, total_blocks)
+
+    results = {}
+    for spec in specs:
+        values = {'secrecy_rates': [], 'outage_probs': [], 'rs_samples': [], 'computed_draws': computed[spec.name]}
+        for i in range(len(snr_db_values)):
+            rs = np.concatenate(cells[(spec.name, i)])
+            if computed[spec.name][i]:
+                cache.store(keys[(spec.name, i)], rs)
+            rs = rs[:M_h_sims]
+            values['secrecy_rates'].append(float(np.mean(rs)) if rs.size else 0.0)
+            values['outage_probs'].append(float(np.mean(rs > R_thresh)) if rs.size else 0.0)
+            values['rs_samples'].append(sort_samples(rs))
+        results[spec.name] = values
+    if total_blocks > 0:
+        cache.evict()
+    return results
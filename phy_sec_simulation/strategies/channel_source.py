@@ -0,0 +1,91 @@
+import numpy as np
+
+# Complex entries per bulk buffer (16 bytes each, 8 in complex64)
+DEFAULT_BUFFER_SIZE = 2**18
+# Precisions channels can be drawn in. complex64 halves the memory and bandwidth of channels, AN vectors and
+# Eve's gains; the sums over antennas and over Eve draws are still accumulated in float64.
+CHANNEL_DTYPES = ('complex128', 'complex64')
+
+def channel_dtype(dtype=None):
+    """np.dtype of a dtype= option, complex128 for None. Raises ValueError for dtypes not in CHANNEL_DTYPES."""
+    dtype = np.dtype(np.complex128 if dtype is None else dtype)
+    if dtype.name not in CHANNEL_DTYPES:
+        raise ValueError(f"Unknown channel dtype {dtype.name!r}, expected one of {CHANNEL_DTYPES}")
+    return dtype
+
+def _standard_complex_normal(rng, count, dtype):
+    """count CN(0, 2) samples of the given complex dtype, from real and imaginary parts drawn in its precision."""
+    return rng.standard_normal(2 * count, dtype=np.finfo(dtype).dtype).view(dtype)
+
+class ChannelSource:
+    """
+    Source of complex samples with independent standard normal real and imaginary parts (CN(0, 2)).
+    Large buffers are filled with a single rng.standard_normal call and handed out as views, so the
+    many small draws of a run share a few RNG calls. A refill allocates a new buffer, so views handed
+    out earlier stay valid. Requests larger than the buffer are drawn directly.
+    get_state/set_state capture the position in the stream without the buffer contents, which are
+    regenerated from the generator state recorded before the last refill.
+    dtype (complex128 or complex64) is the precision of the draws; complex64 draws come from float32
+    normals, so they are a different stream from complex128 draws of the same seed.
+    """
+
+    def __init__(self, rng=None, buffer_size=DEFAULT_BUFFER_SIZE, dtype=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.buffer_size = buffer_size
+        self.dtype = channel_dtype(dtype)
+        self._buffer = np.empty(0, dtype=self.dtype)
+        self._pos = 0
+        self._fill_state = None # Generator state before the current buffer was drawn
+
+    def complex_normal(self, shape, dtype=None):
+        """
+        Returns an array of the given shape with CN(0, 2) entries (read-only use: it may be a buffer view),
+        in the source's dtype unless another one is given (those draws bypass the buffer).
+        """
+        count = int(np.prod(shape))
+        dtype = self.dtype if dtype is None else channel_dtype(dtype)
+        if count > self.buffer_size or dtype != self.dtype:
+            return _standard_complex_normal(self.rng, count, dtype).reshape(shape)
+        if self._pos + count > self._buffer.size:
+            self._fill_state = self.rng.bit_generator.state
+            self._buffer = _standard_complex_normal(self.rng, self.buffer_size, self.dtype)
+            self._pos = 0
+        samples = self._buffer[self._pos:self._pos + count].reshape(shape)
+        self._pos += count
+        return samples
+
+    def get_state(self):
+        """Small picklable snapshot of the stream position; set_state continues the exact same stream."""
+        return {
+            'rng_state': self.rng.bit_generator.state,
+            'fill_state': self._fill_state,
+            'buffer_size': self.buffer_size,
+            'dtype': self.dtype.name,
+            'pos': self._pos,
+        }
+
+    def set_state(self, state):
+        """Restores a get_state snapshot (for a source over the same bit generator type)."""
+        self.buffer_size = state['buffer_size']
+        self.dtype = channel_dtype(state.get('dtype')) # Snapshots taken before dtype existed are complex128
+        self._fill_state = state['fill_state']
+        if self._fill_state is None:
+            self._buffer = np.empty(0, dtype=self.dtype)
+        else:
+            self.rng.bit_generator.state = self._fill_state
+            self._buffer = _standard_complex_normal(self.rng, self.buffer_size, self.dtype)
+        self._pos = state['pos']
+        self.rng.bit_generator.state = state['rng_state']
+
+def as_channel_source(rng=None):
+    """Wraps an np.random.Generator (or None, for fresh entropy) in a ChannelSource; passes a ChannelSource through."""
+    if isinstance(rng, ChannelSource):
+        return rng
+    return ChannelSource(rng, buffer_size=0)
+
+def complex_normal(shape, rng=None, dtype=None):
+    """
+    CN(0, 2) samples of the given shape drawn from a Generator or ChannelSource, in dtype (by default the
+    source's dtype, complex128 for a Generator).
+    """
+    return as_channel_source(rng).complex_normal(shape, dtype)
@@ -0,0 +1,60 @@
+import os
+import pickle
+import numpy as np
+
+from .cache import code_version
+
+# Seconds between checkpoint writes of the process-pool backend
+CHECKPOINT_INTERVAL = 30.0
+
+class SimulationCheckpoint:
+    """
+    Checkpoint directory of one run. meta.pkl holds the run's fingerprint (its parameters and the code
+    version) and seed; each save() writes one part_NNNNN.pkl with newly completed units of work (an SNR
+    point, or a pool task), keyed by the caller. Parts are written once, atomically, and never rewritten,
+    so a checkpoint only costs writing the new results. Without resume, an existing checkpoint is cleared.
+    With resume, the fingerprint must match and the seed of the checkpointed run is reused when seed is None.
+    """
+
+    def __init__(self, directory, fingerprint, seed=None, resume=False):
+        self.directory = directory
+        self.fingerprint = dict(fingerprint, code_version=code_version())
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, 'meta.pkl')
+
+        self.units = {}
+        if resume and os.path.exists(meta_path):
+            with open(meta_path, 'rb') as f:
+                meta = pickle.load(f)
+            if meta['fingerprint'] != self.fingerprint:
+                raise ValueError(f"Checkpoint in {directory} was written by a run with different parameters or code")
+            if seed is not None and seed != meta['seed']:
+                raise ValueError(f"Checkpoint in {directory} was written with seed {meta['seed']}, not {seed}")
+            self.seed = meta['seed']
+            for filename in self._part_files():
+                with open(os.path.join(directory, filename), 'rb') as f:
+                    self.units.update(pickle.load(f))
+        else:
+            for filename in self._part_files():
+                os.remove(os.path.join(directory, filename))
+            # An unseeded run still needs a fixed seed to be resumable
+            self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy)
+            self._write(meta_path, {'fingerprint': self.fingerprint, 'seed': self.seed})
+        self._next_part = len(self._part_files())
+
+    def _part_files(self):
+        return sorted(name for name in os.listdir(self.directory) if name.startswith('part_') and name.endswith('.pkl'))
+
+    def _write(self, path, payload):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path) # A crash mid-write never leaves a truncated file
+
+    def save(self, units):
+        """Persists a dict of newly completed units {key: payload}."""
+        if not units:
+            return
+        self._write(os.path.join(self.directory, f'part_{self._next_part:05d}.pkl'), units)
+        self._next_part += 1
+        self.units.update(units)
@@ -0,0 +1,135 @@
+import numpy as np
+from .utils import generate_channel_matrix, generate_an_vectors, EVE_CHUNK_ELEMENTS
+from .analytic_eve import check_eve_rate_mode, analytic_eve_rate_from_powers
+from .profiling import stage, staged
+
+# Common random numbers (CRN): every strategy uses w = sqrt(|w|^2) * h/|h| and z = sqrt(|z|^2) * gamma_v/|gamma_v|,
+# so one ensemble of unit-direction gains serves all strategies, and P_total only rescales |w|^2 and |z|^2.
+
+@staged('channel_generation')
+def draw_bob_channels(N, M_h_sims, rng=None, dtype=None):
+    """
+    Draws the Bob side of a channel ensemble, with channels in dtype (default: the rng's). Returns the
+    ensemble dict without Eve's gains and the (M_h, N, 2) unit directions h/|h| and gamma_v/|gamma_v|
+    along which Eve's gains are taken, in the channels' dtype. The norms are float64 in either precision.
+    """
+    h = generate_channel_matrix(M_h_sims, N, rng, dtype)
+    real = h.real.dtype
+    h_norm_sq = np.sum(np.abs(h)**2, axis=1, dtype=np.float64)
+    valid = h_norm_sq >= 1e-9
+    h_unit = h / np.sqrt(np.where(valid, h_norm_sq, 1.0)).astype(real, copy=False)[:, np.newaxis]
+
+    if N > 1:
+        gamma_v = generate_an_vectors(h, rng=rng)
+        gamma_norm_sq = np.sum(np.abs(gamma_v)**2, axis=1, dtype=np.float64)
+        gamma_unit = gamma_v / np.sqrt(np.maximum(gamma_norm_sq, 1e-18)).astype(real, copy=False)[:, np.newaxis]
+    else: # N=1, no artificial noise direction exists
+        gamma_norm_sq = np.zeros(M_h_sims)
+        gamma_unit = np.zeros_like(h_unit)
+
+    bob = {
+        'N': N,
+        'valid': valid,
+        'h_norm_sq': h_norm_sq,
+        'gamma_norm_sq': gamma_norm_sq,
+    }
+    return bob, np.stack((h_unit, gamma_unit), axis=-1)
+
+@staged('eve_rate')
+def draw_eve_gains(directions, M_g_sims, rng=None, chunk_elements=EVE_CHUNK_ELEMENTS):
+    """
+    Draws M_g_sims Eve channels per Bob draw and returns her gains |g^H h/|h||^2 and |g^H gamma_v/|gamma_v||^2
+    as (M_h, M_g) arrays. Eve channels are drawn in blocks of at most chunk_elements complex entries, in the
+    precision of directions; the gains are float32 for complex64 directions.
+    """
+    M_h_sims, N, _ = directions.shape
+    eve_w_gain = np.zeros((M_h_sims, M_g_sims), dtype=directions.real.dtype)
+    eve_z_gain = np.zeros((M_h_sims, M_g_sims), dtype=directions.real.dtype)
+    rows_per_chunk = max(1, chunk_elements // max(1, M_g_sims * N))
+    for start in range(0, M_h_sims, rows_per_chunk):
+        stop = min(start + rows_per_chunk, M_h_sims)
+        # g^H of a CN(0, 2I) draw is itself CN(0, 2I), so the draws are used as g^H directly
+        g_H = generate_channel_matrix((stop - start) * M_g_sims, N, rng, directions.dtype)
+        g_H = g_H.reshape(stop - start, M_g_sims, N)
+        gains = np.abs(g_H @ directions[start:stop])**2 # (B, M_g, 2)
+        eve_w_gain[start:stop] = gains[..., 0]
+        eve_z_gain[start:stop] = gains[..., 1]
+    return eve_w_gain, eve_z_gain
+
+def draw_channel_ensemble(N, M_h_sims, M_g_sims, rng=None, dtype=None):
+    """
+    Draws one channel ensemble shared by all strategies and SNR points, with channels in dtype (complex128,
+    or complex64 for half the memory of Eve's gains; default: the rng's).
+    Returns a dict with, per Bob draw, |h|^2 and |gamma_v|^2 (v ~ CN(0, I_{N-1})) as (M_h,) arrays,
+    and Eve's gains |g^H h/|h||^2 and |g^H gamma_v/|gamma_v||^2 as (M_h, M_g) arrays.
+    """
+    ensemble, directions = draw_bob_channels(N, M_h_sims, rng, dtype)
+    ensemble['eve_w_gain'], ensemble['eve_z_gain'] = draw_eve_gains(directions, M_g_sims, rng)
+    return ensemble
+
+@staged('bob_rate')
+def strategy_powers(powers_func, P_totals, alpha, ensemble):
+    """
+    |w|^2 and |z|^2 of a strategy for every total power in P_totals (paired with alpha if it is an array)
+    and every Bob draw of the ensemble, as (S, M_h) arrays.
+    """
+    h_norm_sq = np.where(ensemble['valid'], ensemble['h_norm_sq'], 1.0)
+    P_totals = np.atleast_1d(np.asarray(P_totals, dtype=float))[:, np.newaxis] # (S, 1)
+    if np.ndim(alpha) > 0:
+        alpha = np.asarray(alpha, dtype=float)[:, np.newaxis]
+    w_power, z_power = powers_func(P_totals, ensemble['N'], alpha, h_norm_sq, ensemble['gamma_norm_sq'])
+    w_power = np.broadcast_to(w_power, (P_totals.shape[0], h_norm_sq.shape[0]))
+    z_power = np.broadcast_to(z_power, w_power.shape)
+    return w_power, z_power
+
+@staged('eve_rate')
+def eve_rate_sum(w_power, z_power, eve_w_gain, eve_z_gain, sigma_n_sq_val, chunk_elements=EVE_CHUNK_ELEMENTS):
+    """
+    Sum over Eve draws of log2(1 + |g^H w|^2 / (|g^H z|^2 + sigma_n^2)), as an (S, M_h) array. Divided by the
+    number of Eve draws it is Eve's rate; sums over blocks of Eve draws add up to the sum over all of them.
+    Intermediates hold at most chunk_elements entries and are computed in the precision of Eve's gains;
+    the sum is float64.
+    """
+    M_h, M_g = eve_w_gain.shape
+    real = eve_w_gain.dtype
+    w_power, z_power = w_power.astype(real, copy=False), z_power.astype(real, copy=False)
+    sigma_n_sq_val = real.type(sigma_n_sq_val)
+    rate_sum = np.zeros(w_power.shape)
+    rows_per_chunk = max(1, chunk_elements // max(1, M_g * w_power.shape[0]))
+    for start in range(0, M_h, rows_per_chunk):
+        stop = min(start + rows_per_chunk, M_h)
+        signal_power_eve = w_power[:, start:stop, np.newaxis] * eve_w_gain[start:stop] # (S, B, M_g)
+        noise_power_eve = z_power[:, start:stop, np.newaxis] * eve_z_gain[start:stop] + sigma_n_sq_val
+        rates_eve = np.log2(1 + signal_power_eve / np.maximum(noise_power_eve, 1e-9))
+        rate_sum[:, start:stop] = np.sum(rates_eve, axis=2, dtype=np.float64)
+    return rate_sum
+
+@staged('bob_rate')
+def secrecy_rates_from_powers(ensemble, w_power, R_e, sigma_n_sq_val, R_thresh):
+    """Secrecy rates and outage events (S, M_h) from the strategy's |w|^2 and Eve's rate R_e."""
+    valid = ensemble['valid']
+    h_norm_sq = np.where(valid, ensemble['h_norm_sq'], 1.0)
+    # |h^H w|^2 = |w|^2 |h|^2 since w is aligned with h
+    R_b = np.log2(1 + w_power * h_norm_sq / sigma_n_sq_val)
+    active = valid & (w_power >= 1e-18) # Zero-w draws and degenerate channels give R_s = 0
+    R_s = np.where(active, np.maximum(0.0, R_b - R_e), 0.0)
+    events_rs_greater_R = (R_s > R_thresh).astype(int)
+    return R_s, events_rs_greater_R
+
+def secrecy_rates_crn(powers_func, P_totals, alpha, sigma_n_sq_val, R_thresh, ensemble, eve_rate_mode='monte_carlo'):
+    """
+    Evaluates a strategy, given by its powers function (StrategySpec.powers), on a shared channel ensemble for all
+    total powers in P_totals at once. Returns (S, M_h) arrays of secrecy rates and outage events.
+    alpha may be a scalar or an (S,) array paired element-wise with P_totals.
+    With eve_rate_mode='analytic' Eve's gains are not needed, so the ensemble may be drawn with M_g_sims=0.
+    """
+    check_eve_rate_mode(eve_rate_mode)
+    w_power, z_power = strategy_powers(powers_func, P_totals, alpha, ensemble)
+    M_g = ensemble['eve_w_gain'].shape[1]
+    R_e = np.zeros(w_power.shape)
+    if eve_rate_mode == 'analytic':
+        with stage('eve_rate'):
+            R_e = analytic_eve_rate_from_powers(w_power, z_power, sigma_n_sq_val)
+    elif M_g > 0:
+        R_e = eve_rate_sum(w_power, z_power, ensemble['eve_w_gain'], ensemble['eve_z_gain'], sigma_n_sq_val) / M_g
+    return secrecy_rates_from_powers(ensemble, w_power, R_e, sigma_n_sq_val, R_thresh)
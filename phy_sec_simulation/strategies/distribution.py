@@ -0,0 +1,35 @@
+import numpy as np
+
+# Per-draw secrecy rates are kept as one sorted array per (strategy, SNR) cell under results[name]['rs_samples'],
+# which is the exact empirical CDF of R_s: any threshold or percentile can be read off after the run.
+
+def sort_samples(rs):
+    """Flattened, sorted copy of per-draw secrecy rates, the form kept under 'rs_samples'."""
+    return np.sort(np.asarray(rs, dtype=float).ravel())
+
+def exceedance_probability(sorted_rs, thresholds):
+    """Empirical P(R_s > R) for each R in thresholds, from sorted per-draw secrecy rates."""
+    thresholds = np.asarray(thresholds, dtype=float)
+    if sorted_rs.size == 0:
+        return np.zeros(thresholds.shape)
+    return 1 - np.searchsorted(sorted_rs, thresholds, side='right') / sorted_rs.size
+
+def rate_percentiles(sorted_rs, percentiles):
+    """Percentiles (0-100) of the secrecy rate from sorted per-draw secrecy rates."""
+    percentiles = np.asarray(percentiles, dtype=float)
+    if sorted_rs.size == 0:
+        return np.zeros(percentiles.shape)
+    return np.percentile(sorted_rs, percentiles)
+
+def apply_threshold(results, R_thresh):
+    """
+    Recomputes 'outage_probs' as P(R_s > R_thresh) from the kept samples, for every strategy in a
+    run_simulation-style results dict. Entries without 'rs_samples' are returned unchanged.
+    """
+    updated = {}
+    for name, values in results.items():
+        if 'rs_samples' in values:
+            values = dict(values, outage_probs=[float(exceedance_probability(samples, R_thresh))
+                                                for samples in values['rs_samples']])
+        updated[name] = values
+    return updated
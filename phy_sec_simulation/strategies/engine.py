@@ -0,0 +1,68 @@
+import numpy as np
+from .utils import generate_channel_matrix, secrecy_rate_batch
+from .crn import draw_channel_ensemble, secrecy_rates_crn
+from .memory import evaluate_specs_bounded
+from .fused import check_backend, fused_secrecy_rate_batch
+from .multi_eve import multi_eve_secrecy_rate_batch
+
+def evaluate_strategy_batch(spec, P_total, N, alpha, sigma_n_sq_val, M_g_sims, R_thresh, M_h_sims=None, h=None,
+                            eve_rate_mode='monte_carlo', rng=None, dtype=None, backend='numpy'):
+    """
+    Runs the shared strategy pipeline for one spec over M_h_sims Bob channel draws, or over a pre-drawn
+    (M_H, N) stack h. Returns arrays of secrecy rates and outage events (1 if R_s > R_thresh, 0 otherwise).
+    dtype is the precision of the drawn channels (complex128 or complex64; default: the rng's); a given h
+    keeps its own. Vectors and Eve's draws follow the channels' precision, the rates are float64.
+    backend='numba' runs Monte Carlo Eve rates on the fused kernels of fused_secrecy_rate_batch, on the same
+    draws; without Numba, and for analytic Eve rates, the NumPy pipeline runs instead.
+    """
+    check_backend(backend)
+    if h is None:
+        h = generate_channel_matrix(M_h_sims, N, rng, dtype)
+    if backend == 'numba' and eve_rate_mode == 'monte_carlo':
+        result = fused_secrecy_rate_batch(spec, P_total, N, alpha, h, sigma_n_sq_val, M_g_sims, R_thresh, rng)
+        if result is not None:
+            return result
+    w, z, valid = spec.build_vectors(P_total, N, alpha, h, rng)
+    return secrecy_rate_batch(h, w, z, valid, sigma_n_sq_val, M_g_sims, R_thresh, eve_rate_mode, rng)
+
+def evaluate_strategy(spec, P_total, N, alpha, sigma_n_sq_val, M_g_sims, R_thresh, eve_rate_mode='monte_carlo',
+                      rng=None, dtype=None, backend='numpy'):
+    """Single Bob channel draw of evaluate_strategy_batch. Returns (R_s, event) as Python scalars."""
+    R_s, events = evaluate_strategy_batch(spec, P_total, N, alpha, sigma_n_sq_val, M_g_sims, R_thresh,
+                                          M_h_sims=1, eve_rate_mode=eve_rate_mode, rng=rng, dtype=dtype,
+                                          backend=backend)
+    return float(R_s[0]), int(events[0])
+
+def evaluate_strategy_multi_eve(spec, P_total, N, alpha, sigma_n_sq_val, M_g_sims, K, R_thresh, M_h_sims=None,
+                                h=None, rng=None, dtype=None):
+    """
+    evaluate_strategy_batch against K eavesdroppers: w and z are built once per Bob draw, and the K Eve
+    channels of each of the M_g_sims samples are evaluated against them in one contraction
+    (see multi_eve_rate_batch). Eve's rate is a Monte Carlo average.
+    Returns {'worst_case': (R_s, events), 'colluding': (R_s, events)} with (M_H,) arrays.
+    """
+    if h is None:
+        h = generate_channel_matrix(M_h_sims, N, rng, dtype)
+    w, z, valid = spec.build_vectors(P_total, N, alpha, h, rng)
+    return multi_eve_secrecy_rate_batch(h, w, z, valid, sigma_n_sq_val, M_g_sims, K, R_thresh, rng)
+
+def evaluate_specs(specs, P_totals, N, alpha, sigma_n_sq_val, M_h_sims, M_g_sims, R_thresh,
+                   eve_rate_mode='monte_carlo', rng=None, ensemble=None, max_bytes=None, dtype=None):
+    """
+    Fused engine: draws one channel ensemble (unless one is passed in) and evaluates every spec on
+    those same draws for all total powers in P_totals. Channel generation, AN construction and Eve's
+    gains are shared, so each extra spec only adds its power scaling and rate evaluation.
+    With max_bytes (and no ensemble passed in), the draws are processed in blocks that keep memory
+    within about max_bytes (see evaluate_specs_bounded). dtype is the precision of the drawn channels
+    (complex128 or complex64, see draw_channel_ensemble; default: the rng's).
+    Returns {spec.name: (R_s, events)} with (len(P_totals), M_h) arrays.
+    """
+    if ensemble is None and max_bytes is not None:
+        return evaluate_specs_bounded(specs, P_totals, N, alpha, sigma_n_sq_val, M_h_sims, M_g_sims, R_thresh,
+                                      eve_rate_mode, rng, max_bytes, dtype)
+    if ensemble is None:
+        M_g_ensemble = 0 if eve_rate_mode == 'analytic' else M_g_sims # Eve's draws are not needed analytically
+        ensemble = draw_channel_ensemble(N, M_h_sims, M_g_ensemble, rng, dtype)
+    return {spec.name: secrecy_rates_crn(spec.powers, P_totals, alpha, sigma_n_sq_val, R_thresh, ensemble,
+                                         eve_rate_mode)
+            for spec in specs}
@@ -0,0 +1,137 @@
+import importlib.util
+import math
+import numpy as np
+
+from .utils import EVE_CHUNK_ELEMENTS, generate_channel_matrix
+from .channel_source import complex_normal
+from .profiling import stage
+
+# Backends of evaluate_strategy_batch: 'numpy' runs the vectorized pipeline, 'numba' the fused kernels below
+# (Monte Carlo Eve rate only), falling back to 'numpy' where Numba is not installed
+BACKENDS = ('numpy', 'numba')
+# Scale of the AN draws u ~ CN(0, I) from the CN(0, 2) samples, as in generate_an_vectors
+AN_DRAW_SCALE = 1 / math.sqrt(2)
+
+def check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+
+def numba_available():
+    """True if Numba can be imported. Does not import it, so the compute-only import stays light."""
+    return importlib.util.find_spec('numba') is not None
+
+def _bob_pass(h, u, sqrt_lambda, sqrt_mu, w_norm_exp, z_scale_exp, z_normalized, sigma_n_sq_val,
+              R_b, active, w_scale, z_scale, coeff):
+    """
+    Per Bob draw i: Bob's rate and the scalars that define w and z without building them,
+    w = w_scale[i] h_i and z = z_scale[i] gamma_v with gamma_v = u_i / sqrt(2) - coeff[i] h_i (see build_vectors).
+    """
+    M, N = h.shape
+    for i in prange(M):
+        h_norm_sq = 0.0
+        for n in range(N):
+            h_norm_sq += h[i, n].real**2 + h[i, n].imag**2
+        valid = h_norm_sq >= 1e-9
+        h_norm = h_norm_sq if valid else 1.0
+        w_scale[i] = sqrt_lambda * h_norm**(w_norm_exp / 2)
+        R_b[i] = math.log2(1 + (w_scale[i] * h_norm_sq)**2 / sigma_n_sq_val) # h^H w = w_scale |h|^2
+        active[i] = valid and abs(w_scale[i]) * math.sqrt(h_norm_sq) >= 1e-9
+        coeff[i] = 0
+        z_scale[i] = 0.0
+        if N > 1 and valid:
+            h_u = 0j
+            for n in range(N):
+                h_u += h[i, n].conjugate() * u[i, n]
+            coeff[i] = h_u * AN_DRAW_SCALE / h_norm
+            gamma_norm_sq = 0.0
+            for n in range(N):
+                gamma = u[i, n] * AN_DRAW_SCALE - coeff[i] * h[i, n]
+                gamma_norm_sq += gamma.real**2 + gamma.imag**2
+            scale = sqrt_mu * h_norm**(z_scale_exp / 2)
+            if not z_normalized:
+                z_scale[i] = scale / math.sqrt(N - 1)
+            elif math.sqrt(gamma_norm_sq) > 1e-9:
+                z_scale[i] = scale / math.sqrt(gamma_norm_sq)
+
+def _eve_pass(h, u, g_H, rows, w_scale, z_scale, coeff, sigma_n_sq_val, R_b, R_s):
+    """
+    For the Bob draws rows[k], whose Eve channels are g_H[k] (M_g, N): Eve's rate averaged over the M_g draws
+    and R_s = max(0, R_b - R_e), in one pass over g_H with scalar temporaries only.
+    """
+    K, M_g, N = g_H.shape
+    for k in prange(K):
+        i = rows[k]
+        # Complex products spelled out on real and imaginary parts, which the compiler vectorizes
+        c_re, c_im = coeff[i].real, coeff[i].imag
+        rate_sum = 0.0
+        for j in range(M_g):
+            gh_re = gh_im = gu_re = gu_im = 0.0
+            for n in range(N):
+                g_re, g_im = g_H[k, j, n].real, g_H[k, j, n].imag
+                h_re, h_im = h[i, n].real, h[i, n].imag
+                u_re, u_im = u[i, n].real, u[i, n].imag
+                gh_re += g_re * h_re - g_im * h_im
+                gh_im += g_re * h_im + g_im * h_re
+                gu_re += g_re * u_re - g_im * u_im
+                gu_im += g_re * u_im + g_im * u_re
+            gz_re = z_scale[i] * (gu_re * AN_DRAW_SCALE - (c_re * gh_re - c_im * gh_im))
+            gz_im = z_scale[i] * (gu_im * AN_DRAW_SCALE - (c_re * gh_im + c_im * gh_re))
+            signal_power_eve = w_scale[i]**2 * (gh_re * gh_re + gh_im * gh_im)
+            noise_power_eve = gz_re * gz_re + gz_im * gz_im + sigma_n_sq_val
+            rate_sum += math.log2(1 + signal_power_eve / max(noise_power_eve, 1e-9))
+        R_s[i] = max(0.0, R_b[i] - rate_sum / M_g)
+
+prange = range # Replaced by numba.prange when the kernels are compiled
+_kernels = None
+
+def _compiled_kernels():
+    """(bob_pass, eve_pass) compiled with Numba on first use, or None without Numba."""
+    global _kernels, prange
+    if _kernels is None:
+        try:
+            import numba
+        except ImportError:
+            return None
+        prange = numba.prange
+        jit = numba.njit(parallel=True, cache=True)
+        # fastmath lets the Eve loop reorder its sums; the inputs are finite, so only rounding changes
+        _kernels = (jit(_bob_pass), numba.njit(parallel=True, fastmath=True, cache=True)(_eve_pass))
+    return _kernels
+
+def fused_secrecy_rate_batch(spec, P_total, N, alpha, h, sigma_n_sq_val, M_g_sims, R_thresh, rng=None):
+    """
+    evaluate_strategy_batch for a pre-drawn stack h (M, N) with Monte Carlo Eve rates on the Numba kernels:
+    w and z are never built, and Bob's rate, Eve's log2 average over her draws and R_s are computed per Bob
+    draw in parallel loops. Draws are taken from rng in the same order and shapes as the NumPy pipeline
+    (AN draws, then Eve's channels of the active draws in EVE_CHUNK_ELEMENTS blocks), so both backends
+    see the same channels and agree to rounding. Returns None when Numba is not installed.
+    """
+    kernels = _compiled_kernels()
+    if kernels is None:
+        return None
+    bob_pass, eve_pass = kernels
+    M = h.shape[0]
+    lambda_val, mu_val = spec.power_allocation(P_total, N, alpha)
+    with stage('an_construction'):
+        u = complex_normal((M, N), rng, h.dtype) if N > 1 else np.zeros((M, N), dtype=h.dtype)
+
+    R_b, w_scale, z_scale = np.empty(M), np.empty(M), np.empty(M)
+    active, coeff = np.empty(M, dtype=bool), np.empty(M, dtype=np.complex128)
+    with stage('bob_rate'):
+        bob_pass(h, u, math.sqrt(lambda_val), math.sqrt(mu_val), float(spec.w_norm_exp), float(spec.z_scale_exp),
+                 spec.z_normalized, float(sigma_n_sq_val), R_b, active, w_scale, z_scale, coeff)
+
+    R_s = np.zeros(M)
+    rows = np.flatnonzero(active)
+    if M_g_sims <= 0:
+        R_s[rows] = np.maximum(0.0, R_b[rows])
+    else:
+        rows_per_chunk = max(1, EVE_CHUNK_ELEMENTS // (M_g_sims * N))
+        for start in range(0, len(rows), rows_per_chunk):
+            chunk = rows[start:start + rows_per_chunk]
+            g_H = generate_channel_matrix(len(chunk) * M_g_sims, N, rng, h.dtype).reshape(len(chunk), M_g_sims, N)
+            with stage('eve_rate'):
+                eve_pass(h, u, g_H, chunk, w_scale, z_scale, coeff, float(sigma_n_sq_val), R_b, R_s)
+
+    events_rs_greater_R = (R_s > R_thresh).astype(int)
+    return R_s, events_rs_greater_R
@@ -0,0 +1,90 @@
+import numpy as np
+from .crn import draw_channel_ensemble, secrecy_rates_crn
+
+# Importance sampling of Bob's channel. h ~ CN(0, 2I) is drawn instead from CN(0, 2t I), t >= 1, which
+# only scales |h|^2 by t: the direction of h, the AN direction and Eve's gains do not depend on |h|.
+# The likelihood ratio of a draw is p(h)/q(h) = t^N exp(-|h|^2 (1 - 1/t) / 2).
+
+def likelihood_ratio(h_norm_sq, tilt, N):
+    """Weight p(h)/q(h) of draws with |h|^2 = h_norm_sq from the channel tilted by tilt."""
+    return np.exp(N * np.log(tilt) - h_norm_sq * (1 - 1 / tilt) / 2)
+
+def bob_rate_threshold(spec, P_total, N, alpha, sigma_n_sq_val, R_thresh, lo=1e-12, hi=1e12, iterations=200):
+    """
+    Smallest |h|^2 at which Bob's rate reaches R_thresh, found by bisection on log |h|^2 (Bob's rate
+    grows with |h|^2 for every registered spec). Since R_s <= R_b, R_s > R_thresh needs at least this
+    channel gain. Returns 0.0 if R_b >= R_thresh for any channel and None if it never gets there.
+    """
+    def bob_rate(h_norm_sq):
+        w_power, _ = spec.powers(P_total, N, alpha, h_norm_sq, 1.0)
+        return np.log2(1 + w_power * h_norm_sq / sigma_n_sq_val)
+
+    if bob_rate(lo) >= R_thresh:
+        return 0.0
+    if bob_rate(hi) <= R_thresh:
+        return None
+    for _ in range(iterations):
+        mid = np.sqrt(lo * hi)
+        if bob_rate(mid) > R_thresh:
+            hi = mid
+        else:
+            lo = mid
+        if hi / lo < 1 + 1e-9:
+            break
+    return hi
+
+def choose_tilt(spec, P_total, N, alpha, sigma_n_sq_val, R_thresh):
+    """
+    Variance scale t of the tilted channel: moves the mean of |h|^2 (2N under the nominal channel) to the
+    gain at which R_b reaches R_thresh, the usual mean-shift choice for a gamma tail. Returns 1.0 when the
+    event is not rare in |h|^2 and None when R_s > R_thresh is impossible.
+    """
+    threshold = bob_rate_threshold(spec, P_total, N, alpha, sigma_n_sq_val, R_thresh)
+    if threshold is None:
+        return None
+    return max(1.0, threshold / (2 * N))
+
+def run_importance_sampling(specs, P_totals, N, alpha, sigma_n_sq_val, M_h_sims, M_g_sims, R_thresh,
+                            eve_rate_mode='monte_carlo', rng=None, tilt=None):
+    """
+    Importance-sampling estimate of P(Rs > R_thresh) for every spec and power. One ensemble is drawn and
+    its |h|^2 rescaled by each cell's tilt (choose_tilt unless tilt is given), so all cells share the
+    channel directions and Eve's gains. Each estimate is the likelihood-weighted mean over M_h_sims draws.
+    'outage_prob_rel_error' is the estimate's standard error divided by the estimate (nan when no draw hits
+    the event). Cells where the event is impossible report exactly 0.
+    The mean secrecy rate is the plain average over the untilted draws.
+    Returns {spec.name: {'secrecy_rates', 'outage_probs', 'outage_prob_rel_error', 'tilts'}}.
+    """
+    P_totals = np.atleast_1d(np.asarray(P_totals, dtype=float))
+    M_g_ensemble = 0 if eve_rate_mode == 'analytic' else M_g_sims # Eve's draws are not needed analytically
+    ensemble = draw_channel_ensemble(N, M_h_sims, M_g_ensemble, rng)
+
+    results = {}
+    for spec in specs:
+        # The mean secrecy rate is not a rare-event quantity, so it comes from the untilted draws
+        rs, _ = secrecy_rates_crn(spec.powers, P_totals, alpha, sigma_n_sq_val, R_thresh, ensemble, eve_rate_mode)
+        values = {
+            'secrecy_rates': list(np.mean(rs, axis=1)) if rs.size else [0.0] * len(P_totals),
+            'outage_probs': [],
+            'outage_prob_rel_error': [],
+            'tilts': [],
+        }
+        for P_total in P_totals:
+            cell_tilt = tilt if tilt is not None else choose_tilt(spec, P_total, N, alpha, sigma_n_sq_val, R_thresh)
+            if cell_tilt is None: # R_b never reaches R_thresh
+                values['outage_probs'].append(0.0)
+                values['outage_prob_rel_error'].append(0.0)
+                values['tilts'].append(1.0)
+                continue
+
+            tilted = dict(ensemble, h_norm_sq=ensemble['h_norm_sq'] * cell_tilt)
+            _, events = secrecy_rates_crn(spec.powers, [P_total], alpha, sigma_n_sq_val, R_thresh, tilted,
+                                          eve_rate_mode)
+            weighted_events = likelihood_ratio(tilted['h_norm_sq'], cell_tilt, N) * events[0]
+            prob = float(np.mean(weighted_events)) if M_h_sims else 0.0
+            std_error = float(np.std(weighted_events, ddof=1) / np.sqrt(M_h_sims)) if M_h_sims > 1 else np.inf
+            values['outage_probs'].append(prob)
+            values['outage_prob_rel_error'].append(std_error / prob if prob > 0 else np.nan)
+            values['tilts'].append(float(cell_tilt))
+        results[spec.name] = values
+    return results
@@ -0,0 +1,110 @@
+import sys
+import numpy as np
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+from .utils import EVE_CHUNK_ELEMENTS
+from .channel_source import channel_dtype
+from .analytic_eve import check_eve_rate_mode, analytic_eve_rate_from_powers
+from .profiling import stage
+from .crn import draw_bob_channels, draw_eve_gains, strategy_powers, eve_rate_sum, secrecy_rates_from_powers
+
+# Bytes kept per (Bob draw, Eve draw) pair of a block: Eve's two float64 gains (halved for complex64 channels)
+PAIR_BYTES = 16
+# Bytes per entry of the transient blocks (Eve channels, rate intermediates) bounded by chunk_elements
+TRANSIENT_BYTES = 64
+# Bob blocks are a multiple of this many rows and Eve blocks of EVE_BLOCK_ALIGN draws when they are split,
+# which keeps the batched g^H @ [h, gamma_v] products and the rate reductions on contiguous, even shapes
+BOB_BLOCK_ALIGN = 8
+EVE_BLOCK_ALIGN = 256
+# Smallest transient block; budgets too small for it are exceeded rather than degenerating to per-element loops
+MIN_CHUNK_ELEMENTS = 2**12
+
+def _align_down(value, multiple):
+    """Largest multiple of multiple that is <= value, or value itself when it is smaller than multiple."""
+    return value if value < multiple else value - value % multiple
+
+def plan_chunks(N, M_h_sims, M_g_sims, n_rates, max_bytes, dtype=None):
+    """
+    Block sizes that keep one evaluate_specs_bounded call within about max_bytes. n_rates is the number of
+    secrecy-rate rows kept per Bob draw (specs x powers). A quarter of the budget (at most the usual
+    EVE_CHUNK_ELEMENTS) goes to transient blocks; the rest holds the Bob block's Eve gains, which use all
+    M_g Eve draws per Bob draw when one row fits and Eve blocks of a single Bob draw otherwise.
+    dtype is the channels' precision: complex64 channels and gains take half the bytes.
+    Returns (Bob rows per block, Eve draws per block, transient chunk elements).
+    """
+    complex_bytes = channel_dtype(dtype).itemsize
+    pair_bytes = PAIR_BYTES * complex_bytes // 16
+    output_bytes = 2 * 8 * n_rates * M_h_sims # R_s and events of the whole run
+    budget = max(0, int(max_bytes) - output_bytes)
+    chunk_elements = max(MIN_CHUNK_ELEMENTS, min(EVE_CHUNK_ELEMENTS, budget // 4 // TRANSIENT_BYTES))
+    gain_budget = max(0, budget - chunk_elements * TRANSIENT_BYTES)
+    row_bytes = 4 * complex_bytes * N + 8 * n_rates # h, gamma_v and their unit directions, the powers of each rate row
+    if M_g_sims == 0:
+        rows = max(BOB_BLOCK_ALIGN, chunk_elements // N, gain_budget // row_bytes)
+        return min(M_h_sims, _align_down(rows, BOB_BLOCK_ALIGN)), 0, chunk_elements
+    pairs = max(EVE_BLOCK_ALIGN, gain_budget // pair_bytes)
+    if pairs >= M_g_sims:
+        rows = max(1, min(M_h_sims, gain_budget // (M_g_sims * pair_bytes + row_bytes)))
+        return _align_down(rows, BOB_BLOCK_ALIGN), M_g_sims, chunk_elements
+    return 1, _align_down(pairs, EVE_BLOCK_ALIGN), chunk_elements
+
+def evaluate_specs_bounded(specs, P_totals, N, alpha, sigma_n_sq_val, M_h_sims, M_g_sims, R_thresh,
+                           eve_rate_mode='monte_carlo', rng=None, max_bytes=2e9, dtype=None):
+    """
+    evaluate_specs within a memory budget of about max_bytes. Bob draws are processed in blocks and, within
+    a block, Eve draws in blocks sized by plan_chunks; each spec's log2 sums over Eve blocks are accumulated
+    and divided by M_g_sims once all blocks are done, so Eve's rate is the same average as in one piece.
+    Draws are taken from rng block by block, so results match evaluate_specs statistically, not draw for draw.
+    dtype is the channels' precision (default: the rng's); blocks are planned for its size.
+    Returns {spec.name: (R_s, events)} with (len(P_totals), M_h) arrays.
+    """
+    check_eve_rate_mode(eve_rate_mode)
+    M_g_sims = 0 if eve_rate_mode == 'analytic' else M_g_sims # Eve's draws are not needed analytically
+    n_powers = np.atleast_1d(P_totals).shape[0]
+    if dtype is None:
+        dtype = getattr(rng, 'dtype', None) # A ChannelSource's precision
+    rows, cols, chunk_elements = plan_chunks(N, M_h_sims, M_g_sims, len(specs) * n_powers, max_bytes, dtype)
+
+    blocks = {spec.name: ([], []) for spec in specs}
+    for start in range(0, M_h_sims, rows):
+        bob, directions = draw_bob_channels(N, min(rows, M_h_sims - start), rng, dtype)
+        powers = {spec.name: strategy_powers(spec.powers, P_totals, alpha, bob) for spec in specs}
+        rate_sums = {spec.name: np.zeros(powers[spec.name][0].shape) for spec in specs}
+        for eve_start in range(0, M_g_sims, max(1, cols)):
+            eve_w_gain, eve_z_gain = draw_eve_gains(directions, min(cols, M_g_sims - eve_start), rng, chunk_elements)
+            for spec in specs:
+                w_power, z_power = powers[spec.name]
+                rate_sums[spec.name] += eve_rate_sum(w_power, z_power, eve_w_gain, eve_z_gain, sigma_n_sq_val,
+                                                     chunk_elements)
+            del eve_w_gain, eve_z_gain
+        for spec in specs:
+            w_power, z_power = powers[spec.name]
+            if eve_rate_mode == 'analytic':
+                with stage('eve_rate'):
+                    R_e = analytic_eve_rate_from_powers(w_power, z_power, sigma_n_sq_val)
+            elif M_g_sims > 0:
+                R_e = rate_sums[spec.name] / M_g_sims
+            else:
+                R_e = np.zeros(w_power.shape)
+            R_s, events = secrecy_rates_from_powers(bob, w_power, R_e, sigma_n_sq_val, R_thresh)
+            blocks[spec.name][0].append(R_s)
+            blocks[spec.name][1].append(events)
+
+    shape = (n_powers, 0)
+    with stage('aggregation'):
+        return {name: (np.concatenate(rs, axis=1) if rs else np.zeros(shape),
+                       np.concatenate(events, axis=1) if events else np.zeros(shape, dtype=int))
+                for name, (rs, events) in blocks.items()}
+
+def peak_rss_bytes(children=False):
+    """
+    Peak resident set size so far, in bytes: of this process, or with children=True of its largest
+    finished child process (e.g. pool workers). None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024 # ru_maxrss is in bytes on macOS, KiB on Linux
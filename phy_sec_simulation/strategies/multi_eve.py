@@ -0,0 +1,65 @@
+import numpy as np
+from .utils import EVE_CHUNK_ELEMENTS, generate_channel_matrix
+from .profiling import stage, staged
+
+# Threat models of K eavesdroppers: the strongest of K non-colluding Eves, and K Eves combining their
+# observations with maximum ratio combining (MRC)
+EVE_MODELS = ('worst_case', 'colluding')
+
+@staged('eve_rate')
+def multi_eve_rate_batch(w, z, sigma_n_sq_val, M_g_sims, K, rng=None):
+    """
+    Eve's rate against K eavesdroppers for each row of w and z (both (M, N)). Per row, M_g_sims samples of
+    the K Eve channels are drawn as one (M_g, K, N) stack and contracted with [w, z] in a single product,
+    giving a = G^H w and b = G^H z (K entries each) per sample, from which both models are evaluated:
+        worst_case - log2(1 + max_k |a_k|^2 / (|b_k|^2 + sigma_n^2)), the strongest Eve of the sample
+        colluding  - log2(1 + |a|^4 / (|a^H b|^2 + sigma_n^2 |a|^2)), the K observations combined with
+                     MRC weights a, so that the AN reaching the Eves adds up coherently along a
+    each averaged over the M_g_sims samples. Rows are processed in blocks of at most EVE_CHUNK_ELEMENTS, and
+    the draws match those of average_eve_rate_batch with M_g_sims * K Eve draws, so K=1 reproduces it.
+    Returns {model: R_e} for the models of EVE_MODELS, (M,) float64 arrays.
+    """
+    M, N = w.shape
+    rates = {model: np.zeros(M) for model in EVE_MODELS}
+    if M_g_sims <= 0 or K <= 0 or M == 0:
+        return rates
+    wz = np.stack((w, z), axis=-1) # (M, N, 2)
+    sigma_n_sq_val = wz.real.dtype.type(sigma_n_sq_val)
+    rows_per_chunk = max(1, EVE_CHUNK_ELEMENTS // (M_g_sims * K * N))
+    for start in range(0, M, rows_per_chunk):
+        stop = min(start + rows_per_chunk, M)
+        g_H = generate_channel_matrix((stop - start) * M_g_sims * K, N, rng, wz.dtype)
+        g_H = g_H.reshape(stop - start, M_g_sims * K, N)
+        projections = (g_H @ wz[start:stop]).reshape(stop - start, M_g_sims, K, 2) # a and b per sample
+        signal, interference = projections[..., 0], projections[..., 1]
+        signal_power = np.abs(signal)**2 # (B, M_g, K)
+
+        sinr = signal_power / np.maximum(np.abs(interference)**2 + sigma_n_sq_val, 1e-9)
+        rates_eve = np.log2(1 + np.max(sinr, axis=2))
+        rates['worst_case'][start:stop] = np.sum(rates_eve, axis=1, dtype=np.float64) / M_g_sims
+
+        # |a|^2 / (|a^H b|^2 / |a|^2 + sigma_n^2) is the MRC SINR, and 0 where a vanishes
+        signal_norm_sq = np.sum(signal_power, axis=2, dtype=np.float64)
+        cross = np.abs(np.sum(signal.conj() * interference, axis=2, dtype=np.complex128))**2
+        sinr = signal_norm_sq / np.maximum(cross / np.maximum(signal_norm_sq, 1e-300) + sigma_n_sq_val, 1e-9)
+        rates['colluding'][start:stop] = np.sum(np.log2(1 + sinr), axis=1) / M_g_sims
+    return rates
+
+def multi_eve_secrecy_rate_batch(h, w, z, valid, sigma_n_sq_val, M_g_sims, K, R_thresh, rng=None):
+    """
+    secrecy_rate_batch against K eavesdroppers (see multi_eve_rate_batch). Rows that are not valid or whose w
+    is effectively zero get R_s = 0. Returns {model: (R_s, events)} for the models of EVE_MODELS.
+    """
+    with stage('bob_rate'):
+        signal_power_bob = np.abs(np.sum(h.conj() * w, axis=1, dtype=np.complex128))**2
+        R_b = np.log2(1 + signal_power_bob / sigma_n_sq_val)
+
+    active = valid & (np.linalg.norm(w, axis=1) >= 1e-9)
+    rates_eve = multi_eve_rate_batch(w[active], z[active], sigma_n_sq_val, M_g_sims, K, rng) if np.any(active) else None
+    results = {}
+    for model in EVE_MODELS:
+        R_s = np.zeros(h.shape[0])
+        if rates_eve is not None:
+            R_s[active] = np.maximum(0.0, R_b[active] - rates_eve[model])
+        results[model] = (R_s, (R_s > R_thresh).astype(int))
+    return results
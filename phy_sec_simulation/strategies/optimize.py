@@ -0,0 +1,80 @@
+import numpy as np
+from .utils import snr_to_total_power
+from .crn import draw_channel_ensemble, secrecy_rates_crn
+
+# Quantities optimize_alpha can maximize: the mean secrecy rate, or P(R_s > R_thresh)
+ALPHA_METRICS = ('secrecy_rate', 'outage_prob')
+# 1/phi, the fraction of the bracket kept by each golden-section step
+GOLDEN_FRACTION = (np.sqrt(5) - 1) / 2
+
+def _alpha_metrics(spec, P_totals, alphas, sigma_n_sq_val, R_thresh, ensemble, eve_rate_mode):
+    """Mean secrecy rate and P(R_s > R_thresh) at paired (P_totals[i], alphas[i]) on the ensemble, as a (2, S) array."""
+    rs, events = secrecy_rates_crn(spec.powers, P_totals, alphas, sigma_n_sq_val, R_thresh, ensemble, eve_rate_mode)
+    if rs.size == 0:
+        return np.zeros((2, len(P_totals)))
+    return np.stack((np.mean(rs, axis=1), np.mean(events, axis=1)))
+
+def optimize_alpha(specs, snr_db_values, N, sigma_n_sq_val, M_h_sims, M_g_sims, R_thresh, metric='secrecy_rate',
+                   grid_size=11, tolerance=1e-2, eve_rate_mode='monte_carlo', rng=None, ensemble=None, dtype=None):
+    """
+    Finds, for every spec and SNR, the alpha in [0, 1] that maximizes metric ('secrecy_rate' or 'outage_prob',
+    i.e. P(R_s > R_thresh)). One channel ensemble (drawn unless passed in) serves every candidate alpha: alpha
+    only changes lambda and mu, so each candidate is a rescaling of the same draws and the objective is a
+    deterministic function of alpha. A coarse grid of grid_size alphas is evaluated for all SNR points in one
+    broadcast call per spec; golden-section search then refines every SNR point at once inside the bracket
+    around its best grid point, until the bracket is narrower than tolerance. The best alpha evaluated is
+    returned, so the result is never worse than the grid (P(R_s > R) is piecewise constant in alpha on a
+    finite ensemble). Each spec costs about grid_size + log(2 / ((grid_size - 1) tolerance)) / log(phi)
+    evaluations of the ensemble at all SNR points.
+    dtype is the precision of the drawn ensemble (see draw_channel_ensemble).
+    Returns {spec.name: {'optimal_alphas', 'secrecy_rates', 'outage_probs'}} over snr_db_values, with both
+    metrics evaluated at the optimal alpha.
+    """
+    if metric not in ALPHA_METRICS:
+        raise ValueError(f"metric must be one of {ALPHA_METRICS}, got {metric!r}")
+    snr_db_values = np.atleast_1d(np.asarray(snr_db_values, dtype=float))
+    P_totals = snr_to_total_power(snr_db_values, sigma_n_sq_val)
+    if ensemble is None:
+        M_g_ensemble = 0 if eve_rate_mode == 'analytic' else M_g_sims # Eve's draws are not needed analytically
+        ensemble = draw_channel_ensemble(N, M_h_sims, M_g_ensemble, rng, dtype)
+    metric_idx = ALPHA_METRICS.index(metric)
+    S = len(P_totals)
+    columns = np.arange(S)
+    grid = np.linspace(0.0, 1.0, grid_size)
+
+    results = {}
+    for spec in specs:
+        def evaluate(P, alphas):
+            return _alpha_metrics(spec, P, alphas, sigma_n_sq_val, R_thresh, ensemble, eve_rate_mode)
+
+        # Coarse grid: all (alpha, SNR) pairs in one call
+        grid_values = evaluate(np.tile(P_totals, grid_size), np.repeat(grid, S)).reshape(2, grid_size, S)
+        best = np.argmax(grid_values[metric_idx], axis=0)
+        best_alpha, best_values = grid[best], grid_values[:, best, columns]
+
+        # Golden-section search on [grid[k-1], grid[k+1]], all SNR points stepping together
+        lo = grid[np.maximum(best - 1, 0)]
+        hi = grid[np.minimum(best + 1, grid_size - 1)]
+        left = hi - GOLDEN_FRACTION * (hi - lo)
+        right = lo + GOLDEN_FRACTION * (hi - lo)
+        pair_values = evaluate(np.concatenate((P_totals, P_totals)), np.concatenate((left, right)))
+        left_values, right_values = pair_values[:, :S], pair_values[:, S:]
+        while np.max(hi - lo) > tolerance:
+            keep_left = left_values[metric_idx] >= right_values[metric_idx] # The maximum lies in [lo, right]
+            hi = np.where(keep_left, right, hi)
+            lo = np.where(keep_left, lo, left)
+            new_alpha = np.where(keep_left, hi - GOLDEN_FRACTION * (hi - lo), lo + GOLDEN_FRACTION * (hi - lo))
+            new_values = evaluate(P_totals, new_alpha)
+            left, right = np.where(keep_left, new_alpha, right), np.where(keep_left, left, new_alpha)
+            left_values, right_values = (np.where(keep_left, new_values, right_values),
+                                         np.where(keep_left, left_values, new_values))
+
+        for alphas, values in ((left, left_values), (right, right_values)):
+            better = values[metric_idx] > best_values[metric_idx]
+            best_alpha, best_values = np.where(better, alphas, best_alpha), np.where(better, values, best_values)
+        results[spec.name] = {
+            'optimal_alphas': best_alpha.tolist(),
+            'secrecy_rates': best_values[0].tolist(),
+            'outage_probs': best_values[1].tolist(),
+        }
+    return results
@@ -0,0 +1,210 @@
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+
+from .utils import snr_to_total_power
+from .spec import STRATEGY_REGISTRY
+from .engine import evaluate_specs
+from .channel_source import ChannelSource, channel_dtype
+from .distribution import sort_samples
+from .checkpoint import CHECKPOINT_INTERVAL
+from .profiling import stage, profiling, profiling_enabled, merge_stats
+
+# Bob draws per task. Fixed (not derived from the worker count) so that the task split, and therefore
+# the result for a given seed, does not depend on how many workers run it.
+DEFAULT_CHUNK_SIZE = 250
+
+def _chunk_sizes(M_h_sims, chunk_size):
+    """Splits M_h_sims draws into chunks of at most chunk_size."""
+    return [min(chunk_size, M_h_sims - start) for start in range(0, M_h_sims, chunk_size)]
+
+def _run_task(task):
+    """
+    Evaluates one shard in a worker. Returns (task index, partial, stats): the per-(strategy, SNR) partial
+    sums (with keep_samples, also the shard's per-draw secrecy rates) and the shard's StageProfile.stats(),
+    or None when the caller is not profiling.
+    Draws come from a Generator seeded with the task's SeedSequence child, so a shard draws the
+    same channels whichever process runs it.
+    """
+    if not task['params']['profile']:
+        return task['index'], _evaluate_task(task), None
+    with profiling() as profile:
+        partial = _evaluate_task(task)
+    return task['index'], partial, profile.stats()
+
+def _evaluate_task(task):
+    """Per-(strategy, SNR) partial sums of one shard (see _run_task)."""
+    params = task['params']
+    rng = ChannelSource(np.random.default_rng(task['seed_seq']), dtype=params['dtype'])
+    partial = {}
+    # Strategies are looked up by name in the registry, so tasks stay small and picklable.
+    if task['crn']:
+        specs = [STRATEGY_REGISTRY[name] for name in params['strategy_names']]
+        snr_indices = list(range(len(params['snr_db_range'])))
+    else:
+        specs = [STRATEGY_REGISTRY[task['strategy']]]
+        snr_indices = [task['snr_idx']]
+    P_totals = snr_to_total_power(np.asarray(params['snr_db_range'], dtype=float)[snr_indices], params['sigma_n_sq'])
+    evaluated = evaluate_specs(specs, P_totals, params['N'], params['alpha'], params['sigma_n_sq'], task['M_h_sims'],
+                               params['M_g_sims'], params['R_thresh'], params['eve_rate_mode'], rng,
+                               max_bytes=params['max_bytes'])
+    with stage('aggregation'):
+        for name, (rs, events) in evaluated.items():
+            for row, snr_idx in enumerate(snr_indices):
+                samples = rs[row].copy() if params['keep_samples'] else None
+                partial[(name, snr_idx)] = (float(np.sum(rs[row])), int(np.sum(events[row])), rs.shape[1], samples)
+    return partial
+
+def _merge_cell(partials, key):
+    """
+    Merges the partial sums of one (strategy, SNR) cell in task order, so floating-point sums do not depend
+    on completion order. Returns (mean secrecy rate, outage probability, per-draw secrecy rates or None).
+    """
+    rs_sum, events_sum, count, samples = 0.0, 0, 0, []
+    for partial in partials:
+        if partial is None or key not in partial:
+            continue
+        part_rs_sum, part_events_sum, part_count, rs = partial[key]
+        rs_sum += part_rs_sum
+        events_sum += part_events_sum
+        count += part_count
+        if rs is not None:
+            samples.append(rs)
+    return (rs_sum / count if count else 0.0, events_sum / count if count else 0.0,
+            np.concatenate(samples) if samples else None)
+
+def _make_params(strategy_names, snr_db_range, N, alpha, sigma_n_sq, M_g_sims, R_thresh, eve_rate_mode,
+                 keep_samples, max_bytes, dtype):
+    """Run parameters shared by every task of a run (see run_parallel_simulation)."""
+    return {
+        'strategy_names': list(strategy_names),
+        'snr_db_range': list(snr_db_range),
+        'N': N,
+        'alpha': alpha,
+        'sigma_n_sq': sigma_n_sq,
+        'M_g_sims': M_g_sims,
+        'R_thresh': R_thresh,
+        'eve_rate_mode': eve_rate_mode,
+        'keep_samples': keep_samples,
+        'max_bytes': max_bytes,
+        'dtype': channel_dtype(dtype).name,
+        'profile': profiling_enabled(), # Workers profile their tasks when the caller is profiling
+    }
+
+def _make_tasks(params, M_h_sims, chunk_size, crn, seed):
+    """
+    Shards of a run over SNR x strategy x draw chunk (draw chunks only with crn), each with its index and
+    its own child of np.random.SeedSequence(seed).
+    """
+    chunks = _chunk_sizes(M_h_sims, chunk_size)
+    if crn:
+        shards = [{'crn': True, 'M_h_sims': size} for size in chunks]
+    else:
+        shards = [{'crn': False, 'strategy': name, 'snr_idx': snr_idx, 'M_h_sims': size}
+                  for snr_idx in range(len(params['snr_db_range']))
+                  for name in params['strategy_names']
+                  for size in chunks]
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(shards))
+    return [dict(shard, index=i, seed_seq=seed_seqs[i], params=params) for i, shard in enumerate(shards)]
+
+def _merge_results(params, partials):
+    """Results dict of run_parallel_simulation from the task partials, listed in task order."""
+    results = {name: {'secrecy_rates': [], 'outage_probs': []} for name in params['strategy_names']}
+    with stage('aggregation'):
+        for name in params['strategy_names']:
+            for snr_idx in range(len(params['snr_db_range'])):
+                mean_rs, outage_prob, samples = _merge_cell(partials, (name, snr_idx))
+                results[name]['secrecy_rates'].append(mean_rs)
+                results[name]['outage_probs'].append(outage_prob)
+                if params['keep_samples']:
+                    results[name].setdefault('rs_samples', []).append(
+                        sort_samples(samples if samples is not None else np.zeros(0)))
+    return results
+
+def run_parallel_simulation(strategy_names, snr_db_range, N, alpha, sigma_n_sq, M_h_sims, M_g_sims, R_thresh,
+                            seed=None, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, crn=False,
+                            eve_rate_mode='monte_carlo', keep_samples=False, progress_callback=None,
+                            snr_callback=None, checkpoint=None, checkpoint_interval=CHECKPOINT_INTERVAL,
+                            max_bytes=None, executor=None, dtype=None):
+    """
+    Runs the Monte Carlo for the given strategies (names in STRATEGY_REGISTRY) sharded into tasks over
+    SNR x strategy x draw chunk (draw chunks only when crn=True, where each chunk covers all strategies and SNRs).
+    Each task gets its own child of np.random.SeedSequence(seed) and partial sums are merged in task order,
+    so the output for a given seed is identical for any number of workers; workers=1 runs in-process.
+    progress_callback(done, total) is called after each finished task, and snr_callback(snr_idx, values) once
+    all tasks of an SNR point are done (at the end with crn=True), with values {name: (mean R_s, P(R_s > R))}.
+    An exception raised by a callback cancels the tasks not yet started and is re-raised.
+    With a SimulationCheckpoint, finished task partials are saved every checkpoint_interval seconds (and when
+    the run stops), and tasks found in the checkpoint are not run again; the merge is unchanged, so a resumed
+    run gives bit-identical results. max_bytes is the memory budget of each task's evaluate_specs call.
+    executor is a running ProcessPoolExecutor to submit the tasks to (when workers > 1), kept open afterwards
+    so that back-to-back runs share warm workers; by default a pool is started and shut down for this run.
+    dtype is the precision of every task's channels (complex128 or complex64).
+    Returns {name: {'secrecy_rates': [...], 'outage_probs': [...]}} with one entry per SNR point, plus the
+    sorted per-draw secrecy rates under 'rs_samples' when keep_samples is set.
+    """
+    params = _make_params(strategy_names, snr_db_range, N, alpha, sigma_n_sq, M_g_sims, R_thresh, eve_rate_mode,
+                          keep_samples, max_bytes, dtype)
+    snr_count = len(params['snr_db_range'])
+    tasks = _make_tasks(params, M_h_sims, chunk_size, crn, seed)
+
+    partials = [None] * len(tasks)
+    pending = [sum(1 for task in tasks if task['crn'] or task['snr_idx'] == snr_idx) for snr_idx in range(snr_count)]
+    unsaved = {}
+    last_save = [time.perf_counter()]
+
+    def save_checkpoint():
+        checkpoint.save(unsaved)
+        unsaved.clear()
+        last_save[0] = time.perf_counter()
+
+    def task_done(done, task, partial, restored=False):
+        partials[task['index']] = partial
+        if checkpoint is not None and not restored:
+            unsaved[('task', task['index'])] = partial
+            if time.perf_counter() - last_save[0] >= checkpoint_interval:
+                save_checkpoint()
+        if progress_callback is not None:
+            progress_callback(done, len(tasks))
+        for snr_idx in range(snr_count) if task['crn'] else [task['snr_idx']]:
+            pending[snr_idx] -= 1
+            if pending[snr_idx] == 0 and snr_callback is not None:
+                snr_callback(snr_idx, {name: _merge_cell(partials, (name, snr_idx))[:2]
+                                       for name in params['strategy_names']})
+
+    remaining = tasks
+    if checkpoint is not None:
+        restored = [task for task in tasks if ('task', task['index']) in checkpoint.units]
+        for done, task in enumerate(restored, start=1):
+            task_done(done, task, checkpoint.units[('task', task['index'])], restored=True)
+        remaining = [task for task in tasks if ('task', task['index']) not in checkpoint.units]
+    first_done = len(tasks) - len(remaining) + 1
+
+    try:
+        if workers is None or workers <= 1:
+            for done, task in enumerate(remaining, start=first_done):
+                _, partial, stats = _run_task(task)
+                merge_stats(stats)
+                task_done(done, task, partial)
+        else:
+            pool = executor if executor is not None else ProcessPoolExecutor(max_workers=workers)
+            futures = {}
+            try:
+                futures = {pool.submit(_run_task, task): task for task in remaining}
+                for done, future in enumerate(as_completed(futures), start=first_done):
+                    _, partial, stats = future.result()
+                    merge_stats(stats)
+                    task_done(done, futures[future], partial)
+            finally:
+                # On an early exit only the tasks already running are waited for
+                if executor is None:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                else:
+                    for future in futures:
+                        future.cancel()
+                    wait(futures)
+    finally:
+        if checkpoint is not None:
+            save_checkpoint()
+
+    return _merge_results(params, partials)
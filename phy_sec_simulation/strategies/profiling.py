@@ -0,0 +1,150 @@
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Stages of the pipeline, in the order the summary lists them
+PROFILE_STAGES = ('channel_generation', 'an_construction', 'bob_rate', 'eve_rate', 'aggregation')
+
+# Profile collecting the current thread's stages, if profiling is on in that thread
+_local = threading.local()
+
+class _NullStage:
+    """Context manager of stage() while profiling is off: does nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    """One timed entry into a stage. Time spent in nested stages is charged to them, not to this one."""
+    __slots__ = ('profile', 'name', 'start', 'nested')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.nested = 0.0
+        self.profile._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = self.profile._stack
+        stack.pop()
+        if stack:
+            stack[-1].nested += elapsed
+        self.profile.add(self.name, 1, elapsed - self.nested)
+        return False
+
+class StageProfile:
+    """
+    Wall time and call counts per pipeline stage. Stage times are exclusive (a stage running inside another
+    is not counted twice), so they add up to the time spent in instrumented code; wall_seconds is the
+    duration of the profiling() block. Profiles of worker processes are merged in with merge().
+    """
+
+    def __init__(self):
+        self.stages = {} # name -> [calls, seconds]
+        self.wall_seconds = 0.0
+        self._stack = []
+
+    def add(self, name, calls, seconds):
+        entry = self.stages.setdefault(name, [0, 0.0])
+        entry[0] += calls
+        entry[1] += seconds
+
+    def stats(self):
+        """Picklable {stage: (calls, seconds)}, as passed to merge()."""
+        return {name: (calls, seconds) for name, (calls, seconds) in self.stages.items()}
+
+    def merge(self, stats):
+        for name, (calls, seconds) in stats.items():
+            self.add(name, calls, seconds)
+
+    def to_dict(self):
+        """JSON-ready profile: wall time and, per stage, calls, seconds and share of the staged time."""
+        names = [name for name in PROFILE_STAGES if name in self.stages]
+        names += sorted(name for name in self.stages if name not in PROFILE_STAGES)
+        staged_seconds = sum(seconds for _, seconds in self.stages.values())
+        return {
+            'wall_seconds': self.wall_seconds,
+            'staged_seconds': staged_seconds,
+            'stages': {name: {'calls': self.stages[name][0],
+                              'seconds': self.stages[name][1],
+                              'share': self.stages[name][1] / staged_seconds if staged_seconds > 0 else 0.0}
+                       for name in names},
+        }
+
+    def summary_table(self):
+        """Plain-text table of the stages, slowest first."""
+        profile = self.to_dict()
+        lines = [f"{'Stage':<20} {'Calls':>10} {'Seconds':>10} {'Share':>7} {'Per call':>12}"]
+        for name, entry in sorted(profile['stages'].items(), key=lambda item: -item[1]['seconds']):
+            per_call = entry['seconds'] / entry['calls'] if entry['calls'] else 0.0
+            lines.append(f"{name:<20} {entry['calls']:>10} {entry['seconds']:>10.3f} {entry['share']:>7.1%} "
+                         f"{per_call * 1e3:>10.3f}ms")
+        lines.append(f"{'staged total':<20} {'':>10} {profile['staged_seconds']:>10.3f}")
+        lines.append(f"{'wall time':<20} {'':>10} {profile['wall_seconds']:>10.3f}")
+        return "\n".join(lines)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+def stage(name):
+    """
+    Context manager timing a block as the given stage of the current thread's profile. While profiling
+    is off it returns a shared no-op context, so instrumented code pays one attribute lookup per block.
+    """
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return _NULL_STAGE
+    return _Stage(profile, name)
+
+def staged(name):
+    """Decorator timing every call of a function as the given stage (see stage())."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = getattr(_local, 'profile', None)
+            if profile is None:
+                return func(*args, **kwargs)
+            with _Stage(profile, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def profiling_enabled():
+    """True inside a profiling() block of the current thread."""
+    return getattr(_local, 'profile', None) is not None
+
+def merge_stats(stats):
+    """Adds StageProfile.stats() of another process to the current thread's profile, if profiling is on."""
+    profile = getattr(_local, 'profile', None)
+    if profile is not None and stats:
+        profile.merge(stats)
+
+@contextmanager
+def profiling(profile=None):
+    """
+    Records the stages run by the current thread inside the block into profile (a new StageProfile
+    by default), which is yielded. Nested blocks collect into their own profile.
+    """
+    profile = profile if profile is not None else StageProfile()
+    previous = getattr(_local, 'profile', None)
+    _local.profile = profile
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.wall_seconds += time.perf_counter() - start
+        _local.profile = previous
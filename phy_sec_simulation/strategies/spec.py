@@ -0,0 +1,80 @@
+import numpy as np
+from .utils import generate_an_vectors
+from .profiling import staged
+
+class StrategySpec:
+    """
+    Declarative description of a beamforming / artificial-noise strategy.
+    Every strategy runs the same pipeline and differs only in these pieces:
+        (lambda, mu) = power_allocation(P_total, N, alpha)
+        w = sqrt(lambda) * h * |h|^w_norm_exp                        (w_norm_exp: -2 for h/|h|^2, -1 for h/|h|, 0 for h)
+        z = sqrt(mu) * |h|^z_scale_exp * gamma_v / |gamma_v|          (z_normalized=True)
+        z = sqrt(mu) * |h|^z_scale_exp * gamma_v, v ~ CN(0, I/(N-1))  (z_normalized=False)
+    label, short_label, marker and linestyle are used by the drivers for printing and plotting.
+    """
+
+    def __init__(self, name, label, short_label, power_allocation, w_norm_exp, z_scale_exp=0, z_normalized=True,
+                 marker='o', linestyle='-'):
+        self.name = name
+        self.label = label
+        self.short_label = short_label
+        self.power_allocation = power_allocation
+        self.w_norm_exp = w_norm_exp
+        self.z_scale_exp = z_scale_exp
+        self.z_normalized = z_normalized
+        self.marker = marker
+        self.linestyle = linestyle
+
+    def __repr__(self):
+        return f"StrategySpec({self.name!r})"
+
+    def powers(self, P_total, N, alpha, h_norm_sq, gamma_norm_sq):
+        """
+        Instantaneous powers |w|^2 and |z|^2 for channels with |h|^2 = h_norm_sq, where gamma_norm_sq is
+        |gamma_v|^2 for v ~ CN(0, I_{N-1}). P_total and alpha may be arrays broadcast against h_norm_sq.
+        """
+        lambda_val, mu_val = self.power_allocation(P_total, N, alpha)
+        w_power = lambda_val * h_norm_sq**(1 + self.w_norm_exp)
+        if N <= 1: # No artificial noise direction exists
+            z_power = 0 * w_power
+        elif self.z_normalized:
+            z_power = mu_val * h_norm_sq**self.z_scale_exp * (gamma_norm_sq > 1e-18)
+        else:
+            z_power = mu_val * h_norm_sq**self.z_scale_exp * gamma_norm_sq / (N - 1)
+        return w_power, z_power
+
+    @staged('an_construction')
+    def build_vectors(self, P_total, N, alpha, h, rng=None):
+        """
+        Builds w and z for a stack of channels h (M, N). Returns (w, z, valid), where valid marks the
+        rows whose channel is not effectively zero; w and z of invalid rows carry no meaning.
+        w and z are in the dtype of h.
+        """
+        M_h = h.shape[0]
+        real = h.real.dtype # Scalars and norms are cast to it so that complex64 stacks stay complex64
+        h_norm_sq = np.sum(np.abs(h)**2, axis=1, dtype=np.float64)
+        valid = h_norm_sq >= 1e-9
+        h_norm_sq = np.where(valid, h_norm_sq, 1.0).astype(real, copy=False)[:, np.newaxis]
+
+        lambda_val, mu_val = self.power_allocation(P_total, N, alpha)
+        w = real.type(np.sqrt(lambda_val)) * h * h_norm_sq**(self.w_norm_exp / 2)
+
+        if N > 1:
+            gamma_v = generate_an_vectors(h, rng=rng) # v ~ CN(0, I_{N-1}); zero rows where h is degenerate
+            z_scale = real.type(np.sqrt(mu_val)) * h_norm_sq**(self.z_scale_exp / 2)
+            if self.z_normalized:
+                norm_gamma_v = np.linalg.norm(gamma_v, axis=1, keepdims=True)
+                z = np.where(norm_gamma_v > 1e-9, z_scale * gamma_v / np.maximum(norm_gamma_v, 1e-9), 0)
+            else:
+                z = z_scale * gamma_v / real.type(np.sqrt(N - 1))
+        else: # N=1, the null space of h^H is trivial
+            z = np.zeros((M_h, N), dtype=h.dtype)
+        return w, z, valid
+
+# Registered strategies by name, in registration order
+STRATEGY_REGISTRY = {}
+
+def register_strategy(spec):
+    """Adds spec to STRATEGY_REGISTRY (replacing any spec of the same name) and returns it."""
+    STRATEGY_REGISTRY[spec.name] = spec
+    return spec
@@ -0,0 +1,86 @@
+import numpy as np
+from .utils import db_to_linear
+from .crn import draw_channel_ensemble, secrecy_rates_crn
+from .channel_source import ChannelSource
+
+# Axes of the sweep result array, in order
+SWEEP_DIMS = ('metric', 'strategy', 'N', 'alpha', 'sigma_n_sq', 'snr_db')
+SWEEP_METRICS = ('secrecy_rate', 'outage_prob')
+
+def _ensemble_rng(seed, N, dtype=None):
+    """
+    Channel source for the ensemble of antenna count N. Seeded by (seed, N), so a cell's result does not
+    depend on which other N values are in the grid.
+    """
+    return ChannelSource(np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(N,))), dtype=dtype)
+
+def run_sweep(specs, N_values, alpha_values, sigma_n_sq_values, snr_db_values, M_h_sims, M_g_sims, R_thresh,
+              eve_rate_mode='monte_carlo', seed=None, progress_callback=None, dtype=None):
+    """
+    Evaluates every spec on the grid N x alpha x sigma^2 x SNR. Cells are grouped by N: one channel ensemble
+    (Bob's channels, AN directions and Eve's gains) is drawn per N and shared by all its cells. alpha and SNR
+    only rescale |w|^2 and |z|^2, so they are evaluated together in one broadcast call per spec. Every rate
+    depends on P_total and sigma^2 only through the SNR P_total / sigma^2, so the sigma^2 axis is filled by
+    broadcasting the SNR results. progress_callback(done, total) is called after each N.
+    dtype='complex64' draws the ensembles in single precision, halving the memory of Eve's gains.
+    Returns {'dims': SWEEP_DIMS, 'coords': {dim: labels}, 'values': array} with values shaped by the coords.
+    """
+    N_values = [int(N) for N in N_values]
+    alpha_values = np.atleast_1d(np.asarray(alpha_values, dtype=float))
+    sigma_n_sq_values = np.atleast_1d(np.asarray(sigma_n_sq_values, dtype=float))
+    snr_db_values = np.atleast_1d(np.asarray(snr_db_values, dtype=float))
+
+    # Flattened alpha x SNR grid, evaluated at sigma^2 = 1 where P_total equals the linear SNR
+    alpha_grid, snr_grid = np.meshgrid(alpha_values, snr_db_values, indexing='ij')
+    P_grid = db_to_linear(snr_grid.ravel())
+    grid_shape = alpha_grid.shape
+
+    values = np.zeros((len(SWEEP_METRICS), len(specs), len(N_values), len(alpha_values),
+                       len(sigma_n_sq_values), len(snr_db_values)))
+    M_g_ensemble = 0 if eve_rate_mode == 'analytic' else M_g_sims # Eve's draws are not needed analytically
+    for n_idx, N in enumerate(N_values):
+        ensemble = draw_channel_ensemble(N, M_h_sims, M_g_ensemble, _ensemble_rng(seed, N, dtype))
+        for k, spec in enumerate(specs):
+            rs, events = secrecy_rates_crn(spec.powers, P_grid, alpha_grid.ravel(), 1.0, R_thresh, ensemble,
+                                           eve_rate_mode)
+            mean_rs = np.mean(rs, axis=1) if rs.size else np.zeros(P_grid.shape)
+            mean_events = np.mean(events, axis=1) if events.size else np.zeros(P_grid.shape)
+            values[0, k, n_idx] = mean_rs.reshape(grid_shape)[:, np.newaxis, :]
+            values[1, k, n_idx] = mean_events.reshape(grid_shape)[:, np.newaxis, :]
+        if progress_callback is not None:
+            progress_callback(n_idx + 1, len(N_values))
+
+    coords = {
+        'metric': list(SWEEP_METRICS),
+        'strategy': [spec.name for spec in specs],
+        'N': N_values,
+        'alpha': alpha_values.tolist(),
+        'sigma_n_sq': sigma_n_sq_values.tolist(),
+        'snr_db': snr_db_values.tolist(),
+    }
+    return {'dims': SWEEP_DIMS, 'coords': coords, 'values': values}
+
+def save_sweep(sweep, path):
+    """Saves a run_sweep result as one .npz file holding the value array, the axis names and each axis' labels."""
+    coords = {f'coord_{dim}': np.asarray(labels) for dim, labels in sweep['coords'].items()}
+    np.savez(path, values=sweep['values'], dims=np.asarray(sweep['dims']), **coords)
+
+def load_sweep(path):
+    """Loads a file written by save_sweep back into the run_sweep format."""
+    with np.load(path) as data:
+        dims = tuple(str(dim) for dim in data['dims'])
+        coords = {dim: data[f'coord_{dim}'].tolist() for dim in dims}
+        return {'dims': dims, 'coords': coords, 'values': data['values']}
+
+def sweep_results(sweep, N, alpha, sigma_n_sq):
+    """
+    One (N, alpha, sigma^2) slice of a sweep in the run_simulation format,
+    {name: {'secrecy_rates': [...], 'outage_probs': [...]}} over the SNR axis.
+    """
+    coords = sweep['coords']
+    n_idx = coords['N'].index(N)
+    alpha_idx = int(np.argmin(np.abs(np.asarray(coords['alpha']) - alpha)))
+    sigma_idx = int(np.argmin(np.abs(np.asarray(coords['sigma_n_sq']) - sigma_n_sq)))
+    values = sweep['values'][:, :, n_idx, alpha_idx, sigma_idx]
+    return {name: {'secrecy_rates': values[0, k].tolist(), 'outage_probs': values[1, k].tolist()}
+            for k, name in enumerate(coords['strategy'])}
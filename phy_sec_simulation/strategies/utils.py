@@ -1,10 +1,17 @@
 import numpy as np
+from .analytic_eve import check_eve_rate_mode, analytic_eve_rate_batch
+from .channel_source import complex_normal
+from .profiling import stage, staged
 
-def generate_channel_vector(N):
-    """Generates a complex channel vector h ~ CN(0, 2I_N)."""
-    real_part = np.random.normal(0, 1, (N, 1))
-    imag_part = np.random.normal(0, 1, (N, 1))
-    return (real_part + 1j * imag_part)
+# Every function that draws random numbers takes rng: an np.random.Generator, or a ChannelSource that
+# serves draws from bulk buffers. rng=None draws from a fresh, unseeded Generator.
+# Channels may be complex64 (see channel_source.CHANNEL_DTYPES): downstream arrays keep the precision of
+# their inputs, scalars are cast so they do not promote them, and sums are accumulated in float64.
+
+@staged('channel_generation')
+def generate_channel_vector(N, rng=None, dtype=None):
+    """Generates a complex channel vector h ~ CN(0, 2I_N) in dtype (default: the rng's, see complex_normal)."""
+    return complex_normal((N, 1), rng, dtype)
 
 def db_to_linear(db_value):
     """Converts dB to linear scale."""
@@ -13,4 +20,92 @@ def db_to_linear(db_value):
 def snr_to_total_power(snr_db, noise_variance):
     """Calculates total power P from SNR in dB."""
     snr_linear = db_to_linear(snr_db) # Corrected: was using undefined db_value
-    return snr_linear * noise_variance 
\ No newline at end of file
+    return snr_linear * noise_variance 
+
+@staged('channel_generation')
+def generate_channel_matrix(M, N, rng=None, dtype=None):
+    """Generates M channel vectors g ~ CN(0, 2I_N) stacked as the rows of an (M, N) array, in dtype."""
+    return complex_normal((M, N), rng, dtype)
+
+# Upper bound on the number of complex entries in one block of Eve channels (B, M_g, N)
+EVE_CHUNK_ELEMENTS = 2**21
+
+def average_eve_rate(w, z, sigma_n_sq_val, M_g_sims, rng=None):
+    """
+    Monte Carlo estimate of Eve's rate E_g[log2(1 + |g^H w|^2 / (|g^H z|^2 + sigma_n^2))].
+    All M_g_sims channels g are drawn at once as an (M_g_sims, N) array.
+    Pass z=None when there is no artificial noise contribution (z = 0 or N = 1).
+    """
+    w_row = w.reshape(1, -1)
+    z_row = np.zeros_like(w_row) if z is None else z.reshape(1, -1)
+    return float(average_eve_rate_batch(w_row, z_row, sigma_n_sq_val, M_g_sims, rng)[0])
+
+@staged('eve_rate')
+def average_eve_rate_batch(w, z, sigma_n_sq_val, M_g_sims, rng=None):
+    """
+    Batched version of average_eve_rate. Row i of w and z (both (M, N)) is averaged over
+    its own M_g_sims Eve channels; rows are processed in blocks of at most EVE_CHUNK_ELEMENTS.
+    Eve's channels are drawn in the precision of w and z. Returns an (M,) float64 array of Eve rates.
+    """
+    M, N = w.shape
+    R_e = np.zeros(M)
+    if M_g_sims <= 0 or M == 0:
+        return R_e
+    wz = np.stack((w, z), axis=-1) # (M, N, 2)
+    sigma_n_sq_val = wz.real.dtype.type(sigma_n_sq_val)
+    rows_per_chunk = max(1, EVE_CHUNK_ELEMENTS // (M_g_sims * N))
+    for start in range(0, M, rows_per_chunk):
+        stop = min(start + rows_per_chunk, M)
+        # g^H of a CN(0, 2I) draw is itself CN(0, 2I), so the draws are used as g^H directly
+        g_H = generate_channel_matrix((stop - start) * M_g_sims, N, rng, wz.dtype)
+        g_H = g_H.reshape(stop - start, M_g_sims, N)
+        powers_eve = np.abs(g_H @ wz[start:stop])**2 # (B, M_g, 2): |g^H w|^2 and |g^H z|^2
+        noise_power_eve = powers_eve[..., 1] + sigma_n_sq_val
+        rates_eve = np.log2(1 + powers_eve[..., 0] / np.maximum(noise_power_eve, 1e-9))
+        R_e[start:stop] = np.sum(rates_eve, axis=1, dtype=np.float64) / M_g_sims
+    return R_e
+
+@staged('an_construction')
+def generate_an_vectors(h, v_std=1.0, rng=None):
+    """
+    Draws gamma_v = Gamma v for each row h_i of the (M, N) stack h, where Gamma is an orthonormal
+    basis of the null space of h_i^H and v ~ CN(0, v_std^2 I_{N-1}). Instead of computing Gamma by
+    SVD, a CN(0, v_std^2 I_N) vector u is projected onto the orthogonal complement of h_i:
+    gamma_v = u - h_i (h_i^H u) / |h_i|^2, which has the same distribution in O(N) per row.
+    Rows where h_i is effectively zero are returned as zero vectors.
+    Returns an (M, N) array in the dtype of h.
+    """
+    M, N = h.shape
+    u = complex_normal((M, N), rng, h.dtype) * h.real.dtype.type(v_std / np.sqrt(2))
+    h_norm_sq = np.sum(np.abs(h)**2, axis=1, dtype=np.float64)
+    valid = h_norm_sq >= 1e-9
+    # (h_i^H u) / |h_i|^2, computed in complex128 and applied in the precision of h
+    coeff = np.sum(h.conj() * u, axis=1, dtype=np.complex128) / np.where(valid, h_norm_sq, 1.0)
+    gamma_v = u - h * coeff.astype(h.dtype, copy=False)[:, np.newaxis]
+    gamma_v[~valid] = 0
+    return gamma_v
+
+def secrecy_rate_batch(h, w, z, valid, sigma_n_sq_val, M_g_sims, R_thresh, eve_rate_mode='monte_carlo', rng=None):
+    """
+    Secrecy rates R_s = max(0, R_b - R_e) and events (R_s > R_thresh) for stacks h, w, z of shape (M, N).
+    Rows that are not valid (h effectively zero) or whose w is effectively zero get R_s = 0.
+    A zero row of z means no artificial noise reaches Eve.
+    Eve's rate is averaged over M_g_sims channel draws, or evaluated exactly when eve_rate_mode='analytic'.
+    """
+    check_eve_rate_mode(eve_rate_mode)
+    with stage('bob_rate'):
+        signal_power_bob = np.abs(np.sum(h.conj() * w, axis=1, dtype=np.complex128))**2
+        R_b = np.log2(1 + signal_power_bob / sigma_n_sq_val)
+
+    R_s = np.zeros(h.shape[0])
+    active = valid & (np.linalg.norm(w, axis=1) >= 1e-9)
+    if np.any(active):
+        if eve_rate_mode == 'analytic':
+            with stage('eve_rate'):
+                R_e = analytic_eve_rate_batch(w[active], z[active], sigma_n_sq_val)
+        else:
+            R_e = average_eve_rate_batch(w[active], z[active], sigma_n_sq_val, M_g_sims, rng)
+        R_s[active] = np.maximum(0.0, R_b[active] - R_e)
+
+    events_rs_greater_R = (R_s > R_thresh).astype(int)
+    return R_s, events_rs_greater_R
@@ -1,63 +1,36 @@
-import numpy as np
-from scipy.linalg import null_space
-from .utils import generate_channel_vector
-
-def strategy_1_2(P_total, N, alpha, sigma_n_sq_val, M_g_sims, R_thresh):
-    """
-    Implements Strategy 1.2: Variable Power Allocation.
-    Returns instantaneous secrecy rate and outage event (1 if R_s > R_thresh, 0 otherwise).
-    """
-    h = generate_channel_vector(N)
-    h_H = h.conj().T
-    h_norm_sq = np.abs(np.vdot(h, h))
-
-    if h_norm_sq < 1e-9:
-        return 0.0, 0
+from .spec import StrategySpec, register_strategy
+from .engine import evaluate_strategy, evaluate_strategy_batch
 
+def _power_allocation(P_total, N, alpha):
+    """lambda and mu of Strategy 1.2."""
     lambda_val = 2 * (N - 1) * alpha * P_total
     mu_val = (P_total - lambda_val/(2*(N-1)))*(2*(N-1))
+    return lambda_val, mu_val
 
-    w = np.sqrt(lambda_val) * (h / h_norm_sq)
-    
-
-    if N > 1:
-        gamma_basis = null_space(h_H)
-        if gamma_basis.shape[1] < (N-1) and N-1 > 0:
-            z = np.zeros((N,1))
-        elif gamma_basis.shape[1] == 0 and N > 1:
-            z = np.zeros((N,1))
-        else:
-            v_for_gamma_v = (np.random.randn(N - 1, 1) + 1j * np.random.randn(N - 1, 1)) / np.sqrt(2 * (N - 1))
-            gamma_v = gamma_basis @ v_for_gamma_v
-            # Key difference: scaling by 1/|h| (i.e. 1/sqrt(h_norm_sq))
-            z = np.sqrt(mu_val) * (gamma_v / np.sqrt(h_norm_sq)) 
-    else: # N=1
-        z = np.zeros((N, 1))
+# w = sqrt(lambda) * h / |h|^2
+# Key difference from Strategy 1: z = sqrt(mu) * gamma_v / |h| with v ~ CN(0, I_{N-1}/(N-1)), not normalized
+STRATEGY_1_2 = register_strategy(StrategySpec(
+    'strategy_1_2', 'S1.2 (Var Power)', 'S1.2', _power_allocation,
+    w_norm_exp=-2, z_scale_exp=-1, z_normalized=False, marker='x', linestyle='--'
+))
 
-    signal_power_bob = np.abs(h_H @ w)**2
-    R_b = np.log2(1 + signal_power_bob / sigma_n_sq_val)
-
-    R_s = 0.0 # Default R_s
-    R_e_sum = 0.0
-    if np.linalg.norm(w) < 1e-9:
-        R_s = 0.0
-    elif (N > 1 and np.linalg.norm(z) < 1e-9) or N == 1:
-        for _ in range(M_g_sims):
-            g = generate_channel_vector(N)
-            g_H = g.conj().T
-            signal_power_eve = np.abs(g_H @ w)**2
-            R_e_sum += np.log2(1 + signal_power_eve / sigma_n_sq_val)
-    else: # General case with AN (N > 1 and z is non-zero)
-        for _ in range(M_g_sims):
-            g = generate_channel_vector(N)
-            g_H = g.conj().T
-            signal_power_eve = np.abs(g_H @ w)**2
-            noise_power_eve = np.abs(g_H @ z)**2 + sigma_n_sq_val
-            R_e_sum += np.log2(1 + signal_power_eve / (noise_power_eve if noise_power_eve > 1e-9 else 1e-9))
-            
-    if np.linalg.norm(w) >= 1e-9:
-        R_e = R_e_sum / M_g_sims if M_g_sims > 0 else 0.0
-        R_s = np.maximum(0.0, R_b - R_e)
+def strategy_1_2(P_total, N, alpha, sigma_n_sq_val, M_g_sims, R_thresh, eve_rate_mode='monte_carlo',
+                 rng=None, dtype=None, backend='numpy'):
+    """
+    Implements Strategy 1.2: Variable Power Allocation.
+    Returns instantaneous secrecy rate and outage event (1 if R_s > R_thresh, 0 otherwise).
+    dtype (channel precision) and backend ('numpy' or 'numba') are those of evaluate_strategy_batch.
+    """
+    return evaluate_strategy(STRATEGY_1_2, P_total, N, alpha, sigma_n_sq_val, M_g_sims, R_thresh, eve_rate_mode, rng,
+                             dtype=dtype, backend=backend)
 
-    event_rs_greater_R = 1 if R_s > R_thresh else 0 # Corrected logic for Pr(R_s > R)
-    return float(R_s), event_rs_greater_R 
\ No newline at end of file
+def strategy_1_2_batch(P_total, N, alpha, sigma_n_sq_val, M_g_sims, R_thresh, M_h_sims=None, h=None,
+                       eve_rate_mode='monte_carlo', rng=None, dtype=None, backend='numpy'):
+    """
+    Batched Strategy 1.2 over M_h_sims Bob channel draws, or over a pre-drawn (M_H, N) stack h.
+    Returns arrays of secrecy rates and outage events (1 if R_s > R_thresh, 0 otherwise).
+    eve_rate_mode='analytic' evaluates Eve's rate in closed form instead of over M_g_sims draws.
+    dtype (channel precision) and backend ('numpy' or 'numba') are those of evaluate_strategy_batch.
+    """
+    return evaluate_strategy_batch(STRATEGY_1_2, P_total, N, alpha, sigma_n_sq_val, M_g_sims, R_thresh,
+                                   M_h_sims, h, eve_rate_mode, rng, dtype=dtype, backend=backend)
@@ -0,0 +1,256 @@
+import multiprocessing
+import os
+import pickle
+import re
+import socket
+import time
+import uuid
+
+from .cache import code_version
+from .parallel import DEFAULT_CHUNK_SIZE, _run_task, _make_params, _make_tasks, _merge_results
+from .profiling import merge_stats
+
+# Seconds after which a claimed shard whose worker has not finished it is handed out again. Must exceed the
+# run time of one shard; an expired lease of a live worker only costs duplicate work, which is discarded.
+DEFAULT_LEASE_TIMEOUT = 600.0
+# Seconds between polls of the queue by idle workers and the coordinator
+DEFAULT_POLL_INTERVAL = 0.5
+
+def _worker_id(worker_id=None):
+    """Worker name used in file names: host and process id by default, restricted to [A-Za-z0-9-]."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    return re.sub(r'[^A-Za-z0-9-]+', '-', str(worker_id))
+
+def _shard_index(filename):
+    """Task index of a task_NNNNNN[...].pkl file name."""
+    return int(filename[5:filename.index('.')])
+
+class WorkQueue:
+    """
+    Queue of the shards of one run in a directory shared by the coordinator and the workers: a local
+    directory for workers on one machine, or a network file system (with atomic rename, e.g. NFS) for
+    workers on several hosts. Layout:
+        run.pkl   - run id, fingerprint, seed, run parameters and shard count
+        pending/  - task_NNNNNN.pkl, shards waiting for a worker
+        claimed/  - task_NNNNNN.<worker>.pkl, shards being run; the file's mtime is the start of the lease
+        done/     - task_NNNNNN.<run id>.<worker>.pkl, a finished shard's partial sums and stage profile
+    A worker claims a shard by renaming its pending file into claimed/, which succeeds for exactly one worker.
+    Claims older than the lease timeout without a result are renamed back into pending/ (requeue_expired),
+    so shards of crashed or lost workers are run again. A shard can therefore finish more than once; each
+    shard draws from its own seed, so duplicates are identical and reduce() keeps one result per shard.
+    Lease ages are measured against the mtime of a freshly touched file in the directory, not the local
+    clock, so hosts with skewed clocks agree on them.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.run_path = os.path.join(directory, 'run.pkl')
+        self.pending_dir = os.path.join(directory, 'pending')
+        self.claimed_dir = os.path.join(directory, 'claimed')
+        self.done_dir = os.path.join(directory, 'done')
+        self.run = None
+
+    def _write(self, path, payload):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path) # Readers never see a truncated file
+
+    @staticmethod
+    def _read(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    @staticmethod
+    def _task_files(directory):
+        return sorted(name for name in os.listdir(directory) if name.startswith('task_') and name.endswith('.pkl'))
+
+    def create(self, tasks, params, fingerprint, seed=None, resume=False):
+        """
+        Queues the shards of a run. With resume and a queued run of the same fingerprint, that run is kept
+        with its finished shards (its seed must match seed, if given); otherwise the directory is cleared.
+        Returns the run record.
+        """
+        for directory in (self.pending_dir, self.claimed_dir, self.done_dir):
+            os.makedirs(directory, exist_ok=True)
+        fingerprint = dict(fingerprint, code_version=code_version())
+        if resume and self.load() is not None:
+            if self.run['fingerprint'] != fingerprint:
+                raise ValueError(f"Queue in {self.directory} holds a run with different parameters or code")
+            if seed is not None and seed != self.run['seed']:
+                raise ValueError(f"Queue in {self.directory} holds a run with seed {self.run['seed']}, not {seed}")
+            return self.run
+
+        for directory in (self.pending_dir, self.claimed_dir, self.done_dir):
+            for filename in os.listdir(directory):
+                os.remove(os.path.join(directory, filename))
+        run_id = uuid.uuid4().hex[:12]
+        for task in tasks:
+            self._write(os.path.join(self.pending_dir, f"task_{task['index']:06d}.pkl"), dict(task, run_id=run_id))
+        self.run = {'run_id': run_id, 'fingerprint': fingerprint, 'seed': seed, 'params': params,
+                    'task_count': len(tasks)}
+        self._write(self.run_path, self.run)
+        return self.run
+
+    def load(self):
+        """Reads the queued run record (None while there is none), kept in self.run."""
+        try:
+            self.run = self._read(self.run_path)
+        except FileNotFoundError:
+            self.run = None
+        return self.run
+
+    def claim(self, worker_id):
+        """Takes the first pending shard of the current run. Returns (task, claim path), or None if there is none."""
+        for filename in self._task_files(self.pending_dir):
+            claim_path = os.path.join(self.claimed_dir, f"{filename[:-4]}.{worker_id}.pkl")
+            try:
+                os.rename(os.path.join(self.pending_dir, filename), claim_path)
+            except FileNotFoundError: # Claimed by another worker in the meantime
+                continue
+            os.utime(claim_path) # Starts the lease
+            task = self._read(claim_path)
+            if task['run_id'] == self.run['run_id']:
+                return task, claim_path
+            os.remove(claim_path) # Left over from a replaced run
+        return None
+
+    def complete(self, task, partial, stats, worker_id, claim_path):
+        """Stores a finished shard's partial sums and stage profile and releases its claim."""
+        done_path = os.path.join(self.done_dir, f"task_{task['index']:06d}.{task['run_id']}.{worker_id}.pkl")
+        self._write(done_path, {'index': task['index'], 'partial': partial, 'stats': stats})
+        try:
+            os.remove(claim_path)
+        except FileNotFoundError: # The lease expired and the shard was requeued
+            pass
+
+    def _done_files(self):
+        run_id = self.run['run_id']
+        return [name for name in self._task_files(self.done_dir) if name.split('.')[1] == run_id]
+
+    def done_indices(self):
+        """Indices of the current run's shards with at least one result."""
+        return {_shard_index(name) for name in self._done_files()}
+
+    def status(self):
+        """Shard counts of the current run: {'run_id', 'total', 'done', 'claimed', 'pending'}."""
+        return {'run_id': self.run['run_id'], 'total': self.run['task_count'], 'done': len(self.done_indices()),
+                'claimed': len(self._task_files(self.claimed_dir)), 'pending': len(self._task_files(self.pending_dir))}
+
+    def _now(self):
+        """Current time on the clock of the queue's file system."""
+        clock_path = os.path.join(self.directory, 'clock')
+        with open(clock_path, 'a'):
+            os.utime(clock_path)
+        return os.stat(clock_path).st_mtime
+
+    def requeue_expired(self, lease_timeout=DEFAULT_LEASE_TIMEOUT):
+        """
+        Moves claims older than lease_timeout back to pending/ and drops claims of shards that already have
+        a result (their worker stopped between storing it and releasing the claim). Returns the number requeued.
+        """
+        done = self.done_indices()
+        now = self._now()
+        requeued = 0
+        for filename in self._task_files(self.claimed_dir):
+            claim_path = os.path.join(self.claimed_dir, filename)
+            try:
+                if _shard_index(filename) in done:
+                    os.remove(claim_path)
+                elif now - os.stat(claim_path).st_mtime > lease_timeout:
+                    os.rename(claim_path, os.path.join(self.pending_dir, f"{filename.split('.')[0]}.pkl"))
+                    requeued += 1
+            except FileNotFoundError: # Released, or requeued by another process
+                continue
+        return requeued
+
+    def reduce(self):
+        """
+        Merges the current run's shard results into the results dict of run_parallel_simulation, keeping the
+        first result of each shard, and adds the shards' stage profiles to the caller's profile, if profiling.
+        Raises ValueError while shards are missing.
+        """
+        results = {}
+        for filename in self._done_files():
+            index = _shard_index(filename)
+            if index not in results:
+                results[index] = self._read(os.path.join(self.done_dir, filename))
+        missing = self.run['task_count'] - len(results)
+        if missing:
+            raise ValueError(f"{missing} of {self.run['task_count']} shards in {self.directory} are not done")
+        for index in sorted(results):
+            merge_stats(results[index]['stats'])
+        return _merge_results(self.run['params'], [results[index]['partial'] for index in sorted(results)])
+
+def run_queue_worker(directory, worker_id=None, lease_timeout=DEFAULT_LEASE_TIMEOUT,
+                     poll_interval=DEFAULT_POLL_INTERVAL, idle_timeout=None, progress_callback=None):
+    """
+    Runs shards of the run queued in directory until all of them are done. While no shard is pending, expired
+    claims are requeued and the queue is polled every poll_interval seconds; a worker started before the run
+    is queued waits for it. idle_timeout stops the worker after that many seconds without a shard to run
+    (default: wait as long as shards are outstanding). progress_callback(done, total) is called when the
+    number of finished shards changes. Returns the number of shards this worker ran.
+    """
+    queue = WorkQueue(directory)
+    worker_id = _worker_id(worker_id)
+    ran, reported = 0, None
+    idle_since = time.monotonic()
+    while True:
+        if queue.load() is not None:
+            done = len(queue.done_indices())
+            if progress_callback is not None and done != reported:
+                progress_callback(done, queue.run['task_count'])
+                reported = done
+            if done >= queue.run['task_count']:
+                return ran
+            claimed = queue.claim(worker_id)
+            if claimed is not None:
+                task, claim_path = claimed
+                _, partial, stats = _run_task(task)
+                queue.complete(task, partial, stats, worker_id, claim_path)
+                ran += 1
+                idle_since = time.monotonic()
+                continue
+            queue.requeue_expired(lease_timeout)
+        if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+            return ran
+        time.sleep(poll_interval)
+
+def run_distributed_simulation(queue_dir, strategy_names, snr_db_range, N, alpha, sigma_n_sq, M_h_sims, M_g_sims,
+                               R_thresh, seed=None, local_workers=0, chunk_size=DEFAULT_CHUNK_SIZE, crn=False,
+                               eve_rate_mode='monte_carlo', keep_samples=False, resume=False,
+                               lease_timeout=DEFAULT_LEASE_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL,
+                               progress_callback=None, max_bytes=None, dtype=None):
+    """
+    run_parallel_simulation through a WorkQueue in queue_dir: the run's shards (the same tasks and seeds)
+    are queued, local_workers worker processes are started on this machine, and this process works on the
+    queue as well until every shard is done, while workers on other hosts may join with run_queue_worker
+    (see worker.py). The shard results are then reduced in task order, so the output is bit-identical to
+    run_parallel_simulation with the same seed, however many workers ran and whichever shards ran twice.
+    With resume, a queued run of the same parameters is continued, keeping its finished shards.
+    progress_callback(done, total) is called as shards finish. Returns the dict of run_parallel_simulation.
+    """
+    params = _make_params(strategy_names, snr_db_range, N, alpha, sigma_n_sq, M_g_sims, R_thresh, eve_rate_mode,
+                          keep_samples, max_bytes, dtype)
+    tasks = _make_tasks(params, M_h_sims, chunk_size, crn, seed)
+    fingerprint = {key: value for key, value in params.items() if key != 'profile'}
+    fingerprint.update(M_h_sims=M_h_sims, chunk_size=chunk_size, crn=crn)
+    queue = WorkQueue(queue_dir)
+    queue.create(tasks, params, fingerprint, seed, resume)
+
+    processes = [multiprocessing.Process(target=run_queue_worker, args=(queue_dir,),
+                                         kwargs={'lease_timeout': lease_timeout, 'poll_interval': poll_interval},
+                                         daemon=True)
+                 for _ in range(local_workers or 0)]
+    try:
+        for process in processes:
+            process.start()
+        run_queue_worker(queue_dir, lease_timeout=lease_timeout, poll_interval=poll_interval,
+                         progress_callback=progress_callback)
+    finally:
+        for process in processes:
+            process.join(timeout=poll_interval)
+            if process.is_alive(): # Still running a duplicate shard, or interrupted
+                process.terminate()
+                process.join()
+    return queue.reduce()
@@ -0,0 +1,106 @@
+"""
+Worker and reducer of distributed runs (run_simulation(queue_dir=...), config.QUEUE_DIR, main.py --queue-dir).
+
+The coordinator queues the run's (strategy, SNR, draw chunk) shards in QUEUE_DIR, works on them itself with
+config.WORKERS local worker processes and reduces the results once every shard is done. More workers, on
+this or other hosts sharing QUEUE_DIR (e.g. over NFS), join with `work`; they may start before the run is
+queued, and leave once all of its shards are done. A shard whose worker dies is handed out again after
+--lease-timeout seconds; duplicate results of a shard are counted once.
+
+Run from any directory:
+    python phy_sec_simulation/worker.py work QUEUE_DIR [--workers 4] [--idle-timeout 600]
+    python phy_sec_simulation/worker.py status QUEUE_DIR
+    python phy_sec_simulation/worker.py reduce QUEUE_DIR [--results-dir results]
+reduce merges the shard results of a finished run, e.g. after the coordinator was stopped, and writes the
+main.plot_results figure and results.json (without the per-draw samples) to --results-dir.
+Exit status: 0 on success, 1 when there is no queued run or reduce finds shards missing.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+
+from strategies import WorkQueue, run_queue_worker
+from strategies.work_queue import DEFAULT_LEASE_TIMEOUT, DEFAULT_POLL_INTERVAL
+
+def _work(args):
+    kwargs = {'lease_timeout': args.lease_timeout, 'poll_interval': args.poll_interval,
+              'idle_timeout': args.idle_timeout}
+    processes = [multiprocessing.Process(target=run_queue_worker, args=(args.queue_dir,), kwargs=kwargs)
+                 for _ in range(args.workers - 1)]
+    for process in processes:
+        process.start()
+    try:
+        ran = run_queue_worker(args.queue_dir, worker_id=args.worker_id, **kwargs)
+    finally:
+        for process in processes:
+            process.join()
+    print(f"Ran {ran} shard(s) in this process; the queued run is "
+          f"{'done' if _status(WorkQueue(args.queue_dir))[0] else 'not done'}")
+    return 0
+
+def _status(queue):
+    """(all shards done, status line) of the run queued in queue."""
+    if queue.load() is None:
+        return False, f"No run queued in {queue.directory}"
+    status = queue.status()
+    return status['done'] >= status['total'], (f"Run {status['run_id']}: {status['done']}/{status['total']} shards "
+                                               f"done, {status['claimed']} claimed, {status['pending']} pending")
+
+def _reduce(args):
+    import cli # Sets the non-interactive plotting backend
+    import main
+
+    queue = WorkQueue(args.queue_dir)
+    finished, line = _status(queue)
+    print(line)
+    if not finished:
+        return 1
+    results = queue.reduce()
+    run = queue.run['fingerprint']
+    # Figure titles and file name come from config.py, set to the queued run's parameters
+    overrides = {'N_ANTENNAS': run['N'], 'ALPHA_VAL': run['alpha'], 'R_THRESHOLD': run['R_thresh'],
+                 'M_MONTE_CARLO_H': run['M_h_sims'], 'M_MONTE_CARLO_G': run['M_g_sims'],
+                 'SIGMA_N_SQ': run['sigma_n_sq']}
+    with cli.job_config(overrides):
+        main.plot_results(run['snr_db_range'], results, results_dir=args.results_dir, show=False)
+    summary = {name: {key: series for key, series in values.items() if key != 'rs_samples'}
+               for name, values in results.items()}
+    results_path = os.path.join(args.results_dir, 'results.json')
+    cli._save_json({'settings': overrides, 'snr_db': run['snr_db_range'], 'results': summary}, results_path)
+    print(f"Results saved to {results_path}")
+    return 0
+
+def main_worker(argv=None):
+    parser = argparse.ArgumentParser(description="Works on, inspects or reduces the work queue of a distributed run.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    work_parser = commands.add_parser('work', help="Run shards of the queued run until all are done")
+    work_parser.add_argument('queue_dir')
+    work_parser.add_argument('--workers', type=int, default=1, help="Worker processes on this host (default: 1)")
+    work_parser.add_argument('--worker-id', help="Name of this worker in the queue (default: host-pid)")
+    work_parser.add_argument('--lease-timeout', type=float, default=DEFAULT_LEASE_TIMEOUT,
+                             help=f"Seconds before another worker's unfinished shard is run again "
+                                  f"(default: {DEFAULT_LEASE_TIMEOUT:g})")
+    work_parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL)
+    work_parser.add_argument('--idle-timeout', type=float,
+                             help="Stop after this many seconds without a shard to run (default: never)")
+
+    status_parser = commands.add_parser('status', help="Show the progress of the queued run")
+    status_parser.add_argument('queue_dir')
+
+    reduce_parser = commands.add_parser('reduce', help="Merge the shard results and write the figure and results.json")
+    reduce_parser.add_argument('queue_dir')
+    reduce_parser.add_argument('--results-dir', default='results')
+    args = parser.parse_args(argv)
+
+    if args.command == 'work':
+        return _work(args)
+    if args.command == 'status':
+        queue = WorkQueue(args.queue_dir)
+        print(_status(queue)[1])
+        return 0 if queue.run is not None else 1
+    return _reduce(args)
+
+if __name__ == "__main__":
+    sys.exit(main_worker())
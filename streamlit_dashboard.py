@@ -3,6 +3,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 import sys
 import os
+import json
+import hashlib
+import threading
+import time
 from pathlib import Path
    # Add this near the imports
 
@@ -15,18 +19,20 @@ if phy_sec_dir.exists() and str(phy_sec_dir) not in sys.path:
 # Import the phy_sec_simulation modules
 import phy_sec_simulation.config as default_config
 from phy_sec_simulation.strategies import (
-    strategy_1, strategy_1_2, strategy_2_constant_inst_power,
-    strategy_3_1, strategy_3_2, snr_to_total_power
+    STRATEGY_REGISTRY, evaluate_specs, snr_to_total_power, run_parallel_simulation, run_importance_sampling,
+    sort_samples, apply_threshold, ResultCache, run_cached_simulation, ChannelSource, StageProfile, profiling,
+    stage
 )
 
-# Define the strategy map similar to what we added to main.py
-STRATEGIES = {
-    "S1 (Const Power)": {"func": strategy_1, "marker": 'o', "linestyle": '-'},
-    "S1.2 (Var Power)": {"func": strategy_1_2, "marker": 'x', "linestyle": '--'},
-    "S2 (Const Inst Power)": {"func": strategy_2_constant_inst_power, "marker": 's', "linestyle": ':'},
-    "S3.1": {"func": strategy_3_1, "marker": '^', "linestyle": '-.'},
-    "S3.2": {"func": strategy_3_2, "marker": 'd', "linestyle": '-'}
-}
+# Bob draws per evaluation chunk of a single-process run; curves and cancellation advance chunk by chunk
+DASHBOARD_CHUNK_H = 250
+# Seconds between page refreshes while a simulation is running
+POLL_INTERVAL = 0.5
+# Finished simulations kept to serve repeat runs with identical inputs
+MAX_FINISHED_JOBS = 16
+
+# Strategy specs by display label, in registration order
+STRATEGIES = {spec.label: spec for spec in STRATEGY_REGISTRY.values()}
 
 # Set page config
 st.set_page_config(
@@ -42,6 +48,119 @@ This dashboard allows you to run and compare different physical layer security s
 with customizable parameters. Select which strategies to run and adjust parameters as needed.
 """)
 
+class SimulationCancelled(Exception):
+    """Raised inside a simulation job once its Cancel button has been pressed."""
+
+
+class SimulationJob:
+    """
+    One simulation running in a background thread. The thread never calls Streamlit: it publishes
+    per-SNR results, progress and status under a lock, and the page reads them on each rerun.
+    state is "running", "done", "cancelled" or "failed".
+    """
+    
+    def __init__(self, selected_strategies_names, config_params, workers=None):
+        self.strategies = list(selected_strategies_names)
+        self.config_params = config_params
+        self.workers = workers
+        snr_count = len(config_params["SNR_DB_RANGE"])
+        # Points not computed yet are NaN, which matplotlib leaves out of the curves
+        self.results = {name: {'secrecy_rates': [np.nan] * snr_count, 'outage_probs': [np.nan] * snr_count}
+                        for name in self.strategies}
+        for values in self.results.values():
+            if config_params["IMPORTANCE_SAMPLING"]: # Weighted estimates have no per-draw samples to keep
+                values['outage_prob_rel_error'] = [np.nan] * snr_count
+            else:
+                values['rs_samples'] = [np.zeros(0)] * snr_count
+        # Stage timings of the run when profiling is on; read it only once the job has finished
+        self.profile = StageProfile() if config_params.get("PROFILE") else None
+        self.progress = 0.0
+        self.status = "Starting simulation..."
+        self.state = "running"
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        try:
+            if self.profile is not None:
+                with profiling(self.profile):
+                    run_security_simulation(self, workers=self.workers)
+            else:
+                run_security_simulation(self, workers=self.workers)
+            state, status = "done", "Simulation completed!"
+        except SimulationCancelled:
+            state, status = "cancelled", "Simulation cancelled."
+        except Exception as exc:
+            state, status = "failed", f"Simulation failed: {exc}"
+        with self.lock:
+            self.state = state
+            self.status = status
+            if state == "done":
+                self.progress = 1.0
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    def update(self, progress=None, status=None):
+        """Publishes progress (0-1) and a status line; raises SimulationCancelled once cancelled."""
+        if self.cancel_event.is_set():
+            raise SimulationCancelled()
+        with self.lock:
+            if progress is not None:
+                self.progress = min(1.0, progress)
+            if status is not None:
+                self.status = status
+    
+    def set_point(self, name, snr_idx, secrecy_rate, outage_prob, rs_samples=None, rel_error=None):
+        """Publishes the result of one (strategy, SNR) point, with the relative error of importance sampling."""
+        with self.lock:
+            values = self.results[name]
+            values['secrecy_rates'][snr_idx] = secrecy_rate
+            values['outage_probs'][snr_idx] = outage_prob
+            if rs_samples is not None and 'rs_samples' in values:
+                values['rs_samples'][snr_idx] = rs_samples
+            if rel_error is not None and 'outage_prob_rel_error' in values:
+                values['outage_prob_rel_error'][snr_idx] = rel_error
+    
+    def snapshot(self):
+        """Consistent copy of (results, progress, status, state)."""
+        with self.lock:
+            results = {name: {key: list(series) for key, series in values.items()}
+                       for name, values in self.results.items()}
+            return results, self.progress, self.status, self.state
+
+
+def simulation_job_key(selected_strategies_names, config_params, workers):
+    """Hash of everything that determines a simulation's results."""
+    inputs = {"strategies": list(selected_strategies_names), "config_params": config_params, "workers": workers}
+    encoded = json.dumps(inputs, sort_keys=True, default=lambda value: np.asarray(value).tolist())
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+@st.cache_resource
+def simulation_jobs():
+    """Simulation jobs of this server process by input key, shared by all sessions and reruns."""
+    return {}
+
+
+def start_simulation_job(selected_strategies_names, config_params, workers=None):
+    """
+    Returns the key of the job for these inputs. A running or finished job with identical inputs
+    is reused, so repeat runs are served without computing; otherwise a new job is started.
+    """
+    jobs = simulation_jobs()
+    key = simulation_job_key(selected_strategies_names, config_params, workers)
+    job = jobs.get(key)
+    if job is None or job.state in ("cancelled", "failed"):
+        jobs[key] = SimulationJob(selected_strategies_names, config_params, workers)
+        finished = [old_key for old_key, old_job in jobs.items() if old_job.state != "running" and old_key != key]
+        for old_key in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del jobs[old_key]
+    return key
+
+
 # Create two columns for the layout
 col1, col2 = st.columns([1, 3])
 
@@ -112,108 +231,272 @@ with col1:
                                     max_value=10000,
                                     step=10)
     
+    EVE_RATE_MODE = st.selectbox("Eve's Rate Evaluation",
+                                 options=["monte_carlo", "analytic"],
+                                 index=0 if default_config.EVE_RATE_MODE == "monte_carlo" else 1,
+                                 help="'analytic' evaluates Eve's ergodic rate in closed form, "
+                                      "so Eve's Channel Simulations is not used.")
+    
+    DTYPE = st.selectbox("Channel Precision",
+                         options=["complex128", "complex64"],
+                         index=0 if default_config.DTYPE == "complex128" else 1,
+                         help="'complex64' draws and processes the channels in single precision, with float64 "
+                              "sums: faster and half the memory, with deviations far below the plotted precision. "
+                              "Single precision runs do not use the result cache.")
+    
+    SEED = st.number_input("Random Seed",
+                           value=default_config.SEED,
+                           min_value=0,
+                           step=1,
+                           help="Runs with the same seed and parameters draw the same channels.")
+    
+    IMPORTANCE_SAMPLING = st.checkbox("Importance Sampling for P(Rs > R_th)",
+                                      value=default_config.IMPORTANCE_SAMPLING,
+                                      help="Draws Bob's channel with a larger gain and weights each draw, "
+                                           "so probabilities far below 1/(Bob's Channel Simulations) are resolved. "
+                                           "Runs in a single process.")
+    
+    USE_CACHE = st.checkbox("Reuse Cached Results",
+                            value=True,
+                            help="Loads previously computed draws for the same parameters and seed from "
+                                 "phy_sec_simulation/results/cache and only computes the missing ones. "
+                                 "Runs in a single process.")
+    
+    PROFILE = st.checkbox("Profile Run",
+                          value=default_config.PROFILE,
+                          help="Times channel generation, AN construction, Bob's and Eve's rate evaluation "
+                               "and aggregation; the result is shown under Performance.")
+    
+    # Importance sampling and cached runs (complex128 only) run in this process
+    SINGLE_PROCESS = IMPORTANCE_SAMPLING or (USE_CACHE and DTYPE == "complex128")
+    WORKERS = st.number_input("Worker Processes",
+                              value=1,
+                              min_value=1,
+                              max_value=os.cpu_count() or 1,
+                              step=1,
+                              disabled=SINGLE_PROCESS,
+                              help="More than one worker shards the run over a process pool.")
+    if SINGLE_PROCESS:
+        st.caption("Worker processes are not used with Importance Sampling or Reuse Cached Results "
+                   "(complex128); the run uses a single process.")
+    
     # Plot settings
     st.subheader("Plot Settings")
     use_semilogy = st.checkbox("Use Semi-log Y-axis (log scale)", value=False)
     show_legend = st.checkbox("Show Legend", value=True)
     
-    # Run button
+    # Run and Cancel buttons; a run continues in the background while the page streams its curves
+    active_job = simulation_jobs().get(st.session_state.get("job_key"))
     run_simulation = st.button("Run Simulation", type="primary")
+    cancel_simulation = st.button("Cancel", disabled=active_job is None or active_job.state != "running")
 
 
 # Function to run simulation (adapted from the refactored main.py)
-def run_security_simulation(selected_strategies_names, config_params):
-    """Runs simulation for selected strategies with given parameters"""
-    results = {name: {'secrecy_rates': [], 'outage_probs': []} for name in selected_strategies_names}
+def run_security_simulation(job, workers=None):
+    """
+    Runs the simulation of job (its strategies and config_params) and publishes each SNR point as soon as
+    it is done. With workers set, the run is sharded over that many worker processes.
+    Raises SimulationCancelled between chunks of work once the job is cancelled.
+    """
+    config_params = job.config_params
+    specs = [STRATEGIES[name] for name in job.strategies if name in STRATEGIES]
+    snr_db_range = np.asarray(config_params["SNR_DB_RANGE"], dtype=float)
+    snr_count = len(snr_db_range)
+    P_totals = snr_to_total_power(snr_db_range, config_params["SIGMA_N_SQ"])
+    rng = ChannelSource(np.random.default_rng(config_params["SEED"]), dtype=config_params["DTYPE"])
     
-    progress_bar = st.progress(0.0)
-    status_text = st.empty()
+    if config_params["IMPORTANCE_SAMPLING"]:
+        for i, snr_db in enumerate(snr_db_range):
+            job.update(progress=i / snr_count, status=f"Importance sampling at SNR: {snr_db} dB ({i+1}/{snr_count})")
+            is_results = run_importance_sampling(
+                specs,
+                P_totals[i:i + 1],
+                config_params["N_ANTENNAS"],
+                config_params["ALPHA_VAL"],
+                config_params["SIGMA_N_SQ"],
+                config_params["M_MONTE_CARLO_H"],
+                config_params["M_MONTE_CARLO_G"],
+                config_params["R_THRESHOLD"],
+                eve_rate_mode=config_params["EVE_RATE_MODE"],
+                rng=rng
+            )
+            for spec in specs:
+                values = is_results[spec.name]
+                job.set_point(spec.label, i, values['secrecy_rates'][0], values['outage_probs'][0],
+                              rel_error=values['outage_prob_rel_error'][0])
+        return
     
-    snr_count = len(config_params["SNR_DB_RANGE"])
+    if config_params["USE_CACHE"] and config_params["DTYPE"] == "complex128": # Cached cells are complex128
+        cache = ResultCache(str(phy_sec_dir / "results" / "cache"), max_bytes=default_config.CACHE_MAX_BYTES)
+        for i, snr_db in enumerate(snr_db_range):
+            
+            def update_block_progress(done, total):
+                job.update(progress=(i + done / total) / snr_count,
+                           status=f"SNR: {snr_db} dB ({i+1}/{snr_count}), computed {done}/{total} uncached blocks")
+            
+            job.update(progress=i / snr_count, status=f"Processing SNR: {snr_db} dB ({i+1}/{snr_count})")
+            cached_results = run_cached_simulation(
+                specs,
+                snr_db_range[i:i + 1],
+                config_params["N_ANTENNAS"],
+                config_params["ALPHA_VAL"],
+                config_params["SIGMA_N_SQ"],
+                config_params["M_MONTE_CARLO_H"],
+                config_params["M_MONTE_CARLO_G"],
+                config_params["R_THRESHOLD"],
+                cache,
+                config_params["SEED"],
+                eve_rate_mode=config_params["EVE_RATE_MODE"],
+                progress_callback=update_block_progress
+            )
+            for spec in specs:
+                values = cached_results[spec.name]
+                job.set_point(spec.label, i, values['secrecy_rates'][0], values['outage_probs'][0],
+                              values['rs_samples'][0])
+        return
     
-    for i, snr_db in enumerate(config_params["SNR_DB_RANGE"]):
-        status_text.text(f"Processing SNR: {snr_db} dB ({i+1}/{snr_count})")
-        P = snr_to_total_power(snr_db, config_params["SIGMA_N_SQ"])
-        
-        # Current SNR results for each strategy
-        current_snr_results = {name: {'secrecy': [], 'outage': []} for name in selected_strategies_names}
+    if workers is not None:
+        labels = {spec.name: spec.label for spec in specs}
         
-        for mc_iter in range(config_params["M_MONTE_CARLO_H"]):
-            for name in selected_strategies_names:
-                if name not in STRATEGIES:
-                    continue
-                
-                strategy_func = STRATEGIES[name]["func"]
-                
-                rs, event_rs_gt_Rthresh = strategy_func(
-                    P, 
-                    config_params["N_ANTENNAS"], 
-                    config_params["ALPHA_VAL"],
-                    config_params["SIGMA_N_SQ"], 
-                    config_params["M_MONTE_CARLO_G"], 
-                    config_params["R_THRESHOLD"]
-                )
-                current_snr_results[name]['secrecy'].append(rs)
-                current_snr_results[name]['outage'].append(event_rs_gt_Rthresh)
+        def update_progress(done, total):
+            job.update(progress=done / total, status=f"Completed {done}/{total} tasks on {workers} worker(s)")
         
-        # Average results for the current SNR
-        for name in selected_strategies_names:
-            if name in STRATEGIES:
-                avg_rs = np.mean(current_snr_results[name]['secrecy'] if current_snr_results[name]['secrecy'] else [0])
-                avg_outage_prob = np.mean(current_snr_results[name]['outage'] if current_snr_results[name]['outage'] else [0])
-                
-                results[name]['secrecy_rates'].append(avg_rs)
-                results[name]['outage_probs'].append(avg_outage_prob)
+        def publish_snr(snr_idx, values):
+            for name, (secrecy_rate, outage_prob) in values.items():
+                job.set_point(labels[name], snr_idx, secrecy_rate, outage_prob)
         
-        # Update progress bar
-        progress_bar.progress((i + 1) / snr_count)
+        parallel_results = run_parallel_simulation(
+            list(labels),
+            config_params["SNR_DB_RANGE"],
+            config_params["N_ANTENNAS"],
+            config_params["ALPHA_VAL"],
+            config_params["SIGMA_N_SQ"],
+            config_params["M_MONTE_CARLO_H"],
+            config_params["M_MONTE_CARLO_G"],
+            config_params["R_THRESHOLD"],
+            seed=config_params["SEED"],
+            workers=workers,
+            eve_rate_mode=config_params["EVE_RATE_MODE"],
+            keep_samples=True,
+            progress_callback=update_progress,
+            snr_callback=publish_snr,
+            dtype=config_params["DTYPE"]
+        )
+        for name, values in parallel_results.items():
+            for snr_idx in range(snr_count):
+                job.set_point(labels[name], snr_idx, values['secrecy_rates'][snr_idx], values['outage_probs'][snr_idx],
+                              values['rs_samples'][snr_idx])
+        return
     
-    status_text.text("Simulation completed!")
-    return results
+    M_h_sims = config_params["M_MONTE_CARLO_H"]
+    chunk_sizes = [min(DASHBOARD_CHUNK_H, M_h_sims - start) for start in range(0, M_h_sims, DASHBOARD_CHUNK_H)]
+    
+    for i, snr_db in enumerate(snr_db_range):
+        chunks = {spec.name: [] for spec in specs}
+        for c, chunk_size in enumerate(chunk_sizes):
+            job.update(progress=(i + c / len(chunk_sizes)) / snr_count,
+                       status=f"Processing SNR: {snr_db} dB ({i+1}/{snr_count})")
+            
+            # All selected strategies are evaluated on the same chunk of channel draws
+            evaluated = evaluate_specs(
+                specs,
+                P_totals[i:i + 1],
+                config_params["N_ANTENNAS"],
+                config_params["ALPHA_VAL"],
+                config_params["SIGMA_N_SQ"],
+                chunk_size,
+                config_params["M_MONTE_CARLO_G"],
+                config_params["R_THRESHOLD"],
+                eve_rate_mode=config_params["EVE_RATE_MODE"],
+                rng=rng
+            )
+            for spec in specs:
+                chunks[spec.name].append(evaluated[spec.name][0][0])
+        
+        with stage('aggregation'):
+            for spec in specs:
+                rs = np.concatenate(chunks[spec.name]) if chunks[spec.name] else np.zeros(0)
+                job.set_point(spec.label, i, float(np.mean(rs)) if rs.size else 0.0,
+                              float(np.mean(rs > config_params["R_THRESHOLD"])) if rs.size else 0.0, sort_samples(rs))
 
 
 # Display area for plots
 with col2:
     if run_simulation and strategies_to_run:
+        # Create config params dictionary
+        config_params = {
+            "SNR_DB_RANGE": SNR_DB_RANGE,
+            "N_ANTENNAS": N_ANTENNAS,
+            "ALPHA_VAL": ALPHA_VAL,
+            "SIGMA_N_SQ": SIGMA_N_SQ,
+            "R_THRESHOLD": R_THRESHOLD,
+            "M_MONTE_CARLO_H": M_MONTE_CARLO_H,
+            "M_MONTE_CARLO_G": M_MONTE_CARLO_G,
+            "EVE_RATE_MODE": EVE_RATE_MODE,
+            "SEED": int(SEED),
+            "DTYPE": DTYPE,
+            "IMPORTANCE_SAMPLING": IMPORTANCE_SAMPLING,
+            "USE_CACHE": USE_CACHE,
+            "PROFILE": PROFILE
+        }
+        
+        # Start (or reuse) the background run; single-process runs get no workers, so they share one job key
+        workers = WORKERS if WORKERS > 1 and not SINGLE_PROCESS else None
+        st.session_state["job_key"] = start_simulation_job(strategies_to_run, config_params, workers=workers)
+    
+    active_job = simulation_jobs().get(st.session_state.get("job_key"))
+    if cancel_simulation and active_job is not None:
+        active_job.cancel()
+    
+    if active_job is not None and not (run_simulation and not strategies_to_run):
         st.header("Simulation Results")
         
-        with st.spinner("Running simulation, please wait..."):
-            # Create config params dictionary
-            config_params = {
-                "SNR_DB_RANGE": SNR_DB_RANGE,
-                "N_ANTENNAS": N_ANTENNAS,
-                "ALPHA_VAL": ALPHA_VAL,
-                "SIGMA_N_SQ": SIGMA_N_SQ,
-                "R_THRESHOLD": R_THRESHOLD,
-                "M_MONTE_CARLO_H": M_MONTE_CARLO_H,
-                "M_MONTE_CARLO_G": M_MONTE_CARLO_G
-            }
-            
-            # Run simulation
-            simulation_results = run_security_simulation(strategies_to_run, config_params)
+        job_results, job_progress, job_status, job_state = active_job.snapshot()
+        st.progress(job_progress)
+        if job_state == "failed":
+            st.error(job_status)
+        elif job_state == "cancelled":
+            st.warning(job_status + " Curves show the SNR points finished before cancelling.")
+        else:
+            st.text(job_status)
+        
+        # Plots describe the job's run; P(Rs > R_th) is re-evaluated from the kept per-draw secrecy rates,
+        # so changing the Rate Threshold updates it instantly. Importance-sampling runs keep no samples and are
+        # shown at the threshold they were run with.
+        shown_params = active_job.config_params
+        shown_strategies = active_job.strategies
+        if all('rs_samples' in values for values in job_results.values()):
+            shown_threshold = R_THRESHOLD
+        else:
+            shown_threshold = shown_params["R_THRESHOLD"]
+        simulation_results = apply_threshold(job_results, shown_threshold)
+        for name, values in simulation_results.items():
+            # Points still running stay blank
+            values['outage_probs'] = [np.nan if np.isnan(rate) else prob
+                                      for rate, prob in zip(values['secrecy_rates'], values['outage_probs'])]
         
         # Create tabs for different plot types
-        plot_tab1, plot_tab2, data_tab = st.tabs(["Secrecy Rate", "P(Rs > R_th)", "Raw Data"])
+        plot_tab1, plot_tab2, data_tab, perf_tab = st.tabs(["Secrecy Rate", "P(Rs > R_th)", "Raw Data", "Performance"])
         
         with plot_tab1:
             # Secrecy Rate Plot
             fig1, ax1 = plt.subplots(figsize=(10, 6))
             
-            for name in strategies_to_run:
+            for name in shown_strategies:
                 if name in simulation_results:
                     style = STRATEGIES[name]
                     data_to_plot = simulation_results[name]['secrecy_rates']
                     
                     if use_semilogy:
-                        ax1.semilogy(SNR_DB_RANGE, data_to_plot, marker=style["marker"], 
-                                   linestyle=style["linestyle"], label=name)
+                        ax1.semilogy(shown_params["SNR_DB_RANGE"], data_to_plot, marker=style.marker, 
+                                   linestyle=style.linestyle, label=name)
                     else:
-                        ax1.plot(SNR_DB_RANGE, data_to_plot, marker=style["marker"], 
-                               linestyle=style["linestyle"], label=name)
+                        ax1.plot(shown_params["SNR_DB_RANGE"], data_to_plot, marker=style.marker, 
+                               linestyle=style.linestyle, label=name)
             
             ax1.set_xlabel('SNR (dB)')
             ax1.set_ylabel('Average Secrecy Rate (bits/s/Hz)')
-            ax1.set_title(f'Average Secrecy Rate (N={N_ANTENNAS}, α={ALPHA_VAL})')
+            ax1.set_title(f'Average Secrecy Rate (N={shown_params["N_ANTENNAS"]}, α={shown_params["ALPHA_VAL"]})')
             ax1.grid(True, which="both" if use_semilogy else "major")
             
             if show_legend:
@@ -225,21 +508,22 @@ with col2:
             # Outage Probability Plot
             fig2, ax2 = plt.subplots(figsize=(10, 6))
             
-            for name in strategies_to_run:
+            for name in shown_strategies:
                 if name in simulation_results:
                     style = STRATEGIES[name]
                     data_to_plot = simulation_results[name]['outage_probs']
                     
                     if use_semilogy:
-                        ax2.semilogy(SNR_DB_RANGE, data_to_plot, marker=style["marker"], 
-                                   linestyle=style["linestyle"], label=name)
+                        ax2.semilogy(shown_params["SNR_DB_RANGE"], data_to_plot, marker=style.marker, 
+                                   linestyle=style.linestyle, label=name)
                     else:
-                        ax2.plot(SNR_DB_RANGE, data_to_plot, marker=style["marker"], 
-                               linestyle=style["linestyle"], label=name)
+                        ax2.plot(shown_params["SNR_DB_RANGE"], data_to_plot, marker=style.marker, 
+                               linestyle=style.linestyle, label=name)
             
             ax2.set_xlabel('SNR (dB)')
-            ax2.set_ylabel(f'P(Rs > R_th={R_THRESHOLD})')
-            ax2.set_title(f'P(Rs > R_th={R_THRESHOLD}) (N={N_ANTENNAS}, α={ALPHA_VAL})')
+            ax2.set_ylabel(f'P(Rs > R_th={shown_threshold})')
+            ax2.set_title(f'P(Rs > R_th={shown_threshold}) '
+                          f'(N={shown_params["N_ANTENNAS"]}, α={shown_params["ALPHA_VAL"]})')
             ax2.grid(True, which="both" if use_semilogy else "major")
             
             if not use_semilogy:
@@ -258,28 +542,62 @@ with col2:
             import pandas as pd
             
             data_rows = []
-            for snr_idx, snr in enumerate(SNR_DB_RANGE):
-                for name in strategies_to_run:
+            for snr_idx, snr in enumerate(shown_params["SNR_DB_RANGE"]):
+                for name in shown_strategies:
                     if name in simulation_results:
-                        data_rows.append({
+                        row = {
                             "Strategy": name,
                             "SNR (dB)": snr,
                             "Secrecy Rate": simulation_results[name]['secrecy_rates'][snr_idx],
                             "P(Rs > R_th)": simulation_results[name]['outage_probs'][snr_idx]
-                        })
+                        }
+                        if 'outage_prob_rel_error' in simulation_results[name]:
+                            row["P(Rs > R_th) Rel. Error"] = simulation_results[name]['outage_prob_rel_error'][snr_idx]
+                        data_rows.append(row)
             
             df = pd.DataFrame(data_rows)
             st.dataframe(df)
             
             # Add download button for the data
             csv = df.to_csv(index=False)
-            param_str = f"N{N_ANTENNAS}_alpha{ALPHA_VAL}_R{R_THRESHOLD}"
+            param_str = f"N{shown_params['N_ANTENNAS']}_alpha{shown_params['ALPHA_VAL']}_R{shown_threshold}"
             st.download_button(
                 label="Download Data as CSV",
                 data=csv,
                 file_name=f"phy_sec_sim_results_{param_str}.csv",
                 mime="text/csv",
             )
+        
+        with perf_tab:
+            st.subheader("Performance Profile")
+            
+            if active_job.profile is None:
+                st.info("Check 'Profile Run' under Monte Carlo Settings and run the simulation to time its stages.")
+            elif job_state == "running":
+                st.info("The profile is shown once the run finishes.")
+            else:
+                import pandas as pd
+                
+                profile = active_job.profile.to_dict()
+                perf_rows = [{
+                    "Stage": stage_name,
+                    "Calls": entry['calls'],
+                    "Seconds": entry['seconds'],
+                    "Share": entry['share'],
+                    "ms per Call": 1e3 * entry['seconds'] / entry['calls'] if entry['calls'] else 0.0
+                } for stage_name, entry in profile['stages'].items()]
+                perf_df = pd.DataFrame(perf_rows)
+                st.text(f"Wall time: {profile['wall_seconds']:.3f} s, time in timed stages: "
+                        f"{profile['staged_seconds']:.3f} s (summed over worker processes)")
+                st.dataframe(perf_df)
+                if perf_rows:
+                    st.bar_chart(perf_df.set_index("Stage")["Seconds"])
+                st.download_button(
+                    label="Download Profile as JSON",
+                    data=json.dumps(profile, indent=2),
+                    file_name="phy_sec_sim_profile.json",
+                    mime="application/json",
+                )
     
     elif not strategies_to_run and run_simulation:
         st.error("Please select at least one strategy before running the simulation.")
@@ -298,4 +616,9 @@ with col2:
         - **S3.2**: Strategy 3.2
         
         Use the checkboxes on the left to select which strategies you want to compare.
-        """) 
\ No newline at end of file
+        """) 
+
+# While a run is in progress, rerun the page periodically to stream its partial curves
+if active_job is not None and active_job.state == "running":
+    time.sleep(POLL_INTERVAL)
+    st.rerun()